@@ -0,0 +1,12 @@
+"""URL админки, которые собираются при первом обращении.
+
+Корневой URLconf подключает этот модуль строкой, без include(), поэтому
+он импортируется только при первом запросе к /admin/ или первом
+reverse('admin:...'). Вместе с ним запускается autodiscover(): админки
+приложений и их зависимости не загружаются при старте процесса.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
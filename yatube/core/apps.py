@@ -3,3 +3,20 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model, user_logged_out
+        from django.core import checks as django_checks
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from . import auth, checks, querycache
+
+        User = get_user_model()
+        user_logged_out.connect(auth.discard_session_user)
+        post_save.connect(auth.discard_saved_user, sender=User)
+        post_delete.connect(auth.discard_saved_user, sender=User)
+        connection_created.connect(querycache.install)
+        django_checks.register(
+            checks.shared_cache, django_checks.Tags.caches, deploy=True
+        )
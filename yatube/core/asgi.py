@@ -0,0 +1,195 @@
+"""ASGI-режим для Django 2.2.
+
+Django 2.2 не умеет исполнять async-представления, поэтому ASGI-адаптер
+держит соединения (чтение тела запроса и отправку ответа) в event loop,
+а сам синхронный обработчик Django вместе с ORM запускает в ограниченном
+пуле потоков. Медленный клиент больше не занимает рабочий поток:
+поток нужен только на время работы представления.
+
+Тело ответа передаётся кусками через очередь ограниченного размера,
+поэтому потоковые ответы (ленты, файлы) не собираются в памяти целиком.
+Обычная страница помещается в очередь сразу, и поток освобождается,
+не дожидаясь клиента; большой ответ медленному клиенту держит поток,
+пока очередь не разгрузится.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+# Сколько кусков тела ответа ждут отправки клиенту
+STREAM_BUFFER = 16
+
+
+def build_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client_host, client_port = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client_host,
+        'REMOTE_PORT': str(client_port),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        if key in environ:
+            # Несколько заголовков Cookie склеиваются через '; ' (RFC 6265),
+            # остальные - через запятую (RFC 7230).
+            separator = '; ' if key == 'HTTP_COOKIE' else ','
+            value = f'{environ[key]}{separator}{value}'
+        environ[key] = value
+    return environ
+
+
+def stream_wsgi(application, environ, emit):
+    """Выполняет WSGI-приложение и передаёт ответ в emit сообщениями ASGI.
+
+    Последним всегда передаётся None, даже если приложение упало.
+    """
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        # Каждая пара отдельно: несколько Set-Cookie нельзя склеивать.
+        started['headers'] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+
+    try:
+        result = application(environ, start_response)
+        try:
+            emit({
+                'type': 'http.response.start',
+                'status': started['status'],
+                'headers': started['headers'],
+            })
+            for chunk in result:
+                if chunk:
+                    emit({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+    finally:
+        emit(None)
+
+
+def run_wsgi(application, environ):
+    """Выполняет WSGI-приложение и собирает ответ целиком.
+
+    Для внутренних запросов (прогрев, фоновый пересчёт страниц), которым
+    нужен весь ответ сразу.
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+
+    result = application(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
+class ASGIHandler:
+    """ASGI-приложение поверх WSGI-приложения Django.
+
+    routes - словарь {префикс пути: ASGI-приложение} для нативно
+    асинхронных обработчиков, которые обслуживаются прямо в event loop.
+    """
+
+    def __init__(self, wsgi_application, max_workers=10, routes=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='asgi-worker'
+        )
+        self.routes = dict(routes or {})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported scope type {scope['type']}")
+        for prefix, app in self.routes.items():
+            if scope['path'].startswith(prefix):
+                return await app(scope, receive, send)
+        body = await self.read_body(receive)
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue(maxsize=STREAM_BUFFER)
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        worker = loop.run_in_executor(
+            self.executor,
+            stream_wsgi,
+            self.wsgi_application,
+            build_environ(scope, body),
+            emit
+        )
+        error = None
+        while True:
+            message = await queue.get()
+            if message is None:
+                break
+            if error is None:
+                try:
+                    await send(message)
+                except Exception as exc:
+                    # Клиент ушёл: дочитываем очередь, чтобы поток не
+                    # остался ждать места в ней.
+                    error = exc
+        await worker
+        if error is not None:
+            raise error
+
+    @staticmethod
+    async def read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,71 @@
+"""Аутентификация без обращения к БД на каждый запрос.
+
+Сессии хранятся в кеше с записью в БД (SESSION_ENGINE = cached_db),
+а CachedAuthenticationMiddleware держит в общем кеше объект User для
+каждой сессии на USER_CACHE_TIMEOUT секунд. Ключ содержит хеш пароля из
+сессии и версию пользователя - тег core.pagecache, который меняется при
+любом сохранении или удалении пользователя (смена пароля,
+деактивация). Кеш общий для всех воркеров, поэтому после смены пароля
+старые сессии перестают приниматься сразу во всех процессах. Каждый
+запрос получает собственную копию пользователя из кеша, без чужих
+кешей прав.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .pagecache import invalidate_tags, tag_versions
+
+USER_CACHE_TIMEOUT = 60
+
+USER_KEY = 'auth:user:{}:{}:{}'
+USER_TAG = 'user:{}'
+
+
+def _user_key(session):
+    user_id = session.get(auth.SESSION_KEY)
+    tag = USER_TAG.format(user_id)
+    version = tag_versions([tag])[tag]
+    return USER_KEY.format(
+        session.session_key, session.get(auth.HASH_SESSION_KEY), version
+    )
+
+
+def get_cached_user(request):
+    if hasattr(request, '_cached_user'):
+        return request._cached_user
+    session = request.session
+    key = None
+    if session.session_key and auth.SESSION_KEY in session:
+        key = _user_key(session)
+        user = cache.get(key)
+        if user is not None:
+            request._cached_user = user
+            return user
+    user = auth.get_user(request)
+    if key is not None and user.is_authenticated:
+        cache.set(key, user, getattr(
+            settings, 'USER_CACHE_TIMEOUT', USER_CACHE_TIMEOUT
+        ))
+    request._cached_user = user
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """Замена AuthenticationMiddleware с кешем пользователя."""
+
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+def discard_session_user(sender, request, user, **kwargs):
+    # Сессия при выходе очищается, её ключ больше не встретится; заодно
+    # сбрасываем пользователя, чтобы не держать его копию до таймаута.
+    if user is not None:
+        invalidate_tags(USER_TAG.format(user.pk))
+
+
+def discard_saved_user(sender, instance, **kwargs):
+    invalidate_tags(USER_TAG.format(instance.pk))
@@ -0,0 +1,24 @@
+"""Системные проверки настроек проекта."""
+from django.conf import settings
+from django.core import checks
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache(app_configs, **kwargs):
+    """Кеш боевого сервера должен быть общим для всех воркеров.
+
+    Проверка из check --deploy: тесты и разработка живут с кешем в памяти.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [checks.Error(
+        f'Кеш {backend} живёт в памяти одного процесса: сброс кеша групп, '
+        f'страниц, запросов и сессий не дойдёт до других воркеров.',
+        hint='Задайте CACHE_LOCATION с адресом memcached.',
+        id='core.E001',
+    )]
@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def live(request):
+    return {
+        'live_events': settings.LIVE_EVENTS
+    }
@@ -0,0 +1,141 @@
+"""Очередь исходящей почты.
+
+OutboxBackend вместо отправки сохраняет письма в таблицу OutboxMessage,
+поэтому запрос (например, сброс пароля) не ждёт SMTP. Команда send_outbox
+забирает письма пачками и отправляет через одно переиспользуемое
+соединение настоящего бэкенда OUTBOX_DELIVERY_BACKEND; неудачные попытки
+повторяются с экспоненциальной задержкой. Перед отправкой пачка писем
+захватывается одним условным UPDATE, который переносит scheduled_at на
+SEND_LEASE секунд вперёд и помечает строки токеном захвата, поэтому два
+одновременных send_outbox не отправят одно письмо дважды, а письмо
+упавшего отправителя уйдёт после окончания аренды. Отправленные письма
+хранятся OUTBOX_KEEP_SENT секунд, а письма, исчерпавшие MAX_ATTEMPTS
+попыток, - OUTBOX_KEEP_DEAD секунд; затем их удаляет периодическая
+задача core.tasks.purge_sent_mail.
+"""
+import pickle
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 30
+SEND_LEASE = 60 * 5
+
+
+class OutboxBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            connection, message.connection = message.connection, None
+            rows.append(OutboxMessage(message=pickle.dumps(message)))
+            message.connection = connection
+        OutboxMessage.objects.bulk_create(rows)
+        return len(rows)
+
+
+def delivery_connection():
+    return get_connection(
+        getattr(
+            settings,
+            'OUTBOX_DELIVERY_BACKEND',
+            'django.core.mail.backends.smtp.EmailBackend'
+        ),
+        fail_silently=False
+    )
+
+
+def pending_messages(now=None):
+    return OutboxMessage.objects.filter(
+        sent_at=None,
+        scheduled_at__lte=now or timezone.now(),
+        attempts__lt=MAX_ATTEMPTS
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=RETRY_BASE_DELAY * 2 ** (attempts - 1))
+
+
+def claim(now, limit):
+    """Захватывает до limit готовых писем; возвращает их строки.
+
+    Письма, которые забрал другой отправитель, не совпадут с условием
+    pending_messages во внешнем UPDATE и пропускаются.
+    """
+    token = uuid.uuid4()
+    pending_messages(now).filter(
+        pk__in=pending_messages(now).values('pk')[:limit]
+    ).update(
+        scheduled_at=now + timedelta(seconds=SEND_LEASE), claim_token=token
+    )
+    return list(OutboxMessage.objects.filter(claim_token=token))
+
+
+def send_batch(connection, batch_size=BATCH_SIZE):
+    """Отправляет одну пачку через открытое соединение.
+
+    Возвращает пару (отправлено, неудачно).
+    """
+    now = timezone.now()
+    batch = claim(now, batch_size)
+    sent_ids = []
+    failed = []
+    for row in batch:
+        try:
+            message = pickle.loads(bytes(row.message))
+            message.connection = connection
+            connection.send_messages([message])
+        except Exception as error:
+            row.attempts += 1
+            row.last_error = repr(error)
+            row.scheduled_at = now + retry_delay(row.attempts)
+            failed.append(row)
+        else:
+            sent_ids.append(row.pk)
+    if sent_ids:
+        OutboxMessage.objects.filter(pk__in=sent_ids).update(sent_at=now)
+    if failed:
+        OutboxMessage.objects.bulk_update(
+            failed, ('attempts', 'last_error', 'scheduled_at')
+        )
+    return len(sent_ids), len(failed)
+
+
+def deliver_outbox(batch_size=BATCH_SIZE, connection=None):
+    """Отправляет все готовые письма, не закрывая соединение между пачками.
+
+    Возвращает пару (отправлено, неудачно).
+    """
+    if not pending_messages().exists():
+        return 0, 0
+    connection = connection or delivery_connection()
+    total_sent = total_failed = 0
+    with connection:
+        while True:
+            sent, failed = send_batch(connection, batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < batch_size:
+                return total_sent, total_failed
+
+
+def purge_sent():
+    """Удаляет письма, отправленные больше OUTBOX_KEEP_SENT секунд назад."""
+    cutoff = timezone.now() - timedelta(seconds=settings.OUTBOX_KEEP_SENT)
+    return OutboxMessage.objects.filter(sent_at__lt=cutoff).delete()[0]
+
+
+def purge_dead():
+    """Удаляет письма без попыток в запасе старше OUTBOX_KEEP_DEAD секунд."""
+    cutoff = timezone.now() - timedelta(seconds=settings.OUTBOX_KEEP_DEAD)
+    return OutboxMessage.objects.filter(
+        sent_at=None, attempts__gte=MAX_ATTEMPTS, scheduled_at__lt=cutoff
+    ).delete()[0]
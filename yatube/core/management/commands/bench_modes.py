@@ -0,0 +1,109 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный клиент: сравнивает запущенные серверы на страницах '
+        'index, profile и post_detail. Серверы запускаются отдельно на '
+        'той же базе, например синхронный WSGI '
+        '"gunicorn yatube.wsgi --threads 10 -b 127.0.0.1:8000" и ASGI '
+        '"uvicorn yatube.asgi:application --port 8001". Клиент держит '
+        '--connections одновременных соединений; --read-delay замедляет '
+        'чтение ответа, как у медленного клиента.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://127.0.0.1:8000')
+        parser.add_argument('--asgi', default='http://127.0.0.1:8001')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--connections', type=int, default=200)
+        parser.add_argument(
+            '--read-delay', type=float, default=0.0,
+            help='Пауза в секундах после каждых --read-chunk байт ответа'
+        )
+        parser.add_argument('--read-chunk', type=int, default=1024)
+
+    def handle(self, *args, **options):
+        post = Post.objects.select_related('author').first()
+        if post is None:
+            raise CommandError('Для замера нужен хотя бы один пост')
+        paths = {
+            'index': reverse('posts:index'),
+            'profile': reverse('posts:profile', args=[post.author.username]),
+            'post_detail': reverse('posts:post_detail', args=[post.pk]),
+        }
+        for name, path in paths.items():
+            for mode in ('wsgi', 'asgi'):
+                rate, latencies, errors = asyncio.run(
+                    self.load(options[mode] + path, options)
+                )
+                if not latencies:
+                    raise CommandError(
+                        f'{mode}: сервер {options[mode]} не ответил'
+                    )
+                self.stdout.write(
+                    f'{name:12} {mode.upper()}: {rate:8.1f} req/s   '
+                    f'p50 {self.percentile(latencies, 50):7.1f} ms   '
+                    f'p99 {self.percentile(latencies, 99):7.1f} ms   '
+                    f'ошибок: {errors}'
+                )
+
+    @staticmethod
+    def percentile(latencies, percent):
+        if len(latencies) == 1:
+            return latencies[0] * 1000
+        return statistics.quantiles(latencies, n=100)[percent - 1] * 1000
+
+    async def load(self, url, options):
+        """Выполняет --requests запросов; (req/s, задержки, ошибки)."""
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        request = (
+            f'GET {parts.path or "/"} HTTP/1.1\r\n'
+            f'Host: {parts.netloc}\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode()
+        semaphore = asyncio.Semaphore(options['connections'])
+
+        async def fetch():
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    ok = await self.fetch(host, port, request, options)
+                except OSError:
+                    ok = False
+                return time.perf_counter() - started if ok else None
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            fetch() for _ in range(options['requests'])
+        ))
+        elapsed = time.perf_counter() - started
+        latencies = [result for result in results if result is not None]
+        return (
+            len(latencies) / elapsed,
+            latencies,
+            len(results) - len(latencies),
+        )
+
+    @staticmethod
+    async def fetch(host, port, request, options):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            status = await reader.readline()
+            while await reader.read(options['read_chunk']):
+                if options['read_delay']:
+                    await asyncio.sleep(options['read_delay'])
+        finally:
+            writer.close()
+        return status.split()[1:2] == [b'200']
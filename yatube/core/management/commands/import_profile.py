@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.startup import (
+    TARGETS, import_times, loaded_lazy_modules, startup_time
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, сколько стоит импорт каждого модуля при холодном '
+        'старте процесса, и сравнивает время старта с бюджетом'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', choices=sorted(TARGETS), default='wsgi',
+            help='Что импортировать в чистом интерпретаторе'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=25,
+            help='Сколько самых дорогих модулей показать'
+        )
+        parser.add_argument(
+            '--by-package', action='store_true',
+            help='Суммировать собственное время по пакетам верхнего уровня'
+        )
+
+    def handle(self, *args, **options):
+        times = import_times(options['target'])
+        if options['by_package']:
+            packages = defaultdict(int)
+            for item in times:
+                packages[item.module.split('.')[0]] += item.self_us
+            rows = sorted(packages.items(), key=lambda row: -row[1])
+            self.stdout.write(f'{"собств., мс":>12}  пакет')
+            for package, self_us in rows[:options['limit']]:
+                self.stdout.write(f'{self_us / 1000:12.1f}  {package}')
+        else:
+            rows = sorted(times, key=lambda item: -item.cumulative_us)
+            self.stdout.write(f'{"всего, мс":>10} {"собств., мс":>12}  модуль')
+            for item in rows[:options['limit']]:
+                self.stdout.write(
+                    f'{item.cumulative_us / 1000:10.1f} '
+                    f'{item.self_us / 1000:12.1f}  {item.module}'
+                )
+        elapsed, modules = startup_time(options['target'])
+        budget = settings.STARTUP_BUDGET_MS
+        style = self.style.SUCCESS if elapsed <= budget else self.style.ERROR
+        self.stdout.write(style(
+            f'Старт {options["target"]}: {elapsed:.0f} мс '
+            f'при бюджете {budget} мс, модулей: {len(modules)}'
+        ))
+        lazy = loaded_lazy_modules(modules)
+        if lazy:
+            self.stdout.write(self.style.WARNING(
+                'При старте загружаются: ' + ', '.join(lazy)
+            ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from core.memo import report, reset_report
+from posts.warmup import fetch_local, warm_paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет страницы ленты, групп и профилей через приложение в этом '
+        'процессе и показывает, сколько вычислений сэкономило мемо запроса '
+        '(core.memo) в каждом представлении. Кеш страниц на время замера '
+        'отключается, иначе шаблоны не рендерятся'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds', type=int, default=1,
+            help='Сколько раз запросить каждую страницу'
+        )
+
+    def handle(self, *args, **options):
+        application = get_wsgi_application()
+        paths = warm_paths()
+        reset_report()
+        with override_settings(PAGE_CACHE_VIEWS=()):
+            for _ in range(options['rounds']):
+                for path in paths:
+                    fetch_local(application, path)
+        stats = report()
+        if not stats:
+            self.stdout.write('Ни одно представление не использовало мемо')
+            return
+        self.stdout.write(
+            f'{"view":30} {"запросов":>9} {"сэкономлено":>12} '
+            f'{"вычислено":>10} {"на запрос":>10}'
+        )
+        for view, item in sorted(
+            stats.items(), key=lambda pair: -pair[1]['hits']
+        ):
+            self.stdout.write(
+                f'{view:30} {item["requests"]:>9} {item["hits"]:>12} '
+                f'{item["misses"]:>10} '
+                f'{item["hits"] / item["requests"]:>10.1f}'
+            )
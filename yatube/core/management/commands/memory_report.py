@@ -0,0 +1,105 @@
+import os
+import signal
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+
+from core.memory import child_pids, memory_usage
+from core.preload import preload
+from posts.warmup import fetch_local, warm_paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает уникальную и разделяемую память воркеров. С --simulate '
+        'сам форкает воркеры, чтобы сравнить режимы с preload и без'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pids', type=int, nargs='+', default=())
+        parser.add_argument(
+            '--master', type=int, default=None,
+            help='PID мастер-процесса; отчёт по всем его потомкам'
+        )
+        parser.add_argument(
+            '--simulate', type=int, default=0, metavar='WORKERS',
+            help='Форкнуть столько воркеров и замерить их'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help='Сколько запросов обработает каждый воркер до замера'
+        )
+        parser.add_argument(
+            '--no-preload', action='store_false', dest='preload',
+            help='Форкать без предварительной инициализации'
+        )
+        parser.add_argument(
+            '--no-freeze', action='store_false', dest='freeze',
+            help='Не вызывать gc.freeze() перед fork()'
+        )
+
+    def handle(self, *args, **options):
+        if not sys.platform.startswith('linux'):
+            raise CommandError('Замер памяти работает только в Linux')
+        if options['simulate']:
+            self.simulate(options)
+            return
+        pids = list(options['pids'])
+        if options['master']:
+            pids.extend(child_pids(options['master']))
+        if not pids:
+            raise CommandError('Укажите --pids, --master или --simulate')
+        self.report(pids)
+
+    def report(self, pids):
+        self.stdout.write(
+            f'{"pid":>8} {"RSS":>9} {"PSS":>9} {"unique":>9} {"shared":>9}'
+        )
+        usages = [memory_usage(pid) for pid in pids]
+        for usage in usages:
+            self.stdout.write(
+                f'{usage.pid:>8} {usage.rss / 1024:8.1f}M '
+                f'{usage.pss / 1024:8.1f}M {usage.unique / 1024:8.1f}M '
+                f'{usage.shared / 1024:8.1f}M'
+            )
+        unique = sum(usage.unique for usage in usages) / len(usages)
+        pss = sum(usage.pss for usage in usages)
+        self.stdout.write(self.style.SUCCESS(
+            f'В среднем уникальной памяти на воркер: {unique / 1024:.1f}M, '
+            f'PSS всех воркеров: {pss / 1024:.1f}M'
+        ))
+
+    def simulate(self, options):
+        application = get_wsgi_application()
+        paths = warm_paths()
+        if options['preload']:
+            preload(freeze=options['freeze'])
+        else:
+            connections.close_all()
+        read_fd, write_fd = os.pipe()
+        pids = []
+        for _ in range(options['simulate']):
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                try:
+                    for number in range(options['requests']):
+                        fetch_local(application, paths[number % len(paths)])
+                    os.write(write_fd, b'.')
+                    signal.pause()
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        os.close(write_fd)
+        try:
+            for _ in pids:
+                if not os.read(read_fd, 1):
+                    break
+            self.report(pids)
+        finally:
+            os.close(read_fd)
+            for pid in pids:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
@@ -0,0 +1,97 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.tasks import claim, discover, ensure_periodic, execute, queue_stats
+
+# Как часто воркер заводит периодические задачи и пишет статистику, с
+HOUSEKEEPING_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи очереди core.tasks в пуле потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=None,
+            help='Число потоков (по умолчанию TASK_WORKER_THREADS)'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между проверками пустой очереди в секундах'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать глубину очереди и задержку и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+        discover()
+        threads = options['threads'] or settings.TASK_WORKER_THREADS
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        running = set()
+        housekeeping = 0
+        with ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='task-worker'
+        ) as pool:
+            try:
+                while not self.stopping:
+                    if time.monotonic() >= housekeeping:
+                        ensure_periodic()
+                        if not options['once']:
+                            self.write_stats()
+                        housekeeping = (
+                            time.monotonic() + HOUSEKEEPING_INTERVAL
+                        )
+                    free = threads - len(running)
+                    rows = claim(free) if free else []
+                    close_old_connections()
+                    running.update(pool.submit(execute, row) for row in rows)
+                    if options['once'] and not rows and not running:
+                        break
+                    if running:
+                        done, running = wait(
+                            running, timeout=options['interval'],
+                            return_when=FIRST_COMPLETED
+                        )
+                        self.report(done)
+                    elif not rows:
+                        time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                pass
+            self.report(wait(running).done)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def report(self, futures):
+        failed = sum(
+            future.exception() is not None or not future.result()
+            for future in futures
+        )
+        if futures:
+            self.stdout.write(
+                f'Выполнено задач: {len(futures) - failed}, '
+                f'с ошибкой: {failed}'
+            )
+
+    def write_stats(self):
+        stats = queue_stats()
+        self.stdout.write(
+            f'Готовы к запуску: {stats.ready}, отложены: {stats.scheduled}, '
+            f'выполняются: {stats.running}, исчерпали попытки: '
+            f'{stats.failed}; ждёт дольше всех: {stats.oldest_wait:.1f} с, '
+            f'средняя задержка запуска: {stats.avg_wait:.1f} с'
+        )
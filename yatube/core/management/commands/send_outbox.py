@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import BATCH_SIZE, deliver_outbox
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutboxMessage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза между проверками очереди в секундах'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить то, что есть, и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = deliver_outbox(options['batch_size'])
+            except Exception as error:
+                self.stderr.write(f'Нет соединения с почтой: {error!r}')
+            else:
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, с ошибкой: {failed}'
+                    )
+            if options['once']:
+                return
+            time.sleep(options['interval'])
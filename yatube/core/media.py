@@ -0,0 +1,127 @@
+"""Контентно-адресуемое хранилище загрузок.
+
+ContentAddressedStorage считает SHA-256 файла, пока копирует его на диск,
+и сохраняет под именем <каталог upload_to>/ab/cd/<хеш>.<расширение>.
+Одинаковые картинки получают одно имя, поэтому лежат на диске в одном
+экземпляре и делят один набор миниатюр sorl-thumbnail.
+
+Раз файл может принадлежать нескольким записям, удалять его можно только
+после последней. Для этого core.MediaFile хранит число ссылок на каждое
+имя: acquire() и release() вызываются из сигналов моделей, а release()
+удаляет файл и его миниатюры, когда ссылок не остаётся. Счётчик меняется
+под блокировкой строки, а удаление после коммита ещё раз проверяет его
+под той же блокировкой, поэтому файл, который успели загрузить заново,
+не пропадёт. Файлы, о которых в таблице нет записи (загруженные до
+перехода на это хранилище), release() не трогает.
+"""
+import hashlib
+import os
+import tempfile
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import MediaFile
+
+INCOMING_DIR = '.incoming'
+HASH_NAME_LENGTH = 64
+
+
+def content_name(directory, digest, extension):
+    return '/'.join(
+        part for part in (
+            directory, digest[:2], digest[2:4], digest + extension
+        ) if part
+    )
+
+
+def is_content_name(name):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return len(stem) == HASH_NAME_LENGTH and name.count('/') >= 2
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым и выбирается в _save.
+        return name
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        incoming = self.path(INCOMING_DIR)
+        os.makedirs(incoming, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=incoming, suffix=extension)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            name = content_name(directory, digest.hexdigest(), extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+def acquire(*names):
+    """Увеличивает счётчики ссылок на файлы names."""
+    for name, count in Counter(filter(None, names)).items():
+        # UPDATE держит блокировку строки до коммита, как и release().
+        updated = MediaFile.objects.filter(name=name).update(
+            refcount=F('refcount') + count
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                MediaFile.objects.create(name=name, refcount=count)
+        except IntegrityError:
+            MediaFile.objects.filter(name=name).update(
+                refcount=F('refcount') + count
+            )
+
+
+def release(*names):
+    """Уменьшает счётчики и удаляет файлы, на которые не осталось ссылок."""
+    for name, count in Counter(filter(None, names)).items():
+        with transaction.atomic():
+            media_file = MediaFile.objects.select_for_update().filter(
+                name=name
+            ).first()
+            if media_file is None:
+                continue
+            media_file.refcount = max(media_file.refcount - count, 0)
+            media_file.save(update_fields=('refcount',))
+            if not media_file.refcount:
+                # Запись с нулём остаётся до удаления файла: её блокировка
+                # упорядочивает удаление с acquire() той же картинки.
+                transaction.on_commit(lambda name=name: delete_file(name))
+
+
+def delete_file(name):
+    """Удаляет файл вместе с миниатюрами и записями sorl-thumbnail."""
+    # sorl импортируется здесь, чтобы не замедлять старт процесса.
+    from sorl.thumbnail import delete
+    from sorl.thumbnail.images import ImageFile
+
+    with transaction.atomic():
+        media_file = MediaFile.objects.select_for_update().filter(
+            name=name
+        ).first()
+        if media_file is not None and media_file.refcount:
+            # Пока ждали коммита, тот же файл загрузили снова.
+            return
+        delete(ImageFile(name, default_storage))
+        if media_file is not None:
+            media_file.delete()
@@ -0,0 +1,85 @@
+"""Мемоизация на время одного запроса.
+
+Шаблоны многократно вычисляют одно и то же для одного автора или URL.
+RequestMemo кладётся в request и живёт ровно один запрос;
+MemoReportMiddleware суммирует попадания по представлениям, а report()
+возвращает накопленную в процессе статистику.
+"""
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_stats = defaultdict(lambda: {'requests': 0, 'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+
+class RequestMemo:
+    __slots__ = ('values', 'hits', 'misses')
+
+    def __init__(self):
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        try:
+            value = self.values[key]
+        except KeyError:
+            self.misses += 1
+            value = self.values[key] = compute()
+        else:
+            self.hits += 1
+        return value
+
+
+def get_memo(request):
+    memo = getattr(request, '_memo', None)
+    if memo is None:
+        memo = request._memo = RequestMemo()
+    return memo
+
+
+def memoize(request, key, compute):
+    """Вычисляет compute() один раз за запрос; без request - каждый раз."""
+    if request is None:
+        return compute()
+    return get_memo(request).get_or_compute(key, compute)
+
+
+def report():
+    """Статистика по представлениям: {view_name: requests/hits/misses}."""
+    with _stats_lock:
+        return {view: dict(stats) for view, stats in _stats.items()}
+
+
+def reset_report():
+    with _stats_lock:
+        _stats.clear()
+
+
+class MemoReportMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        memo = getattr(request, '_memo', None)
+        match = getattr(request, 'resolver_match', None)
+        if memo is None or match is None:
+            return response
+        with _stats_lock:
+            stats = _stats[match.view_name]
+            stats['requests'] += 1
+            stats['hits'] += memo.hits
+            stats['misses'] += memo.misses
+        logger.debug(
+            '%s: memo saved %d of %d calls',
+            match.view_name, memo.hits, memo.hits + memo.misses
+        )
+        if settings.DEBUG:
+            response['X-Memo-Saved'] = str(memo.hits)
+        return response
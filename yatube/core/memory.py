@@ -0,0 +1,51 @@
+"""Замер памяти воркеров по /proc (только Linux).
+
+Для каждого процесса берётся /proc/<pid>/smaps_rollup: unique - страницы,
+которые есть только у этого процесса (Private_*), shared - страницы,
+разделяемые с мастером и другими воркерами (Shared_*). PSS делит общие
+страницы поровну между процессами и лучше всего показывает реальную цену
+ещё одного воркера.
+"""
+import os
+from collections import namedtuple
+
+MemoryUsage = namedtuple('MemoryUsage', 'pid rss pss unique shared')
+
+
+def read_rollup(pid):
+    """Поля smaps_rollup процесса в килобайтах."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            name, _, value = line.partition(':')
+            parts = value.split()
+            if len(parts) == 2 and parts[1] == 'kB':
+                fields[name] = int(parts[0])
+    return fields
+
+
+def memory_usage(pid):
+    fields = read_rollup(pid)
+    return MemoryUsage(
+        pid=pid,
+        rss=fields['Rss'],
+        pss=fields['Pss'],
+        unique=fields['Private_Clean'] + fields['Private_Dirty'],
+        shared=fields['Shared_Clean'] + fields['Shared_Dirty'],
+    )
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # Имя процесса в скобках может содержать пробелы.
+                ppid = int(stat.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
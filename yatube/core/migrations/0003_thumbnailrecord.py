@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+def copy_sorl_records(apps, schema_editor):
+    # Переносим записи из таблицы приложения sorl.thumbnail, если она есть.
+    connection = schema_editor.connection
+    if 'thumbnail_kvstore' not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO core_thumbnailrecord (key, value) '
+            'SELECT key, value FROM thumbnail_kvstore'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_mediafile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThumbnailRecord',
+            fields=[
+                ('key', models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ('value', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(copy_sorl_records, migrations.RunPython.noop),
+    ]
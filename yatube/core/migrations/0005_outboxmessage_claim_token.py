@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claim_token',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+    ]
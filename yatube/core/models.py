@@ -0,0 +1,77 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """Письмо в очереди на отправку (см. core.mail)."""
+    message = models.BinaryField('Письмо')
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+    scheduled_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    sent_at = models.DateTimeField('Отправлено', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    claim_token = models.UUIDField(null=True, editable=False)
+
+    def __str__(self):
+        return f'Письмо #{self.pk}'
+
+    class Meta:
+        ordering = ('scheduled_at',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+
+class MediaFile(models.Model):
+    """Число ссылок на файл в контентно-адресуемом хранилище (core.media)."""
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    refcount = models.PositiveIntegerField('Число ссылок', default=0)
+    created = models.DateTimeField('Дата загрузки', auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+
+class ThumbnailRecord(models.Model):
+    """Запись хранилища ключей sorl-thumbnail (см. core.thumbnails)."""
+    key = models.CharField(max_length=200, primary_key=True)
+    value = models.TextField()
+
+    def __str__(self):
+        return self.key
+
+
+class Task(models.Model):
+    """Отложенная задача очереди core.tasks."""
+    name = models.CharField('Задача', max_length=200, db_index=True)
+    arguments = models.TextField('Аргументы (JSON)', default='{}')
+    periodic = models.BooleanField('Периодическая', default=False)
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+    scheduled_at = models.DateTimeField(
+        'Запуск не раньше', default=timezone.now, db_index=True
+    )
+    locked_until = models.DateTimeField(
+        'Занята воркером до', blank=True, null=True
+    )
+    started_at = models.DateTimeField('Начало', blank=True, null=True)
+    finished_at = models.DateTimeField(
+        'Завершена', blank=True, null=True, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Предел попыток', default=5
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+    class Meta:
+        ordering = ('scheduled_at',)
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
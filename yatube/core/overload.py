@@ -0,0 +1,74 @@
+"""Оценка перегрузки процесса.
+
+LoadMonitor считает запросы, которые сейчас обрабатываются, и
+экспоненциальное среднее их времени. Если фронтенд передаёт
+X-Request-Start (nginx: "t=$msec"), к времени запроса добавляется и
+ожидание в очереди перед воркером, поэтому перегрузка видна даже у
+синхронных воркеров, где одновременно идёт ровно один запрос.
+
+Заголовок приходит от клиента, поэтому читается только при
+OVERLOAD_TRUST_REQUEST_START = True, когда его всегда перезаписывает
+свой прокси. Время из будущего и не больше нуля отбрасывается, а
+ожидание ограничено MAX_QUEUE_TIME секундами, чтобы один запрос не
+сдвинул среднее на годы.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+
+# Вес последнего запроса в скользящем среднем
+SMOOTHING = 0.2
+# Больше этого времени ожидание в очереди не учитывается, с
+MAX_QUEUE_TIME = 60
+
+
+def queue_time(request):
+    """Сколько секунд запрос ждал в очереди перед воркером."""
+    if not settings.OVERLOAD_TRUST_REQUEST_START:
+        return 0.0
+    value = request.META.get('HTTP_X_REQUEST_START', '')
+    try:
+        started = float(value[2:] if value.startswith('t=') else value)
+    except ValueError:
+        return 0.0
+    if not math.isfinite(started) or started <= 0:
+        return 0.0
+    # Фронтенды пишут секунды, миллисекунды или микросекунды.
+    while started > 1e11:
+        started /= 1000
+    waited = time.time() - started
+    if waited < 0:
+        return 0.0
+    return min(waited, MAX_QUEUE_TIME)
+
+
+class LoadMonitor:
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = 0.0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def leave(self, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            self.latency += SMOOTHING * (seconds - self.latency)
+
+    def overloaded(self):
+        return (
+            self.in_flight > settings.OVERLOAD_MAX_IN_FLIGHT
+            or self.latency * 1000 > settings.OVERLOAD_LATENCY_MS
+        )
+
+    def reset(self):
+        with self.lock:
+            self.in_flight = 0
+            self.latency = 0.0
+
+
+monitor = LoadMonitor()
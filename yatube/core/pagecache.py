@@ -0,0 +1,250 @@
+"""Кеш целых страниц для анонимных читателей.
+
+AnonymousPageCacheMiddleware кеширует GET-ответы представлений из
+PAGE_CACHE_VIEWS для неавторизованных пользователей. Ключ строится из
+пути, значимых параметров запроса (PAGE_CACHE_PARAMS) и текущего года,
+который подставляет контекстный процессор year. Ответы, выставляющие
+cookie, не кешируются.
+
+Страница помечается тегами: представление добавляет свои через
+tag_page(request, ...), а модели, загруженные во время рендера, - через
+collect_tags() (см. posts.signals). У каждого тега в кеше лежит версия;
+invalidate_tags() меняет версию, и все страницы с этим тегом перестают
+совпадать. Тег ALL_TAG есть у каждой страницы и сбрасывает кеш целиком.
+
+Защита от лавины пересчётов:
+* страницу пересчитывает тот, кто первым взял блокировку в кеше;
+  одинаковые запросы ждут до PAGE_CACHE_COALESCE_WAIT секунд и получают
+  его результат (X-Page-Cache: coalesced);
+* истёкшая по времени страница ещё PAGE_CACHE_STALE_TIMEOUT секунд
+  отдаётся устаревшей (X-Page-Cache: stale), а пересчитывает её один
+  фоновый поток. Сброшенная по тегу страница устаревшей не отдаётся;
+* при перегрузке (core.overload) отдаётся любая копия из кеша, а
+  страница, которой в кеше нет, - ответом 503.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .asgi import build_environ, run_wsgi
+from .overload import monitor, queue_time
+
+ALL_TAG = 'pages:all'
+PAGE_KEY = 'pagecache:page:v2:{}'
+LOCK_KEY = 'pagecache:lock:{}'
+TAG_KEY = 'pagecache:tag:{}'
+# Ключ environ фонового пересчёта; из заголовков HTTP его не подделать
+REFRESH_ENVIRON = 'yatube.page_cache_refresh'
+POLL_INTERVAL = 0.05
+STORED_HEADERS = ('Content-Type', 'Content-Language', 'X-Frame-Options')
+
+_local = threading.local()
+
+
+def collect_tags(*tags):
+    """Добавляет теги к странице, которая сейчас рендерится в этом потоке."""
+    collected = getattr(_local, 'tags', None)
+    if collected is not None:
+        collected.update(tags)
+
+
+def tag_page(request, *tags):
+    if getattr(request, '_page_cache_key', None):
+        collect_tags(*tags)
+
+
+def invalidate_tags(*tags):
+    cache.set_many(
+        {TAG_KEY.format(tag): uuid.uuid4().hex for tag in tags}, None
+    )
+
+
+def tag_versions(tags):
+    keys = {TAG_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = {
+        key: uuid.uuid4().hex for key in keys if key not in found
+    }
+    if missing:
+        # add, а не set: иначе два потока, одновременно заводящие тег,
+        # запишут разные версии, и страница одного сразу устареет.
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def page_key(request):
+    params = '&'.join(
+        f'{name}={request.GET.get(name, "")}'
+        for name in getattr(settings, 'PAGE_CACHE_PARAMS', ('page',))
+    )
+    raw = f'{timezone.now().year}:{request.path}?{params}'
+    return PAGE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def is_cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def cached_response(cached, status):
+    content, headers = cached[:2]
+    response = HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    response['X-Page-Cache'] = status
+    return response
+
+
+def overloaded_response():
+    response = HttpResponse(
+        'Сайт перегружен, попробуйте позже',
+        status=503, content_type='text/plain'
+    )
+    response['Retry-After'] = '5'
+    return response
+
+
+def is_fresh(cached):
+    _, _, versions, expires = cached
+    return time.time() < expires and tag_versions(versions) == versions
+
+
+def acquire_lock(key):
+    return cache.add(
+        LOCK_KEY.format(key), True, settings.PAGE_CACHE_LOCK_TIMEOUT
+    )
+
+
+def wait_for_page(key):
+    """Ждёт страницу, которую пересчитывает другой запрос."""
+    deadline = time.monotonic() + settings.PAGE_CACHE_COALESCE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        cached = cache.get(key)
+        if cached is not None and is_fresh(cached):
+            return cached_response(cached, 'coalesced')
+        if cache.get(LOCK_KEY.format(key)) is None:
+            break
+    return None
+
+
+@lru_cache(maxsize=None)
+def _application():
+    return WSGIHandler()
+
+
+def _refresh(environ):
+    try:
+        run_wsgi(_application(), environ)
+    finally:
+        connections.close_all()
+
+
+def refresh_in_background(request):
+    """Пересчитывает страницу запроса анонимным запросом в потоке."""
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': request.path,
+        'query_string': request.META.get('QUERY_STRING', '').encode(),
+        'headers': [(b'host', request.get_host().encode())],
+        'scheme': request.scheme,
+    }
+    environ = build_environ(scope, b'')
+    environ[REFRESH_ENVIRON] = True
+    thread = threading.Thread(target=_refresh, args=(environ,), daemon=True)
+    thread.start()
+    return thread
+
+
+class AnonymousPageCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.monotonic()
+        monitor.enter()
+        try:
+            response = self.get_response(request)
+            key = getattr(request, '_page_cache_key', None)
+            if key and is_cacheable(response):
+                self.store(key, response, _local.tags)
+        finally:
+            _local.tags = None
+            if getattr(request, '_page_cache_locked', False):
+                cache.delete(LOCK_KEY.format(request._page_cache_key))
+            monitor.leave(
+                time.monotonic() - started + queue_time(request)
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        views = getattr(settings, 'PAGE_CACHE_VIEWS', ())
+        if request.resolver_match.view_name not in views:
+            return None
+        if request.user.is_authenticated:
+            return None
+        key = page_key(request)
+        if request.META.get(REFRESH_ENVIRON):
+            # Блокировку взял запрос, запустивший фоновый пересчёт.
+            request._page_cache_locked = True
+        else:
+            response = self.lookup(request, key)
+            if response is not None:
+                return response
+        request._page_cache_key = key
+        _local.tags = {ALL_TAG}
+        return None
+
+    def lookup(self, request, key):
+        """Ответ из кеша или None, если страницу надо считать самому."""
+        cached = cache.get(key)
+        if cached is not None:
+            _, _, versions, expires = cached
+            current = tag_versions(versions) == versions
+            if current and time.time() < expires:
+                return cached_response(cached, 'hit')
+            if monitor.overloaded():
+                return cached_response(cached, 'stale')
+            if current:
+                if acquire_lock(key):
+                    refresh_in_background(request)
+                return cached_response(cached, 'stale')
+        elif monitor.overloaded():
+            return overloaded_response()
+        if acquire_lock(key):
+            request._page_cache_locked = True
+            return None
+        return wait_for_page(key)
+
+    def store(self, key, response, tags):
+        headers = [
+            (name, response[name])
+            for name in STORED_HEADERS if response.has_header(name)
+        ]
+        timeout = settings.PAGE_CACHE_TIMEOUT
+        cache.set(
+            key,
+            (
+                response.content, headers, tag_versions(tags),
+                time.time() + timeout
+            ),
+            timeout + settings.PAGE_CACHE_STALE_TIMEOUT
+        )
@@ -0,0 +1,76 @@
+"""Подготовка приложения к fork() в мастер-процессе.
+
+Если сервер приложений загружает yatube.wsgi до fork() (gunicorn
+--preload, uWSGI без lazy-apps), всё, что создано в мастере, воркеры
+получают общими страницами памяти. preload() доводит инициализацию до
+конца заранее: собирает URL-резолверы вместе с админкой, компилирует все
+шаблоны, загружает манифест статики и модули, которые иначе
+импортируются при первом запросе. Затем gc.freeze() переносит созданные
+объекты в постоянное поколение: сборщик мусора воркера их не обходит и
+не пишет в их заголовки, поэтому страницы не копируются после fork().
+
+Включается настройкой WSGI_PRELOAD. Без preload-режима у сервера
+приложений она только замедлит старт каждого воркера.
+"""
+import gc
+import os
+from importlib import import_module
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLResolver, get_resolver
+
+# Модули, которые в обычном режиме загружаются лениво (см. core.startup)
+PRELOAD_MODULES = (
+    'PIL.Image',
+    'sorl.thumbnail.base',
+    'sorl.thumbnail.engines.pil_engine',
+    'core.admin_urls',
+)
+
+
+def populate_resolver(resolver=None):
+    """Строит словари reverse() для всего дерева URLconf."""
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            populate_resolver(pattern)
+
+
+def template_names(engine):
+    for directory in engine.template_dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(('.html', '.txt')):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, directory)
+
+
+def compile_templates():
+    """Компилирует все шаблоны; с кеширующим загрузчиком они остаются."""
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in set(template_names(engine)):
+            engine.get_template(name)
+            compiled += 1
+    return compiled
+
+
+def preload(freeze=True):
+    for module in PRELOAD_MODULES:
+        import_module(module)
+    populate_resolver()
+    compiled = compile_templates()
+    # Манифест читается при создании хранилища.
+    staticfiles_storage.base_url
+    # Соединения с БД не должны достаться воркерам от мастера.
+    connections.close_all()
+    gc.collect()
+    if freeze:
+        gc.freeze()
+    return compiled
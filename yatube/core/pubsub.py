@@ -0,0 +1,109 @@
+"""Внутрипроцессный pub/sub для push-уведомлений.
+
+Подписчики живут в event loop ASGI-процесса и занимают по одному
+маленькому объекту: вместо очереди сообщений у них только счётчик
+событий и asyncio.Event, поэтому десятки тысяч простаивающих соединений
+почти ничего не стоят.
+
+Публиковать можно из любого потока (например, из представления, которое
+выполняется в пуле потоков ASGI-адаптера). Доставка между процессами
+идёт через транспорт: по умолчанию LocalTransport, который просто
+передаёт событие в хаб этого же процесса. Транспорт с тем же интерфейсом
+поверх Redis или PostgreSQL LISTEN/NOTIFY подключается настройкой
+PUBSUB_TRANSPORT.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscriber:
+    __slots__ = ('channels', 'count', 'event')
+
+    def __init__(self, channels):
+        self.channels = tuple(channels)
+        self.count = 0
+        self.event = asyncio.Event()
+
+    def notify(self):
+        self.count += 1
+        self.event.set()
+
+    def take(self):
+        """Возвращает число накопленных событий и обнуляет счётчик."""
+        count, self.count = self.count, 0
+        self.event.clear()
+        return count
+
+
+class LocalTransport:
+    """Транспорт-заглушка: событие доставляется только в свой процесс."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, channel):
+        self.deliver(channel)
+
+
+class Hub:
+    def __init__(self, transport_class=LocalTransport):
+        self.subscribers = {}
+        self.loop = None
+        self.transport = transport_class(self.deliver)
+
+    def subscribe(self, channels):
+        self.loop = asyncio.get_running_loop()
+        subscriber = Subscriber(channels)
+        for channel in subscriber.channels:
+            self.subscribers.setdefault(channel, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        for channel in subscriber.channels:
+            channel_subscribers = self.subscribers.get(channel)
+            if channel_subscribers is None:
+                continue
+            channel_subscribers.discard(subscriber)
+            if not channel_subscribers:
+                del self.subscribers[channel]
+
+    def publish(self, *channels):
+        for channel in channels:
+            self.transport.publish(channel)
+
+    def deliver(self, channel):
+        """Вызывается транспортом; безопасно из любого потока."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._notify, channel)
+
+    def _notify(self, channel):
+        for subscriber in self.subscribers.get(channel, ()):
+            subscriber.notify()
+
+    def subscriber_count(self):
+        return len({
+            subscriber
+            for channel_subscribers in self.subscribers.values()
+            for subscriber in channel_subscribers
+        })
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                transport = getattr(
+                    settings, 'PUBSUB_TRANSPORT', 'core.pubsub.LocalTransport'
+                )
+                _hub = Hub(import_string(transport))
+    return _hub
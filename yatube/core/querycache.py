@@ -0,0 +1,190 @@
+"""Кеш результатов запросов ORM со сбросом по таблицам.
+
+Кеширование включается явно: cached(queryset) для отдельного запроса
+или CachingManager у модели, чья метка есть в QUERY_CACHE_MODELS;
+uncached(queryset) выключает его обратно. Ключ строится из SQL,
+параметров и версий всех таблиц, которые запрос читает (включая join и
+подзапросы). Потоковые iterator(), count() и exists() идут мимо кеша.
+
+Версия таблицы - тег core.pagecache. Обёртка выполнения запросов на
+каждом соединении замечает INSERT, UPDATE и DELETE (через ORM, bulk-
+операции и сырой SQL одинаково) и меняет версию записанной таблицы сразу
+и ещё раз после коммита: иначе другой процесс успел бы закешировать
+старые строки, пока транзакция не закоммичена. Внутри транзакции,
+которая уже писала в таблицу, запросы к ней кеш не используют.
+
+Из кеша приходят распакованные объекты, post_init для них не
+отправляется, поэтому кеш не подходит моделям, чьи обработчики post_init
+делают что-то кроме заполнения атрибутов (например, Post и его теги
+страниц).
+"""
+import hashlib
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache, partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, transaction
+
+from .pagecache import invalidate_tags, tag_versions
+
+TABLE_TAG = 'table:{}'
+QUERY_KEY = 'querycache:{}'
+
+IDENTIFIER_RE = re.compile(r'["`](\w+)["`]')
+WRITE_RE = re.compile(
+    r'\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|REPLACE\s+INTO|UPDATE'
+    r'(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+["`]?(\w+)',
+    re.IGNORECASE
+)
+
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def model_tables():
+    return frozenset(
+        model._meta.db_table
+        for model in apps.get_models(include_auto_created=True)
+    )
+
+
+def _count(label, outcome):
+    with _stats_lock:
+        _stats[label][outcome] += 1
+
+
+def report():
+    """Попадания и промахи по моделям: {метка: {hits, misses}}."""
+    with _stats_lock:
+        return {label: dict(stats) for label, stats in _stats.items()}
+
+
+def reset_report():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _dirty_tables(connection):
+    """Таблицы, в которые писала текущая транзакция соединения."""
+    state = connection.__dict__.get('_query_cache_dirty')
+    # run_on_commit заменяется новым списком после коммита и отката,
+    # так что по нему видно, что транзакция уже другая.
+    if state is None or state[0] is not connection.run_on_commit:
+        state = connection._query_cache_dirty = (
+            connection.run_on_commit, set()
+        )
+    return state[1]
+
+
+def invalidate_table(*tables):
+    invalidate_tags(*(TABLE_TAG.format(table) for table in tables))
+
+
+def table_written(connection, table):
+    if table not in model_tables():
+        return
+    if not connection.in_atomic_block:
+        invalidate_table(table)
+        return
+    dirty = _dirty_tables(connection)
+    if table not in dirty:
+        dirty.add(table)
+        invalidate_table(table)
+        transaction.on_commit(
+            partial(invalidate_table, table), using=connection.alias
+        )
+
+
+def track_writes(execute, sql, params, many, context):
+    result = execute(sql, params, many, context)
+    match = WRITE_RE.match(sql)
+    if match:
+        table_written(context['connection'], match.group(1))
+    return result
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик connection_created: следит за записью в таблицы."""
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+class CachedIterableMixin:
+    def __iter__(self):
+        queryset = self.queryset
+        if self.chunked_fetch or not settings.QUERY_CACHE_ENABLED:
+            yield from super().__iter__()
+            return
+        compiler = queryset.query.get_compiler(using=queryset.db)
+        try:
+            sql, params = compiler.as_sql()
+        except Exception:
+            # EmptyResultSet и прочее: пусть ORM обработает как обычно.
+            yield from super().__iter__()
+            return
+        tables = model_tables().intersection(IDENTIFIER_RE.findall(sql))
+        connection = connections[queryset.db]
+        label = queryset.model._meta.label
+        if connection.in_atomic_block and (
+            tables & _dirty_tables(connection)
+        ):
+            yield from super().__iter__()
+            return
+        versions = tag_versions(TABLE_TAG.format(table) for table in tables)
+        raw = '\n'.join((
+            queryset.db, type(self).__name__, sql, repr(params),
+            repr(sorted(versions.items()))
+        ))
+        key = QUERY_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+        results = cache.get(key)
+        if results is None:
+            _count(label, 'misses')
+            results = list(super().__iter__())
+            cache.set(key, results, settings.QUERY_CACHE_TIMEOUT)
+        else:
+            _count(label, 'hits')
+        yield from results
+
+
+@lru_cache(maxsize=None)
+def _cached_iterable(iterable_class):
+    if issubclass(iterable_class, CachedIterableMixin):
+        return iterable_class
+    return type(
+        f'Cached{iterable_class.__name__}',
+        (CachedIterableMixin, iterable_class),
+        {'plain_class': iterable_class}
+    )
+
+
+def cached(queryset):
+    """Копия queryset, результаты которой берутся из кеша.
+
+    Включать после values()/values_list(): они меняют класс выборки.
+    """
+    clone = queryset.all()
+    clone._iterable_class = _cached_iterable(clone._iterable_class)
+    return clone
+
+
+def uncached(queryset):
+    clone = queryset.all()
+    clone._iterable_class = getattr(
+        clone._iterable_class, 'plain_class', clone._iterable_class
+    )
+    return clone
+
+
+class CachingManager(models.Manager):
+    """Менеджер, кеширующий запросы модели из QUERY_CACHE_MODELS."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.model._meta.label in settings.QUERY_CACHE_MODELS:
+            return cached(queryset)
+        return queryset
@@ -0,0 +1,149 @@
+"""Ограничение частоты запросов на запись.
+
+Token bucket на пользователя и на IP. Вёдра лежат в памяти процесса
+(кортеж из двух float на ключ, LRU на RATELIMIT_MAX_KEYS ключей) и раз
+в SYNC_INTERVAL секунд сверяются с общим кешем: берётся меньший остаток,
+так что несколько процессов не дают клиенту суммарно больше лимита
+дольше, чем на интервал синхронизации.
+
+Политики задаются в settings.RATE_LIMITS по имени URL:
+
+    RATE_LIMITS = {
+        'posts:add_comment': '20/m',
+        'posts:profile_follow': ('30/m', ('GET',)),
+    }
+
+(по умолчанию ограничиваются только POST/PUT/PATCH/DELETE) и
+применяются RateLimitMiddleware до вызова представления. Для отдельных
+представлений есть декоратор ratelimit('5/m').
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+LIMITED_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+SYNC_INTERVAL = 1.0
+MAX_KEYS = 100000
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/m' -> (ёмкость ведра, пополнение в секунду)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+class TokenBuckets:
+    def __init__(self, max_keys=MAX_KEYS, sync_interval=SYNC_INTERVAL):
+        self.buckets = OrderedDict()
+        self.synced = {}
+        self.max_keys = max_keys
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+
+    def consume(self, key, rate):
+        """Забирает жетон; возвращает 0 или время до следующего жетона."""
+        capacity, refill = parse_rate(rate)
+        now = time.time()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            if now - self.synced.get(key, 0) >= self.sync_interval:
+                tokens = self._sync(key, tokens, capacity, refill, now)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / refill
+            self.buckets[key] = (tokens, now)
+            while len(self.buckets) > self.max_keys:
+                old_key, _ = self.buckets.popitem(last=False)
+                self.synced.pop(old_key, None)
+        return wait
+
+    def _sync(self, key, tokens, capacity, refill, now):
+        cache_key = f'ratelimit:{key}'
+        remote = cache.get(cache_key)
+        if remote is not None:
+            remote_tokens, remote_updated = remote
+            remote_tokens = min(
+                capacity, remote_tokens + (now - remote_updated) * refill
+            )
+            tokens = min(tokens, remote_tokens)
+        cache.set(cache_key, (tokens, now), int(capacity / refill) + 1)
+        self.synced[key] = now
+        return tokens
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+            self.synced.clear()
+
+
+buckets = TokenBuckets()
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_rate(request, scope, rate):
+    """Возвращает ответ 429, если клиент исчерпал лимит scope."""
+    keys = [f'{scope}:ip:{client_ip(request)}']
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        keys.append(f'{scope}:user:{user.pk}')
+    wait = max(buckets.consume(key, rate) for key in keys)
+    if not wait:
+        return None
+    response = HttpResponse(
+        'Слишком много запросов', status=429, content_type='text/plain'
+    )
+    response['Retry-After'] = str(int(wait) + 1)
+    return response
+
+
+def ratelimit(rate, methods=LIMITED_METHODS, scope=None):
+    """Декоратор представления с собственным лимитом."""
+    def decorator(view):
+        view_scope = scope or f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                response = check_rate(request, view_scope, rate)
+                if response is not None:
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Применяет settings.RATE_LIMITS к запросам на запись по имени URL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        policy = getattr(settings, 'RATE_LIMITS', {}).get(view_name)
+        if policy is None:
+            return None
+        if isinstance(policy, str):
+            rate, methods = policy, LIMITED_METHODS
+        else:
+            rate, methods = policy
+        if request.method not in methods:
+            return None
+        return check_rate(request, view_name, rate)
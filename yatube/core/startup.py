@@ -0,0 +1,96 @@
+"""Замер холодного старта процесса.
+
+Каждый замер запускает отдельный интерпретатор, иначе уже загруженные
+модули исказят результат. import_times() разбирает вывод
+python -X importtime, startup_time() меряет полное время импорта цели и
+возвращает загруженные при этом модули, чтобы тесты могли проверить, что
+тяжёлые необязательные части (Pillow, sorl, админки приложений) не
+загружаются при старте.
+
+Заметную часть старта Django 2.2 занимает distutils: setuptools
+подменяет его своей копией и загружает pkg_resources. Подмену отключает
+переменная окружения SETUPTOOLS_USE_DISTUTILS=stdlib, выставленная до
+запуска интерпретатора (например, в unit-файле сервиса).
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+
+TARGETS = {
+    'wsgi': 'import yatube.wsgi',
+    'asgi': 'import yatube.asgi',
+    'setup': 'import django; django.setup()',
+}
+
+# Модули, которые не должны загружаться при старте процесса
+LAZY_MODULES = (
+    'PIL',
+    'sorl',
+    'posts.admin',
+    'users.admin',
+    'django.contrib.auth.admin',
+)
+
+ImportTime = namedtuple('ImportTime', 'module self_us cumulative_us')
+
+TIMED_CODE = '''
+import json, sys, time
+started = time.perf_counter()
+{target}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'ms': elapsed * 1000, 'modules': sorted(sys.modules)}}))
+'''
+
+
+def _run(args):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_times(target='wsgi'):
+    """Список ImportTime по всем модулям в порядке завершения импорта."""
+    result = _run(['-X', 'importtime', '-c', TARGETS[target]])
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times.append(ImportTime(
+            name.strip(),
+            int(self_us),
+            int(cumulative_us),
+        ))
+    return times
+
+
+def startup_time(target='wsgi', runs=3):
+    """Лучшее из runs время импорта цели в мс и загруженные модули."""
+    best = None
+    for _ in range(runs):
+        result = _run(['-c', TIMED_CODE.format(target=TARGETS[target])])
+        measurement = json.loads(result.stdout.splitlines()[-1])
+        if best is None or measurement['ms'] < best['ms']:
+            best = measurement
+    return best['ms'], set(best['modules'])
+
+
+def loaded_lazy_modules(modules):
+    return sorted(
+        name for name in LAZY_MODULES
+        if any(
+            module == name or module.startswith(name + '.')
+            for module in modules
+        )
+    )
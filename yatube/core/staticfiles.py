@@ -0,0 +1,190 @@
+"""Продакшен-хранилище статики.
+
+При collectstatic:
+* из CSS-бандлов из STATICFILES_PURGE_CSS выбрасываются правила,
+  классы которых не встречаются ни в одном шаблоне;
+* имена файлов получают хеш содержимого (ManifestStaticFilesStorage);
+* рядом с текстовыми файлами кладутся сжатые .gz и, если установлен
+  пакет brotli, .br версии.
+"""
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.template.utils import get_app_template_dirs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.ico', '.json')
+MIN_COMPRESS_SIZE = 256
+
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+WORD_RE = re.compile(r'[\w-]+')
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+def template_words():
+    """Все слова, встречающиеся в шаблонах проекта и приложений."""
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs.extend(engine.get('DIRS', []))
+    dirs.extend(get_app_template_dirs('templates'))
+    words = set(getattr(settings, 'STATICFILES_PURGE_SAFELIST', ()))
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.endswith(('.html', '.txt')):
+                    continue
+                with open(os.path.join(root, name), encoding='utf-8') as f:
+                    words.update(WORD_RE.findall(f.read()))
+    return words
+
+
+def _split_blocks(css):
+    """Разбивает CSS на пары (prelude, body) верхнего уровня."""
+    blocks = []
+    depth = 0
+    start = 0
+    body_start = None
+    for index, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                body_start = index
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append(
+                    (css[start:body_start].strip(),
+                     css[body_start + 1:index])
+                )
+                start = index + 1
+        elif char == ';' and depth == 0:
+            blocks.append((css[start:index + 1].strip(), None))
+            start = index + 1
+    return blocks
+
+
+def _split_selectors(prelude):
+    """Делит список селекторов по запятым вне скобок :is(), :not()."""
+    selectors = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _required_classes(selector):
+    """Классы, без которых селектор ничего не выберет.
+
+    Классы внутри :not(...) к ним не относятся: .btn:not(.disabled)
+    нужен, даже если класс disabled в шаблонах не встречается.
+    """
+    classes = set()
+    depth = 0
+    skip_depth = None
+    start = 0
+    for index, char in enumerate(selector):
+        if char == '(':
+            if skip_depth is None:
+                classes.update(CLASS_RE.findall(selector[start:index]))
+                if selector[:index].endswith(':not'):
+                    skip_depth = depth
+            depth += 1
+            start = index + 1
+        elif char == ')':
+            depth -= 1
+            if skip_depth is None:
+                classes.update(CLASS_RE.findall(selector[start:index]))
+            elif depth == skip_depth:
+                skip_depth = None
+            start = index + 1
+    if skip_depth is None:
+        classes.update(CLASS_RE.findall(selector[start:]))
+    return classes
+
+
+def purge_css(css, used_words):
+    """Удаляет из css правила с классами, которых нет в used_words."""
+    output = []
+    for prelude, body in _split_blocks(COMMENT_RE.sub('', css)):
+        if body is None:
+            output.append(prelude)
+        elif prelude.startswith(NESTED_AT_RULES):
+            inner = purge_css(body, used_words)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            output.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in _split_selectors(prelude)
+                if _required_classes(selector) <= used_words
+            ]
+            if selectors:
+                output.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(output)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = self._purge(paths)
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if not dry_run and not isinstance(processed, Exception):
+                self._compress(name)
+                if hashed_name:
+                    self._compress(hashed_name)
+            yield name, hashed_name, processed
+
+    def _purge(self, paths):
+        purge_paths = getattr(settings, 'STATICFILES_PURGE_CSS', ())
+        if not purge_paths:
+            return paths
+        used_words = template_words()
+        paths = dict(paths)
+        for path in purge_paths:
+            if path not in paths:
+                continue
+            storage, source_path = paths[path]
+            with storage.open(source_path) as source:
+                css = source.read().decode('utf-8')
+            self.delete(path)
+            self._save(path, ContentFile(purge_css(css, used_words)))
+            paths[path] = (self, path)
+        return paths
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip.compress(content, 9))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
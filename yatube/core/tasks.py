@@ -0,0 +1,288 @@
+"""Локальная очередь отложенных задач без брокера.
+
+Задачи хранятся в таблице core.Task той же базы, поэтому задача,
+поставленная внутри транзакции запроса, появится в очереди только вместе
+с её данными. Функция становится задачей декоратором:
+
+    @task(max_attempts=3)
+    def rebuild_counters(group_id):
+        ...
+
+    rebuild_counters.delay(group.pk)            # как можно скорее
+    rebuild_counters.schedule(60, group.pk)     # через минуту
+    rebuild_counters(group.pk)                  # сразу, в этом потоке
+
+    @task(every=timedelta(hours=1))
+    def hourly_cleanup():
+        ...
+
+Аргументы должны сериализоваться в JSON. Команда run_worker выполняет
+задачи в пуле потоков. Воркер захватывает задачу условным UPDATE с
+арендой на TASK_LEASE секунд: это работает и в SQLite, где нет SELECT ...
+FOR UPDATE SKIP LOCKED, и позволяет запускать несколько воркеров.
+Пока задача выполняется, отдельный поток продлевает аренду каждую треть
+TASK_LEASE, поэтому долгую задачу второй воркер не захватит. Задача,
+чей воркер умер, после окончания аренды достаётся другому, поэтому
+задачи должны допускать повторный запуск; результат записывается,
+только если аренда всё ещё у этого воркера. Попытка засчитывается уже
+при захвате: задача, на которой воркер падает, не будет повторяться
+бесконечно. Неудачная попытка повторяется с экспоненциальной задержкой,
+как в core.mail. Периодическая задача - одна строка, которую воркер после
+каждого запуска переносит на следующий срок.
+"""
+import json
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .mail import purge_dead, purge_sent
+from .models import Task
+
+RETRY_BASE_DELAY = 30
+# Сколько последних выполненных задач брать для средней задержки
+STATS_SAMPLE = 1000
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+QueueStats = namedtuple(
+    'QueueStats', 'ready scheduled running failed oldest_wait avg_wait'
+)
+
+
+class TaskFunction:
+    def __init__(self, func, max_attempts, every):
+        self.func = func
+        self.max_attempts = max_attempts
+        self.every = every
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def schedule(self, when, *args, **kwargs):
+        """Ставит задачу на момент when (datetime или секунды от сейчас)."""
+        if not isinstance(when, datetime):
+            when = timezone.now() + timedelta(seconds=when)
+        return Task.objects.create(
+            name=self.name,
+            arguments=self._arguments(args, kwargs),
+            scheduled_at=when,
+            max_attempts=self.max_attempts,
+        )
+
+    def delay(self, *args, **kwargs):
+        return self.schedule(timezone.now(), *args, **kwargs)
+
+    def unfinished(self, *args, **kwargs):
+        """Незавершённые строки этой задачи с такими аргументами."""
+        return Task.objects.filter(
+            name=self.name,
+            arguments=self._arguments(args, kwargs),
+            finished_at=None,
+        )
+
+    @staticmethod
+    def _arguments(args, kwargs):
+        return json.dumps({'args': args, 'kwargs': kwargs})
+
+
+def task(func=None, max_attempts=5, every=None):
+    def decorator(func):
+        task_function = TaskFunction(func, max_attempts, every)
+        registry[task_function.name] = task_function
+        return task_function
+    return decorator(func) if func is not None else decorator
+
+
+def discover():
+    """Импортирует модули tasks всех приложений (периодические задачи)."""
+    autodiscover_modules('tasks')
+
+
+def resolve(name):
+    if name not in registry:
+        import_module(name.rsplit('.', 1)[0])
+    return registry[name]
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=RETRY_BASE_DELAY * 2 ** (attempts - 1))
+
+
+def ready_tasks(now=None):
+    now = now or timezone.now()
+    return Task.objects.filter(
+        Q(locked_until=None) | Q(locked_until__lt=now),
+        finished_at=None,
+        scheduled_at__lte=now,
+        attempts__lt=F('max_attempts'),
+    )
+
+
+def ensure_periodic():
+    """Заводит строки периодических задач, которых ещё нет в очереди."""
+    for task_function in registry.values():
+        if task_function.every is None:
+            continue
+        exists = Task.objects.filter(
+            name=task_function.name, periodic=True, finished_at=None
+        ).exists()
+        if not exists:
+            Task.objects.create(
+                name=task_function.name,
+                periodic=True,
+                max_attempts=task_function.max_attempts,
+            )
+
+
+def claim(limit):
+    """Захватывает до limit готовых задач; возвращает их строки."""
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.TASK_LEASE)
+    claimed = []
+    candidates = ready_tasks(now).order_by('scheduled_at', 'pk').values_list(
+        'pk', flat=True
+    )[:limit]
+    for pk in candidates:
+        updated = ready_tasks(now).filter(pk=pk).update(
+            locked_until=lease, started_at=now, attempts=F('attempts') + 1
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed))
+
+
+def renew(row):
+    """Продлевает аренду задачи, если она всё ещё у этого воркера."""
+    lease = timezone.now() + timedelta(seconds=settings.TASK_LEASE)
+    updated = Task.objects.filter(
+        pk=row.pk, locked_until=row.locked_until
+    ).update(locked_until=lease)
+    if updated:
+        row.locked_until = lease
+    return bool(updated)
+
+
+def _heartbeat(row, stop):
+    try:
+        while not stop.wait(settings.TASK_LEASE / 3):
+            if not renew(row):
+                logger.warning('Аренду задачи %s забрал другой воркер', row)
+                return
+    except Exception:
+        logger.exception('Не удалось продлить аренду задачи %s', row)
+    finally:
+        connection.close()
+
+
+def execute(row):
+    """Выполняет захваченную задачу и записывает результат.
+
+    Возвращает True, если задача выполнилась без ошибки и результат
+    записан.
+    """
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat, args=(row, stop), daemon=True,
+        name=f'task-heartbeat-{row.pk}'
+    )
+    heartbeat.start()
+    try:
+        task_function = resolve(row.name)
+        arguments = json.loads(row.arguments)
+        task_function.func(
+            *arguments.get('args', ()), **arguments.get('kwargs', {})
+        )
+    except Exception as error:
+        logger.exception('Задача %s завершилась ошибкой', row)
+        succeeded = False
+        row.last_error = repr(error)
+        row.scheduled_at = timezone.now() + retry_delay(row.attempts)
+    else:
+        succeeded = True
+        row.last_error = ''
+    finally:
+        stop.set()
+        heartbeat.join()
+        close_old_connections()
+    lease = row.locked_until
+    row.locked_until = None
+    task_function = registry.get(row.name)
+    if row.periodic and task_function is not None and (
+        succeeded or row.attempts >= row.max_attempts
+    ):
+        # Периодическая задача не умирает от ошибок: ждёт следующего срока.
+        row.attempts = 0
+        row.scheduled_at = timezone.now() + task_function.every
+    elif succeeded:
+        row.finished_at = timezone.now()
+    try:
+        updated = Task.objects.filter(pk=row.pk, locked_until=lease).update(
+            attempts=row.attempts,
+            last_error=row.last_error,
+            scheduled_at=row.scheduled_at,
+            finished_at=row.finished_at,
+            locked_until=None,
+        )
+    except Exception:
+        # Попытка уже засчитана при захвате, задачу после аренды
+        # повторит другой воркер.
+        logger.exception('Не удалось записать результат задачи %s', row)
+        return False
+    if not updated:
+        logger.warning(
+            'Аренда задачи %s истекла, результат не записан', row
+        )
+        return False
+    return succeeded
+
+
+def queue_stats():
+    """Глубина очереди и задержка запуска задач."""
+    now = timezone.now()
+    unfinished = Task.objects.filter(finished_at=None)
+    oldest = ready_tasks(now).aggregate(oldest=Min('scheduled_at'))['oldest']
+    waits = [
+        (started - scheduled).total_seconds()
+        for started, scheduled in Task.objects.filter(
+            finished_at__gte=now - timedelta(hours=1)
+        ).order_by('-finished_at').values_list(
+            'started_at', 'scheduled_at'
+        )[:STATS_SAMPLE]
+    ]
+    return QueueStats(
+        ready=ready_tasks(now).count(),
+        scheduled=unfinished.filter(scheduled_at__gt=now).count(),
+        running=unfinished.filter(locked_until__gte=now).count(),
+        failed=unfinished.filter(
+            Q(locked_until=None) | Q(locked_until__lt=now),
+            attempts__gte=F('max_attempts'),
+        ).count(),
+        oldest_wait=(now - oldest).total_seconds() if oldest else 0,
+        avg_wait=sum(waits) / len(waits) if waits else 0,
+    )
+
+
+@task(every=timedelta(hours=1))
+def purge_finished_tasks():
+    """Удаляет выполненные задачи старше TASK_KEEP_FINISHED секунд."""
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_KEEP_FINISHED)
+    Task.objects.filter(finished_at__lt=cutoff).delete()
+
+
+@task(every=timedelta(hours=1))
+def purge_sent_mail():
+    """Удаляет старые отправленные и неотправленные насовсем письма."""
+    purge_sent()
+    purge_dead()
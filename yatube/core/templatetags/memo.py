@@ -0,0 +1,49 @@
+from django import template
+from django.urls import reverse
+
+from core.memo import memoize
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def memo_url(context, view_name, *args):
+    """{% url %}, который разворачивает одинаковые URL один раз за запрос."""
+    return memoize(
+        context.get('request'),
+        ('url', view_name, args),
+        lambda: reverse(view_name, args=args)
+    )
+
+
+@register.simple_tag(takes_context=True)
+def author_name(context, author):
+    """Полное имя автора или username, если имя не заполнено."""
+    return memoize(
+        context.get('request'),
+        ('author_name', author.pk),
+        lambda: author.get_full_name() or author.username
+    )
+
+
+@register.simple_tag(takes_context=True)
+def author_posts_count(context, author):
+    return memoize(
+        context.get('request'),
+        ('author_posts_count', author.pk),
+        author.posts.count
+    )
+
+
+@register.simple_tag(takes_context=True)
+def nav_active(context, view_name):
+    """'active', если текущая страница - view_name."""
+    request = context.get('request')
+    current = memoize(
+        request,
+        ('view_name',),
+        lambda: getattr(
+            getattr(request, 'resolver_match', None), 'view_name', None
+        )
+    )
+    return 'active' if current == view_name else ''
@@ -0,0 +1,103 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from core.asgi import ASGIHandler, build_environ
+from posts.models import Post
+
+User = get_user_model()
+
+
+def http_scope(path):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver')],
+    }
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='TestUser')
+        self.post = Post.objects.create(author=user, text='Тестовый пост')
+        self.handler = ASGIHandler(get_wsgi_application(), max_workers=2)
+
+    def tearDown(self):
+        self.handler.executor.shutdown()
+
+    def request(self, path):
+        scope = http_scope(path)
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.handler(scope, receive, send))
+        return messages
+
+    def get(self, path):
+        messages = self.request(path)
+        return messages[0]['status'], b''.join(
+            message['body'] for message in messages[1:]
+        )
+
+    def test_post_detail_served_over_asgi(self):
+        """Страница поста отдаётся через ASGI-адаптер"""
+        status, body = self.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertEqual(status, 200)
+        self.assertIn('Тестовый пост', body.decode())
+
+    def test_concurrent_requests(self):
+        """Параллельные запросы обслуживаются ограниченным пулом потоков"""
+        async def run():
+            scope = http_scope(reverse('posts:index'))
+            statuses = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            await asyncio.gather(*(
+                self.handler(scope, receive, send) for _ in range(5)
+            ))
+            return statuses
+
+        self.assertEqual(asyncio.run(run()), [200] * 5)
+
+    @mock.patch('posts.feeds.FLUSH_SIZE', 1)
+    def test_streaming_response_is_sent_in_chunks(self):
+        """Потоковый ответ уходит клиенту кусками, а не одним телом"""
+        cache.clear()
+        for number in range(3):
+            Post.objects.create(author=self.post.author, text=f'Пост {number}')
+        messages = self.request(
+            reverse('posts:index_feed', kwargs={'feed_type': 'atom'})
+        )
+        bodies = messages[1:]
+        self.assertGreater(len(bodies), 2)
+        self.assertTrue(all(message['more_body'] for message in bodies[:-1]))
+        self.assertFalse(bodies[-1].get('more_body', False))
+        self.assertIn(
+            'Пост 2', b''.join(message['body'] for message in bodies).decode()
+        )
+
+    def test_repeated_cookie_headers(self):
+        """Несколько заголовков Cookie склеиваются через точку с запятой"""
+        scope = http_scope('/')
+        scope['headers'] += [(b'cookie', b'a=1'), (b'cookie', b'b=2')]
+        self.assertEqual(build_environ(scope, b'')['HTTP_COOKIE'], 'a=1; b=2')
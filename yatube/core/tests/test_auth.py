@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from core.auth import CachedAuthenticationMiddleware
+
+User = get_user_model()
+
+
+class CachedAuthenticationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='TestUser', password='old-password-123'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.session_key = self.client.session.session_key
+
+    def tearDown(self):
+        cache.clear()
+
+    def request_user(self):
+        request = RequestFactory().get('/')
+        request.COOKIES['sessionid'] = self.session_key
+        SessionMiddleware().process_request(request)
+        CachedAuthenticationMiddleware().process_request(request)
+        return request.user
+
+    def test_warm_request_makes_no_queries(self):
+        """Повторный запрос получает сессию и пользователя без БД"""
+        self.assertEqual(self.request_user().pk, self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.request_user().pk, self.user.pk)
+
+    def test_each_request_gets_own_copy(self):
+        """Запросы не делят между собой объект пользователя и кеш прав"""
+        first = self.request_user()
+        first.has_perm('posts.add_post')
+        second = self.request_user()
+        self.assertEqual(first.pk, second.pk)
+        self.assertIsNot(first._wrapped, second._wrapped)
+        self.assertFalse(hasattr(second, '_perm_cache'))
+
+    def test_logout_invalidates_cached_user(self):
+        """Выход из аккаунта сбрасывает закешированного пользователя"""
+        self.request_user()
+        self.client.get(reverse('users:logout'))
+        self.assertFalse(self.request_user().is_authenticated)
+
+    def test_password_change_invalidates_cached_user(self):
+        """Смена пароля завершает старые сессии"""
+        self.request_user()
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password-456')
+        user.save()
+        self.assertFalse(self.request_user().is_authenticated)
@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import shared_cache
+
+MEMCACHED = {'default': {
+    'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+    'LOCATION': '127.0.0.1:11211',
+}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_local_cache_is_allowed_in_debug(self):
+        """В разработке кеш в памяти процесса допустим"""
+        with override_settings(DEBUG=True):
+            self.assertEqual(shared_cache(None), [])
+
+    def test_local_cache_is_rejected_in_production(self):
+        """Без DEBUG нужен общий кеш"""
+        with override_settings(DEBUG=False):
+            errors = shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        with override_settings(DEBUG=False, CACHES=MEMCACHED):
+            self.assertEqual(shared_cache(None), [])
@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.mail import (
+    MAX_ATTEMPTS, claim, deliver_outbox, purge_dead, purge_sent
+)
+from core.models import OutboxMessage
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class RacingBackend(EmailBackend):
+    """Пока отправляется первое письмо, запускает второго отправителя."""
+    rival = None
+
+    def send_messages(self, messages):
+        if RacingBackend.rival is None:
+            RacingBackend.rival = deliver_outbox(connection=EmailBackend())
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxBackend',
+    OUTBOX_DELIVERY_BACKEND='core.tests.test_mail.CountingBackend'
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def send(self, count=1):
+        for i in range(count):
+            mail.send_mail(
+                f'Тема {i}', 'Текст', 'from@example.com', ['to@example.com']
+            )
+
+    def test_send_mail_only_enqueues(self):
+        """send_mail кладёт письмо в очередь, не отправляя его"""
+        self.send()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_batches_share_one_connection(self):
+        """Все пачки уходят через одно соединение"""
+        self.send(5)
+        self.assertEqual(deliver_outbox(batch_size=2), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertFalse(OutboxMessage.objects.filter(sent_at=None).exists())
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    @override_settings(
+        OUTBOX_DELIVERY_BACKEND='core.tests.test_mail.FailingBackend'
+    )
+    def test_failed_message_is_retried_later(self):
+        """Неудачная отправка откладывается с увеличением задержки"""
+        self.send()
+        self.assertEqual(deliver_outbox(), (0, 1))
+        row = OutboxMessage.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertGreater(row.scheduled_at, timezone.now())
+        self.assertIn('SMTP', row.last_error)
+        self.assertEqual(deliver_outbox(), (0, 0))
+        OutboxMessage.objects.update(
+            scheduled_at=timezone.now(), attempts=MAX_ATTEMPTS
+        )
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    @override_settings(
+        OUTBOX_DELIVERY_BACKEND='core.tests.test_mail.RacingBackend'
+    )
+    def test_concurrent_senders_do_not_duplicate(self):
+        """Второй отправитель не получает уже захваченные письма"""
+        RacingBackend.rival = None
+        self.send(3)
+        self.assertEqual(deliver_outbox(), (3, 0))
+        self.assertEqual(RacingBackend.rival, (0, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(OUTBOX_KEEP_SENT=60)
+    def test_purge_sent(self):
+        """Удаляются только давно отправленные письма"""
+        self.send(3)
+        deliver_outbox()
+        old, recent, _ = OutboxMessage.objects.order_by('pk')
+        old.sent_at = timezone.now() - timedelta(minutes=5)
+        old.save()
+        recent.sent_at = None
+        recent.save()
+        self.assertEqual(purge_sent(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_claim_takes_batch_in_one_update(self):
+        """Пачка писем захватывается одним UPDATE и не выдаётся дважды"""
+        self.send(3)
+        now = timezone.now()
+        with self.assertNumQueries(2):
+            first = claim(now, 2)
+        self.assertEqual(len(first), 2)
+        self.assertTrue(all(row.scheduled_at > now for row in first))
+        second = claim(now, 2)
+        self.assertEqual(len(second), 1)
+        self.assertNotIn(second[0].pk, {row.pk for row in first})
+
+    @override_settings(OUTBOX_KEEP_DEAD=60)
+    def test_purge_dead(self):
+        """Удаляются только давно исчерпавшие попытки письма"""
+        self.send(3)
+        dead, recent, _ = OutboxMessage.objects.order_by('pk')
+        OutboxMessage.objects.filter(pk=dead.pk).update(
+            attempts=MAX_ATTEMPTS,
+            scheduled_at=timezone.now() - timedelta(minutes=5)
+        )
+        OutboxMessage.objects.filter(pk=recent.pk).update(
+            attempts=MAX_ATTEMPTS
+        )
+        self.assertEqual(purge_dead(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from core import media
+from core.media import is_content_name
+from core.models import MediaFile
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+def upload(name='small.gif', content=SMALL_GIF):
+    return SimpleUploadedFile(name, content, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='TestUser')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_identical_uploads_share_one_file(self):
+        """Одинаковые файлы сохраняются под одним именем в одном экземпляре"""
+        first = default_storage.save('posts/a.GIF', ContentFile(SMALL_GIF))
+        second = default_storage.save('posts/b.gif', ContentFile(SMALL_GIF))
+        other = default_storage.save('posts/c.gif', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(is_content_name(first))
+        self.assertTrue(first.startswith('posts/'))
+        self.assertTrue(first.endswith('.gif'))
+        _, files = default_storage.listdir(os.path.dirname(first))
+        self.assertEqual(files, [os.path.basename(first)])
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется только вместе с последним ссылающимся постом"""
+        posts = [
+            Post.objects.create(author=self.user, text='Пост', image=upload())
+            for _ in range(2)
+        ]
+        name = posts[0].image.name
+        self.assertEqual(posts[1].image.name, name)
+        self.assertEqual(MediaFile.objects.get(name=name).refcount, 2)
+        posts[0].delete()
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaFile.objects.get(name=name).refcount, 1)
+        posts[1].delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+    def test_replacing_image_moves_reference(self):
+        """Смена картинки в посте освобождает старый файл"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=upload()
+        )
+        old_name = post.image.name
+        post.image = upload('new.gif', SMALL_GIF + b'\x00')
+        post.save()
+        self.assertFalse(default_storage.exists(old_name))
+        media_file = MediaFile.objects.get(name=post.image.name)
+        self.assertEqual(media_file.refcount, 1)
+
+    def test_reacquired_file_survives_pending_delete(self):
+        """Удаление после коммита не трогает снова занятый файл"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=upload()
+        )
+        name = post.image.name
+        with transaction.atomic():
+            media.release(name)
+            self.assertEqual(MediaFile.objects.get(name=name).refcount, 0)
+            media.acquire(name)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaFile.objects.get(name=name).refcount, 1)
+
+    def test_dedupe_media_moves_legacy_files(self):
+        """dedupe_media переносит старые файлы под имена по хешу"""
+        legacy_storage = FileSystemStorage()
+        names = [
+            legacy_storage.save(f'posts/{name}', ContentFile(SMALL_GIF))
+            for name in ('one.gif', 'two.gif')
+        ]
+        for name in names:
+            Post.objects.create(author=self.user, text='Пост', image=name)
+        call_command('dedupe_media', stdout=StringIO())
+        new_names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(new_names), 1)
+        new_name = new_names.pop()
+        self.assertTrue(is_content_name(new_name))
+        self.assertEqual(MediaFile.objects.get(name=new_name).refcount, 2)
+        for name in names:
+            self.assertFalse(legacy_storage.exists(name))
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.memo import report, reset_report
+from posts.models import Post
+from posts.warmup import warm_paths
+
+User = get_user_model()
+
+
+class RequestMemoTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='TestUser', first_name='Тест', last_name='Автор'
+        )
+        for i in range(3):
+            Post.objects.create(author=cls.user, text=f'Тестовый пост {i}')
+
+    def setUp(self):
+        cache.clear()
+        reset_report()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+        reset_report()
+
+    def test_author_values_computed_once_per_request(self):
+        """Имя и URL автора вычисляются один раз на всю страницу"""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Автор: Тест Автор', count=3)
+        stats = report()['posts:index']
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreaterEqual(stats['hits'], 4)
+
+    def test_memo_does_not_leak_between_requests(self):
+        """Мемо живёт один запрос"""
+        self.guest_client.get(reverse('posts:index'))
+        self.user.first_name = 'Другое'
+        self.user.save()
+        cache.clear()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Автор: Другое Автор', count=3)
+
+
+class MemoReportCommandTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        reset_report()
+        user = User.objects.create_user(username='TestUser')
+        for i in range(3):
+            Post.objects.create(author=user, text=f'Тестовый пост {i}')
+
+    def tearDown(self):
+        cache.clear()
+        reset_report()
+
+    def test_command_prints_saved_calls_per_view(self):
+        """memo_report показывает сэкономленные вызовы по представлениям"""
+        out = StringIO()
+        call_command('memo_report', rounds=2, stdout=out)
+        line = next(
+            line for line in out.getvalue().splitlines()
+            if line.startswith('posts:index')
+        )
+        requests, hits = line.split()[1:3]
+        index_paths = [
+            path for path in warm_paths()
+            if path.partition('?')[0] == reverse('posts:index')
+        ]
+        self.assertEqual(int(requests), 2 * len(index_paths))
+        self.assertGreater(int(hits), 0)
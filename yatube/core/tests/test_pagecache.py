@@ -0,0 +1,257 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from core.overload import MAX_QUEUE_TIME, monitor, queue_time
+from core.pagecache import (
+    ALL_TAG, LOCK_KEY, acquire_lock, invalidate_tags, page_key, tag_versions
+)
+from posts import moderation
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_repeated_anonymous_request_is_served_from_cache(self):
+        """Повторный анонимный запрос отдаётся из кеша без запросов к БД"""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url)
+        self.assertNotIn('X-Page-Cache', first)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+
+    def test_page_parameter_is_part_of_key(self):
+        """Разные страницы пагинации кешируются отдельно"""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_authorized_requests_bypass_cache(self):
+        """Авторизованный пользователь всегда получает свежую страницу"""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_new_post_invalidates_index_and_group(self):
+        """Новый пост сбрасывает главную и страницу своей группы"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(
+            author=self.user, text='Свежий пост', group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotIn('X-Page-Cache', response)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_comment_invalidates_only_its_post(self):
+        """Комментарий сбрасывает страницу поста, но не чужие страницы"""
+        other_group = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Описание'
+        )
+        other_url = reverse(
+            'posts:group_list', kwargs={'slug': other_group.slug}
+        )
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.guest_client.get(other_url)
+        self.guest_client.get(detail_url)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий'
+        )
+        response = self.guest_client.get(detail_url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'Новый комментарий')
+        response = self.guest_client.get(other_url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_purge_comments_invalidates_their_posts(self):
+        """Массовое удаление комментариев сбрасывает страницы их постов"""
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Спам в комментарии'
+        )
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.guest_client.get(detail_url)
+        with mock.patch.object(
+            moderation.transaction, 'on_commit', lambda func: func()
+        ):
+            moderation.purge_comments(Comment.objects.filter(post=self.post))
+        response = self.guest_client.get(detail_url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertNotContains(response, 'Спам в комментарии')
+
+    def test_all_tag_drops_every_page(self):
+        """Тег ALL_TAG сбрасывает все закешированные страницы"""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.guest_client.get(url)
+        invalidate_tags(ALL_TAG)
+        response = self.guest_client.get(url)
+        self.assertNotIn('X-Page-Cache', response)
+
+
+class PageCacheProtectionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        monitor.reset()
+        self.guest_client = Client()
+        self.url = reverse('posts:profile', args=[self.user.username])
+        self.key = page_key(RequestFactory().get(self.url))
+
+    def tearDown(self):
+        cache.clear()
+        monitor.reset()
+
+    @override_settings(PAGE_CACHE_COALESCE_WAIT=2)
+    def test_concurrent_request_waits_for_lock_holder(self):
+        """Запрос ждёт страницу, которую считает держатель блокировки"""
+        self.guest_client.get(self.url)
+        content, headers, versions, expires = cache.get(self.key)
+        invalidate_tags(ALL_TAG)
+        self.assertTrue(acquire_lock(self.key))
+
+        def finish():
+            cache.set(
+                self.key, (content, headers, tag_versions(versions), expires)
+            )
+            cache.delete(LOCK_KEY.format(self.key))
+
+        timer = threading.Timer(0.1, finish)
+        timer.start()
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.url)
+        timer.join()
+        self.assertEqual(response['X-Page-Cache'], 'coalesced')
+        self.assertEqual(response.content, content)
+
+    @override_settings(PAGE_CACHE_COALESCE_WAIT=0.1)
+    def test_stuck_lock_does_not_block_forever(self):
+        """Если результата нет, запрос по истечении ожидания считает сам"""
+        acquire_lock(self.key)
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Page-Cache', response)
+
+    @override_settings(OVERLOAD_MAX_IN_FLIGHT=0)
+    def test_overload_serves_only_cache(self):
+        """При перегрузке отдаётся копия из кеша или 503"""
+        with override_settings(OVERLOAD_MAX_IN_FLIGHT=50):
+            self.guest_client.get(self.url)
+        invalidate_tags(ALL_TAG)
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(OVERLOAD_TRUST_REQUEST_START=True)
+    def test_queue_time_is_read_from_header(self):
+        """X-Request-Start в секундах и миллисекундах"""
+        for value in (time.time() - 3, (time.time() - 3) * 1000):
+            with self.subTest(value=value):
+                request = RequestFactory().get(
+                    '/', HTTP_X_REQUEST_START=f't={value:.3f}'
+                )
+                self.assertAlmostEqual(queue_time(request), 3, delta=0.5)
+
+    @override_settings(OVERLOAD_TRUST_REQUEST_START=True)
+    def test_queue_time_rejects_bogus_values(self):
+        """Ноль, отрицательное, будущее и нечисловое время не учитываются"""
+        future = f't={time.time() + 60:.3f}'
+        for value in ('t=0', 't=-5', future, 'nan', 'inf'):
+            with self.subTest(value=value):
+                request = RequestFactory().get(
+                    '/', HTTP_X_REQUEST_START=value
+                )
+                self.assertEqual(queue_time(request), 0.0)
+        request = RequestFactory().get(
+            '/', HTTP_X_REQUEST_START=f't={time.time() - 3600:.3f}'
+        )
+        self.assertEqual(queue_time(request), MAX_QUEUE_TIME)
+
+    def test_queue_time_ignored_by_default(self):
+        """Без доверенного прокси заголовок от клиента игнорируется"""
+        request = RequestFactory().get(
+            '/', HTTP_X_REQUEST_START=f't={time.time() - 3:.3f}'
+        )
+        self.assertEqual(queue_time(request), 0.0)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class StaleWhileRevalidateTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        monitor.reset()
+        self.user = User.objects.create_user(username='TestUser')
+        self.post = Post.objects.create(
+            author=self.user, text='Старый текст'
+        )
+        self.url = reverse('posts:profile', args=[self.user.username])
+        self.key = page_key(RequestFactory().get(self.url))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_expired_page_is_served_stale_and_refreshed(self):
+        """Истёкшая страница отдаётся сразу и пересчитывается в фоне"""
+        self.client.get(self.url)
+        html = '<p>Новый текст</p>'
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Новый текст', text_html=html, excerpt_html=html
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+        self.assertNotContains(response, 'Новый текст')
+        deadline = time.monotonic() + 5
+        while cache.get(LOCK_KEY.format(self.key)) is not None:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertIn('Новый текст'.encode(), cache.get(self.key)[0])
@@ -0,0 +1,49 @@
+import gc
+import os
+import sys
+import unittest
+
+from django.test import SimpleTestCase
+from django.urls import get_resolver
+
+from core.memory import child_pids, memory_usage
+from core.preload import preload
+
+
+class PreloadTests(SimpleTestCase):
+    def tearDown(self):
+        gc.unfreeze()
+
+    def test_preload_initializes_and_freezes(self):
+        """preload() собирает резолверы, шаблоны и замораживает объекты"""
+        compiled = preload()
+        self.assertGreater(compiled, 0)
+        self.assertIn('posts', get_resolver().namespace_dict)
+        self.assertIn('core.admin_urls', sys.modules)
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_preload_without_freeze(self):
+        """С freeze=False постоянное поколение не трогается"""
+        preload(freeze=False)
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+
+@unittest.skipUnless(
+    os.path.exists('/proc/self/smaps_rollup'), 'нужен Linux с /proc'
+)
+class MemoryUsageTests(SimpleTestCase):
+    def test_memory_usage_of_current_process(self):
+        """Отчёт делит память процесса на уникальную и разделяемую"""
+        usage = memory_usage(os.getpid())
+        self.assertGreater(usage.rss, 0)
+        self.assertEqual(usage.rss, usage.unique + usage.shared)
+
+    def test_child_pids_finds_forked_worker(self):
+        """Потомки мастер-процесса находятся по /proc"""
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+        try:
+            self.assertIn(pid, child_pids(os.getpid()))
+        finally:
+            os.waitpid(pid, 0)
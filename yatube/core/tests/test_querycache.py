@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+
+from core import querycache
+from core.querycache import cached, uncached
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class QueryCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        querycache.reset_report()
+        self.user = User.objects.create_user(username='TestUser')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def group_texts(self):
+        return list(cached(Post.objects.filter(
+            group__slug='test-slug'
+        ).values_list('text', flat=True)))
+
+    def test_repeated_query_is_served_from_cache(self):
+        """Повторный запрос не идёт в базу и учитывается в статистике"""
+        self.assertEqual(self.group_texts(), ['Тестовый пост'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.group_texts(), ['Тестовый пост'])
+        self.assertEqual(
+            querycache.report()['posts.Post'], {'hits': 1, 'misses': 1}
+        )
+
+    def test_write_to_joined_table_invalidates(self):
+        """Запись в любую прочитанную таблицу сбрасывает результат"""
+        self.group_texts()
+        Group.objects.filter(pk=self.group.pk).update(slug='other')
+        self.assertEqual(self.group_texts(), [])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE posts_group SET slug = %s', ['test-slug']
+            )
+        self.assertEqual(self.group_texts(), ['Тестовый пост'])
+
+    def test_unrelated_write_keeps_cache(self):
+        """Запись в другую таблицу не сбрасывает результат"""
+        self.group_texts()
+        User.objects.create_user(username='Other')
+        with self.assertNumQueries(0):
+            self.group_texts()
+
+    def test_transaction_sees_own_writes(self):
+        """Транзакция видит свои записи, остальные - после коммита"""
+        self.group_texts()
+        with transaction.atomic():
+            Post.objects.create(
+                author=self.user, text='Второй пост', group=self.group
+            )
+            self.assertEqual(len(self.group_texts()), 2)
+            self.assertEqual(len(self.group_texts()), 2)
+        self.assertEqual(len(self.group_texts()), 2)
+
+    def test_iterator_and_uncached_bypass_cache(self):
+        """iterator() и uncached() всегда читают базу"""
+        queryset = cached(Post.objects.values_list('text', flat=True))
+        list(queryset)
+        with self.assertNumQueries(1):
+            list(queryset.iterator())
+        with self.assertNumQueries(1):
+            list(uncached(queryset))
+
+    def test_caching_manager(self):
+        """Менеджер кеширует только модели из QUERY_CACHE_MODELS"""
+        Group.objects.get(slug='test-slug')
+        with self.assertNumQueries(0):
+            group = Group.objects.get(slug='test-slug')
+        self.assertEqual(group, self.group)
+        with override_settings(QUERY_CACHE_MODELS=()):
+            with self.assertNumQueries(1):
+                Group.objects.get(slug='test-slug')
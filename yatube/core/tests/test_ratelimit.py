@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import buckets, ratelimit
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(RATE_LIMITS={'posts:add_comment': '2/m'})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        buckets.clear()
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        buckets.clear()
+        cache.clear()
+
+    def comment(self):
+        return self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': 'Комментарий'}
+        )
+
+    def test_middleware_limits_comments(self):
+        """Сверх лимита комментарии отклоняются с 429 до работы с БД"""
+        self.comment()
+        self.comment()
+        with self.assertNumQueries(0):
+            response = self.comment()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_get_requests_are_not_limited(self):
+        """GET-запросы к ограниченному URL не расходуют лимит"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        for _ in range(5):
+            self.assertEqual(self.authorized_client.get(url).status_code, 200)
+        self.assertEqual(self.comment().status_code, 302)
+
+    def test_decorator(self):
+        """Декоратор ratelimit ограничивает отдельное представление"""
+        view = ratelimit('1/m')(lambda request: HttpResponse('ok'))
+        factory = RequestFactory()
+        self.assertEqual(view(factory.post('/')).status_code, 200)
+        self.assertEqual(view(factory.post('/')).status_code, 429)
+        self.assertEqual(view(factory.get('/')).status_code, 200)
@@ -0,0 +1,53 @@
+import os
+import unittest
+
+from django.conf import settings
+from django.contrib import admin
+from django.test import Client, SimpleTestCase
+
+from core.startup import import_times, loaded_lazy_modules, startup_time
+
+
+class StartupBudgetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.elapsed, cls.modules = startup_time('wsgi')
+
+    # Время зависит от машины и её загрузки, поэтому замер включается
+    # явно: STARTUP_BENCH=1 python manage.py test core.tests.test_startup
+    @unittest.skipUnless(
+        os.environ.get('STARTUP_BENCH'), 'замер времени: STARTUP_BENCH=1'
+    )
+    def test_startup_within_budget(self):
+        """Холодный импорт yatube.wsgi укладывается в бюджет"""
+        self.assertLessEqual(self.elapsed, settings.STARTUP_BUDGET_MS)
+
+    def test_heavy_modules_are_lazy(self):
+        """Pillow, sorl и админки приложений не загружаются при старте"""
+        self.assertEqual(loaded_lazy_modules(self.modules), [])
+
+    def test_heavy_modules_not_loaded_by_setup(self):
+        """После django.setup() тяжёлых модулей нет в sys.modules"""
+        _, modules = startup_time('setup', runs=1)
+        self.assertEqual(loaded_lazy_modules(modules), [])
+
+    def test_import_times_report_modules(self):
+        """Профиль импорта содержит модули проекта"""
+        modules = {item.module for item in import_times('wsgi')}
+        self.assertIn('yatube.wsgi', modules)
+        self.assertIn('django.core.handlers.wsgi', modules)
+
+
+class LazyAdminTests(SimpleTestCase):
+    def test_admin_urls_load_on_first_request(self):
+        """Админка собирается при первом обращении к /admin/"""
+        response = Client().get('/admin/login/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_checks_pass(self):
+        """Проверки ModelAdmin проходят после autodiscover()"""
+        # manage.py check их не видит: без запроса к /admin/ реестр пуст.
+        admin.autodiscover()
+        self.assertTrue(admin.site._registry)
+        self.assertEqual(admin.site.check(None), [])
@@ -0,0 +1,120 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.staticfiles import purge_css
+from core.wsgi_static import IMMUTABLE_CACHE, StaticFilesMiddleware
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def not_found(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'']
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_STORAGE='core.staticfiles.CompressedManifestStaticFilesStorage'
+)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+        cls.app = StaticFilesMiddleware(
+            not_found, ((settings.STATIC_URL, TEMP_STATIC_ROOT, True),)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def request(self, path, **environ):
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(
+            {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **environ},
+            start_response
+        ))
+        return response['status'], response['headers'], body
+
+    def hashed_css(self):
+        css_dir = os.path.join(TEMP_STATIC_ROOT, 'css')
+        return next(
+            name for name in os.listdir(css_dir)
+            if name.startswith('bootstrap.min.') and name.endswith('.css')
+            and name != 'bootstrap.min.css'
+        )
+
+    def test_collectstatic_purges_and_compresses_css(self):
+        """collectstatic вырезает лишние правила и кладёт .gz рядом"""
+        name = self.hashed_css()
+        path = os.path.join(TEMP_STATIC_ROOT, 'css', name)
+        source = os.path.join(settings.BASE_DIR, 'static/css/bootstrap.min.css')
+        self.assertLess(os.path.getsize(path), os.path.getsize(source))
+        with open(path + '.gz', 'rb') as compressed, open(path, 'rb') as css:
+            self.assertEqual(gzip.decompress(compressed.read()), css.read())
+
+    def test_serves_precompressed_file_with_long_cache(self):
+        """Файл с хешем отдаётся сжатым и с долгим Cache-Control"""
+        status, headers, body = self.request(
+            f'{settings.STATIC_URL}css/{self.hashed_css()}',
+            HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE_CACHE)
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304"""
+        path = f'{settings.STATIC_URL}css/{self.hashed_css()}'
+        _, headers, _ = self.request(path)
+        status, _, body = self.request(
+            path, HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_path_traversal_is_not_served(self):
+        """Файлы за пределами STATIC_ROOT не отдаются"""
+        status, _, _ = self.request(f'{settings.STATIC_URL}../manage.py')
+        self.assertEqual(status, '404 Not Found')
+
+
+class PurgeCSSTests(SimpleTestCase):
+    def test_purge_css(self):
+        """Из CSS удаляются правила с неиспользуемыми классами"""
+        css = (
+            '/* comment */@charset "UTF-8";body{margin:0}'
+            '.used,.unused{color:red}.unused{color:blue}'
+            '@media (min-width:1px){.unused{top:0}.used .nav{top:1px}}'
+        )
+        self.assertEqual(
+            purge_css(css, {'used', 'nav'}),
+            '@charset "UTF-8";body{margin:0}.used{color:red}'
+            '@media (min-width:1px){.used .nav{top:1px}}'
+        )
+
+    def test_negated_classes_are_not_required(self):
+        """Классы внутри :not() не нужны, чтобы правило осталось"""
+        css = (
+            '.btn:not(.disabled):hover{color:red}'
+            '.btn:not(.a,.b),.unused{top:0}.unused:not(.btn){top:1px}'
+        )
+        self.assertEqual(
+            purge_css(css, {'btn'}),
+            '.btn:not(.disabled):hover{color:red}.btn:not(.a,.b){top:0}'
+        )
@@ -0,0 +1,168 @@
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(max_attempts=2)
+def explode():
+    raise ValueError('Не получилось')
+
+
+@tasks.task
+def linger(seconds):
+    time.sleep(seconds)
+
+
+@tasks.task(every=timedelta(minutes=5))
+def tick():
+    calls.append('tick')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_ready(self):
+        for row in tasks.claim(10):
+            tasks.execute(row)
+
+    def test_delay_and_execute(self):
+        """Отложенная задача выполняется воркером с аргументами"""
+        record.delay('первый')
+        self.run_ready()
+        self.assertEqual(calls, ['первый'])
+        row = Task.objects.get()
+        self.assertIsNotNone(row.finished_at)
+        self.assertEqual(tasks.claim(10), [])
+
+    def test_scheduled_task_waits_for_its_time(self):
+        """Задача на будущее не захватывается раньше срока"""
+        record.schedule(60, 'позже')
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(scheduled_at=timezone.now())
+        self.run_ready()
+        self.assertEqual(calls, ['позже'])
+
+    def test_claimed_task_is_not_claimed_twice(self):
+        """Захваченную задачу не получает второй воркер до конца аренды"""
+        record.delay(1)
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(len(tasks.claim(10)), 1)
+
+    def test_expired_lease_result_is_dropped(self):
+        """Результат пишет только воркер, у которого аренда"""
+        record.delay(1)
+        [row] = tasks.claim(10)
+        self.assertTrue(tasks.renew(row))
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        [other] = tasks.claim(10)
+        self.assertFalse(tasks.renew(row))
+        self.assertFalse(tasks.execute(row))
+        self.assertIsNone(Task.objects.get().finished_at)
+        self.assertTrue(tasks.execute(other))
+        self.assertIsNotNone(Task.objects.get().finished_at)
+
+    def test_attempt_counted_on_claim(self):
+        """Попытка засчитывается при захвате, даже если воркер упал"""
+        explode.delay()
+        for _ in range(explode.max_attempts):
+            self.assertEqual(len(tasks.claim(10)), 1)
+            Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(tasks.claim(10), [])
+        self.assertEqual(Task.objects.get().attempts, explode.max_attempts)
+        self.assertEqual(tasks.queue_stats().failed, 1)
+
+    def test_failed_task_retries_with_backoff(self):
+        """Ошибка откладывает задачу с растущей задержкой до предела"""
+        explode.delay()
+        self.run_ready()
+        row = Task.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertIn('Не получилось', row.last_error)
+        self.assertGreater(row.scheduled_at, timezone.now())
+        Task.objects.update(scheduled_at=timezone.now())
+        self.run_ready()
+        row.refresh_from_db()
+        self.assertEqual(row.attempts, 2)
+        self.assertIsNone(row.finished_at)
+        Task.objects.update(scheduled_at=timezone.now())
+        self.assertEqual(tasks.claim(10), [])
+        self.assertEqual(tasks.queue_stats().failed, 1)
+
+    def test_periodic_task_is_rescheduled(self):
+        """Периодическая задача - одна строка, переносимая на новый срок"""
+        tasks.ensure_periodic()
+        tasks.ensure_periodic()
+        row = Task.objects.get(name=tick.name)
+        self.run_ready()
+        row.refresh_from_db()
+        self.assertIn('tick', calls)
+        self.assertIsNone(row.finished_at)
+        self.assertGreater(
+            row.scheduled_at, timezone.now() + timedelta(minutes=4)
+        )
+
+    def test_stats(self):
+        """Статистика показывает готовые и отложенные задачи"""
+        record.delay(1)
+        record.schedule(60, 2)
+        stats = tasks.queue_stats()
+        self.assertEqual((stats.ready, stats.scheduled), (1, 1))
+
+
+class RunWorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_worker_once(self):
+        """run_worker --once выполняет все готовые задачи"""
+        for number in range(5):
+            record.delay(number)
+        out = StringIO()
+        # Один поток: общая in-memory база тестов SQLite не ждёт снятия
+        # блокировки, и параллельные записи потоков падали бы сразу.
+        call_command('run_worker', once=True, threads=1, stdout=out)
+        self.assertEqual(
+            sorted(call for call in calls if call != 'tick'), [0, 1, 2, 3, 4]
+        )
+        self.assertFalse(Task.objects.filter(
+            name=record.name, finished_at=None
+        ).exists())
+        call_command('run_worker', stats=True, stdout=out)
+        self.assertIn('Готовы к запуску: 0', out.getvalue())
+
+    @override_settings(TASK_LEASE=0.3)
+    def test_lease_renewed_while_running(self):
+        """Аренда продлевается, пока задача выполняется"""
+        linger.delay(0.6)
+        [row] = tasks.claim(10)
+        leases = []
+
+        def renew(row):
+            renewed = original_renew(row)
+            leases.append(row.locked_until)
+            return renewed
+
+        original_renew = tasks.renew
+        with mock.patch.object(tasks, 'renew', renew):
+            self.assertTrue(tasks.execute(row))
+        self.assertGreaterEqual(len(leases), 2)
+        self.assertEqual(leases, sorted(leases))
+        self.assertIsNotNone(Task.objects.get().finished_at)
@@ -0,0 +1,60 @@
+"""Хранилище ключей sorl-thumbnail без приложения sorl.thumbnail.
+
+Пакет sorl при импорте загружает pkg_resources, и одно это занимает
+заметную часть холодного старта. Поэтому sorl.thumbnail не входит в
+INSTALLED_APPS: шаблонный тег подключается через
+TEMPLATES['OPTIONS']['libraries'], а вместо модели
+sorl.thumbnail.models.KVStore записи лежат в core.ThumbnailRecord.
+sorl импортирует этот модуль лениво, при первой работе с миниатюрами.
+"""
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+from .models import ThumbnailRecord
+
+EMPTY_VALUE = ''
+
+
+class KVStore(KVStoreBase):
+    """Ключи в БД с кешем перед ней, как cached_db_kvstore из sorl."""
+
+    @property
+    def cache(self):
+        try:
+            return caches[settings.THUMBNAIL_CACHE]
+        except InvalidCacheBackendError:
+            return cache
+
+    def clear(self, delete_thumbnails=False):
+        prefix = settings.THUMBNAIL_KEY_PREFIX
+        keys = list(self._find_keys_raw(prefix))
+        self.cache.delete_many(keys)
+        ThumbnailRecord.objects.filter(key__startswith=prefix).delete()
+        if delete_thumbnails:
+            self.delete_all_thumbnail_files()
+
+    def _get_raw(self, key):
+        value = self.cache.get(key)
+        if value is None:
+            value = ThumbnailRecord.objects.filter(key=key).values_list(
+                'value', flat=True
+            ).first() or EMPTY_VALUE
+            # Пустое значение тоже кешируется, чтобы не ходить в БД снова.
+            self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+        return value or None
+
+    def _set_raw(self, key, value):
+        ThumbnailRecord.objects.update_or_create(
+            key=key, defaults={'value': value}
+        )
+        self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+
+    def _delete_raw(self, *keys):
+        ThumbnailRecord.objects.filter(key__in=keys).delete()
+        self.cache.delete_many(keys)
+
+    def _find_keys_raw(self, prefix):
+        return ThumbnailRecord.objects.filter(
+            key__startswith=prefix
+        ).values_list('key', flat=True)
@@ -0,0 +1,113 @@
+"""Раздача статики и медиа прямо из WSGI-процесса.
+
+Обёртка над WSGI-приложением отдаёт файлы из STATIC_ROOT и MEDIA_ROOT,
+не заходя в Django: выбирает заранее сжатую .br/.gz версию по
+Accept-Encoding, ставит долгий Cache-Control на файлы с хешем в имени
+и отдаёт содержимое через wsgi.file_wrapper (sendfile у gunicorn/uwsgi).
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE = 'public, max-age=3600'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+class StaticFile:
+    def __init__(self, path, url_path):
+        self.path = path
+        content_type, _ = mimetypes.guess_type(url_path)
+        self.content_type = content_type or 'application/octet-stream'
+        if HASHED_NAME_RE.search(url_path):
+            self.cache_control = IMMUTABLE_CACHE
+        else:
+            self.cache_control = DEFAULT_CACHE
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                self.variants[encoding] = self._stat(path + suffix)
+        self.variants[None] = self._stat(path)
+
+    @staticmethod
+    def _stat(path):
+        stat = os.stat(path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        return path, stat.st_size, last_modified, etag
+
+    def choose(self, accept_encoding):
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accept_encoding:
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+
+class StaticFilesMiddleware:
+    """WSGI-обёртка, отдающая файлы по префиксам URL.
+
+    mounts - последовательность (url_prefix, root, cache_forever).
+    Для cache_forever=True найденные файлы запоминаются в памяти процесса
+    и на диск больше не смотрят.
+    """
+
+    def __init__(self, application, mounts):
+        self.application = application
+        self.mounts = [
+            (prefix, os.path.realpath(root), cache_forever)
+            for prefix, root, cache_forever in mounts
+            if prefix and root
+        ]
+        self.files = {}
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') in ('GET', 'HEAD'):
+            static_file = self.find(environ.get('PATH_INFO', ''))
+            if static_file is not None:
+                return self.serve(static_file, environ, start_response)
+        return self.application(environ, start_response)
+
+    def find(self, url_path):
+        static_file = self.files.get(url_path)
+        if static_file is not None:
+            return static_file
+        for prefix, root, cache_forever in self.mounts:
+            if not url_path.startswith(prefix):
+                continue
+            relative = url_path[len(prefix):]
+            path = os.path.realpath(os.path.join(root, relative))
+            if not path.startswith(root + os.sep) or not os.path.isfile(path):
+                return None
+            static_file = StaticFile(path, url_path)
+            if cache_forever:
+                self.files[url_path] = static_file
+            return static_file
+        return None
+
+    def serve(self, static_file, environ, start_response):
+        encoding, (path, size, last_modified, etag) = static_file.choose(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        headers = [
+            ('Content-Type', static_file.content_type),
+            ('Cache-Control', static_file.cache_control),
+            ('Last-Modified', last_modified),
+            ('ETag', etag),
+        ]
+        if len(static_file.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'), BLOCK_SIZE)
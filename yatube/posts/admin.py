@@ -1,14 +1,124 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
-from .models import Comment, Follow, Group, Post
+from . import moderation
+from .models import Comment, Follow, Group, Post, TextSignature
+
+
+def estimated_rows(model):
+    """Число строк таблицы по статистике ANALYZE (sqlite_stat1) или None."""
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [model._meta.db_table]
+            )
+        except DatabaseError:
+            # ANALYZE ещё ни разу не запускался.
+            return None
+        row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Паджинатор без COUNT(*) по всей таблице.
+
+    Для нефильтрованного списка число строк берётся из статистики, которую
+    задача posts.tasks.analyze_tables обновляет каждый час. Пока
+    статистики нет, считается точно.
+    """
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if query.where:
+            return super().count
+        estimate = estimated_rows(self.object_list.model)
+        if estimate is None:
+            return super().count
+        return estimate
+
+
+def fts_query(search_term):
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""'))
+        for word in search_term.split()
+    )
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='-без группы-'
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'image')
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('move_to_group', 'delete_authors_content', 'purge_comments')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip() or connection.vendor != 'sqlite':
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        matches = RawSQL(
+            'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s',
+            (fts_query(search_term),)
+        )
+        return queryset.filter(pk__in=matches), False
+
+    def move_to_group(self, request, queryset):
+        group = PostActionForm(request.POST).fields['group'].clean(
+            request.POST.get('group')
+        )
+        updated = moderation.regroup_posts(queryset, group)
+        self.message_user(
+            request, f'Перенесено постов: {updated}', messages.SUCCESS
+        )
+    move_to_group.short_description = 'Перенести в выбранную группу'
+
+    def delete_authors_content(self, request, queryset):
+        author_ids = queryset.order_by().values_list(
+            'author_id', flat=True
+        ).distinct()
+        posts, comments = moderation.delete_user_content(author_ids)
+        self.message_user(
+            request,
+            f'Удалено постов: {posts}, комментариев: {comments}',
+            messages.SUCCESS
+        )
+    delete_authors_content.short_description = (
+        'Удалить все посты и комментарии авторов'
+    )
+
+    def purge_comments(self, request, queryset):
+        deleted = moderation.purge_comments(
+            Comment.objects.filter(post__in=queryset.order_by().values('pk'))
+        )
+        self.message_user(
+            request, f'Удалено комментариев: {deleted}', messages.SUCCESS
+        )
+    purge_comments.short_description = 'Удалить комментарии к постам'
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -19,9 +129,34 @@ class GroupAdmin(admin.ModelAdmin):
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'created', 'author')
+    list_select_related = ('author',)
     search_fields = ('text',)
     list_filter = ('created',)
     empty_value_display = '-пусто-'
+    actions = ('purge_comments', 'delete_authors_content')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def purge_comments(self, request, queryset):
+        deleted = moderation.purge_comments(queryset)
+        self.message_user(
+            request, f'Удалено комментариев: {deleted}', messages.SUCCESS
+        )
+    purge_comments.short_description = 'Удалить выбранные комментарии'
+
+    def delete_authors_content(self, request, queryset):
+        author_ids = queryset.order_by().values_list(
+            'author_id', flat=True
+        ).distinct()
+        posts, comments = moderation.delete_user_content(author_ids)
+        self.message_user(
+            request,
+            f'Удалено постов: {posts}, комментариев: {comments}',
+            messages.SUCCESS
+        )
+    delete_authors_content.short_description = (
+        'Удалить все посты и комментарии авторов'
+    )
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -30,7 +165,59 @@ class FollowAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class TextSignatureAdmin(admin.ModelAdmin):
+    """Кластеры почти одинаковых текстов.
+
+    В списке - первые тексты кластеров, начиная с самых больших; ссылка
+    в колонке копий открывает все копии кластера.
+    """
+    list_display = ('pk', 'kind', 'object_link', 'excerpt', 'copies_link')
+    list_filter = ('kind',)
+    fields = ('kind', 'object_id', 'excerpt', 'duplicate_of', 'created')
+    readonly_fields = fields
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if 'duplicate_of__id__exact' in request.GET:
+            return queryset
+        return queryset.filter(duplicate_of=None).annotate(
+            copies_count=Count('copies')
+        ).filter(copies_count__gt=0).order_by('-copies_count', 'pk')
+
+    def lookup_allowed(self, lookup, value):
+        return (
+            lookup == 'duplicate_of__id__exact'
+            or super().lookup_allowed(lookup, value)
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    def object_link(self, signature):
+        if signature.kind == TextSignature.POST:
+            return format_html(
+                '<a href="{}">{}</a>',
+                reverse('posts:post_detail', args=[signature.object_id]),
+                signature.object_id
+            )
+        return signature.object_id
+    object_link.short_description = 'id'
+
+    def copies_link(self, signature):
+        count = getattr(signature, 'copies_count', None)
+        if count is None:
+            return '-'
+        url = reverse('admin:posts_textsignature_changelist')
+        return format_html(
+            '<a href="{}?duplicate_of__id__exact={}">{}</a>',
+            url, signature.pk, count
+        )
+    copies_link.short_description = 'Копий'
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(TextSignature, TextSignatureAdmin)
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import fts, signals  # noqa: F401
+
+        post_migrate.connect(fts.ensure_installed, sender=self)
@@ -0,0 +1,139 @@
+"""Архив старых постов.
+
+Горячие ленты читают только posts_post, а посты старше
+POSTS_ARCHIVE_AFTER_DAYS переносятся пачками в posts_archivedpost
+вместе с комментариями. post_detail и profile заглядывают в архив сами.
+Подписи posts.duplicates перенесённых текстов удаляются: архивные тексты
+не участвуют в поиске копий.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from core.pagecache import ALL_TAG, invalidate_tags
+
+from . import group_cache
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Post, TextSignature
+)
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Переносит в архив не больше batch_size постов старше cutoff.
+
+    Каждая пачка - отдельная короткая транзакция из INSERT ... SELECT
+    и DELETE, поэтому блокировка записи держится недолго.
+    Возвращает число перенесённых постов.
+    """
+    batch = list(
+        Post.objects.filter(pub_date__lt=cutoff)
+        .order_by('pub_date')
+        .values_list('pk', 'group_id')[:batch_size]
+    )
+    if not batch:
+        return 0
+    post_ids = [pk for pk, _ in batch]
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {ArchivedPost._meta.db_table} '
+            f'(id, text, text_html, excerpt_html, pub_date, author_id, '
+            f'group_id, image, image_width, image_height, '
+            f'image_placeholder, archived_at) '
+            f'SELECT id, text, text_html, excerpt_html, pub_date, author_id, '
+            f'group_id, image, image_width, image_height, '
+            f'image_placeholder, %s '
+            f'FROM {Post._meta.db_table} WHERE id IN ({placeholders})',
+            [now, *post_ids]
+        )
+        cursor.execute(
+            f'INSERT INTO {ArchivedComment._meta.db_table} '
+            f'(id, post_id, author_id, text, created) '
+            f'SELECT id, post_id, author_id, text, created '
+            f'FROM {Comment._meta.db_table} '
+            f'WHERE post_id IN ({placeholders})',
+            post_ids
+        )
+        TextSignature.objects.filter(
+            kind=TextSignature.COMMENT,
+            object_id__in=Comment.objects.filter(
+                post_id__in=post_ids
+            ).values('pk')
+        ).delete()
+        TextSignature.objects.filter(
+            kind=TextSignature.POST, object_id__in=post_ids
+        ).delete()
+        Comment.objects.filter(post_id__in=post_ids)._raw_delete(
+            Comment.objects.db
+        )
+        Post.objects.filter(pk__in=post_ids)._raw_delete(Post.objects.db)
+    for group_id in {group_id for _, group_id in batch if group_id}:
+        group_cache.invalidate_group_posts(group_id)
+    invalidate_tags(ALL_TAG)
+    return len(post_ids)
+
+
+def get_post_or_archived(post_id):
+    """Ищет пост сначала в живой таблице, затем в архиве."""
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is None:
+        post = ArchivedPost.objects.select_related('author', 'group').filter(
+            pk=post_id
+        ).first()
+    if post is None:
+        raise Http404('Пост не найден')
+    return post
+
+
+class ChainedPostList:
+    """Живые посты, за которыми следуют архивные, для Paginator.
+
+    Архив содержит только посты старше любого живого, поэтому простая
+    склейка двух отсортированных выборок сохраняет порядок -pub_date.
+    """
+
+    def __init__(self, live, archived):
+        self.live = live
+        self.archived = archived
+
+    def live_count(self):
+        if not hasattr(self, '_live_count'):
+            self._live_count = self.live.count()
+        return self._live_count
+
+    def count(self):
+        if not hasattr(self, '_count'):
+            self._count = self.live_count() + self.archived.count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = item.stop if item.stop is not None else self.count()
+        live_count = self.live_count()
+        page = []
+        if start < live_count:
+            page.extend(self.live[start:min(stop, live_count)])
+        if stop > live_count:
+            page.extend(
+                self.archived[max(start - live_count, 0):stop - live_count]
+            )
+        return page
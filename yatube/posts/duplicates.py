@@ -0,0 +1,252 @@
+"""Поиск почти одинаковых постов и комментариев (MinHash + LSH).
+
+Текст приводится к нижнему регистру, из него берутся символьные
+шинглы по SHINGLE_SIZE символов, каждый хешируется crc32. Подпись -
+NUM_PERM минимумов по хеш-функциям вида (a * x + b) mod 2**64 >> 32,
+доля совпавших позиций двух подписей оценивает сходство Жаккара.
+
+Подпись делится на BANDS полос по ROWS значений, хеш каждой полосы -
+ключ корзины в LshBucket. Кандидаты в копии - тексты, у которых совпала
+хотя бы одна корзина: это один запрос по индексу с BANDS ключами,
+независимо от размера базы. Кандидат с оценкой сходства не ниже
+DUPLICATE_THRESHOLD считается оригиналом, и новая подпись попадает в его
+кластер (duplicate_of указывает на первый текст кластера). Копии текста
+не считаются его оригиналом, поэтому пересохранённый первый текст
+остаётся корнем кластера; неизменённый текст не переиндексируется.
+
+Подписи пачки текстов считаются матричными операциями numpy по кускам
+не больше NUMPY_CHUNK шинглов, чтобы промежуточная матрица
+NUM_PERM x шинглы занимала несколько мегабайт при любом размере пачки.
+_minhash - тот же алгоритм в чистом Python, эталон для тестов.
+"""
+import re
+import struct
+import zlib
+from functools import lru_cache
+from hashlib import blake2b
+from random import Random
+
+import numpy
+from django.conf import settings
+from django.db import transaction
+
+from .models import Comment, LshBucket, Post, TextSignature
+
+SHINGLE_SIZE = 5
+# Шинглы берутся только из начала длинного текста
+SHINGLE_TEXT_LIMIT = 2000
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Сколько кандидатов из корзин сравнивать с новой подписью
+MAX_CANDIDATES = 50
+EXCERPT_LENGTH = 200
+# Сколько шинглов пачки хешировать одной матрицей (8 байт x NUM_PERM
+# на шингл)
+NUMPY_CHUNK = 16 * 1024
+
+MASK64 = (1 << 64) - 1
+SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+
+_random = Random(20240611)
+PERMUTATIONS = [
+    (_random.getrandbits(64) | 1, _random.getrandbits(64))
+    for _ in range(NUM_PERM)
+]
+
+WORD_RE = re.compile(r'\w+')
+
+KINDS = {TextSignature.POST: Post, TextSignature.COMMENT: Comment}
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall(text.lower()))[:SHINGLE_TEXT_LIMIT]
+
+
+def is_indexable(text):
+    return len(normalize(text)) >= settings.DUPLICATE_MIN_LENGTH
+
+
+def shingle_hashes(text):
+    text = normalize(text)
+    return sorted({
+        zlib.crc32(text[start:start + SHINGLE_SIZE].encode())
+        for start in range(max(len(text) - SHINGLE_SIZE + 1, 1))
+    })
+
+
+def _minhash(hashes):
+    return struct.pack(SIGNATURE_FORMAT, *(
+        min((a * x + b) & MASK64 for x in hashes) >> 32
+        for a, b in PERMUTATIONS
+    ))
+
+
+def _minhash_chunk_numpy(hash_lists):
+    sizes = numpy.array([len(hashes) for hashes in hash_lists])
+    offsets = numpy.concatenate(([0], numpy.cumsum(sizes)[:-1]))
+    values = numpy.fromiter(
+        (x for hashes in hash_lists for x in hashes),
+        dtype=numpy.uint64, count=int(sizes.sum())
+    )
+    a = numpy.array([a for a, _ in PERMUTATIONS], dtype=numpy.uint64)
+    b = numpy.array([b for _, b in PERMUTATIONS], dtype=numpy.uint64)
+    # Переполнение uint64 и есть взятие по модулю 2**64.
+    with numpy.errstate(over='ignore'):
+        products = a[:, None] * values[None, :] + b[:, None]
+    minimums = numpy.minimum.reduceat(products, offsets, axis=1) >> 32
+    return [
+        minimums[:, column].astype('<u4').tobytes()
+        for column in range(len(hash_lists))
+    ]
+
+
+def _minhash_batch_numpy(hash_lists):
+    result = []
+    chunk, size = [], 0
+    for hashes in hash_lists:
+        if chunk and size + len(hashes) > NUMPY_CHUNK:
+            result.extend(_minhash_chunk_numpy(chunk))
+            chunk, size = [], 0
+        chunk.append(hashes)
+        size += len(hashes)
+    if chunk:
+        result.extend(_minhash_chunk_numpy(chunk))
+    return result
+
+
+def signatures(texts):
+    """MinHash-подписи пачки текстов."""
+    return _minhash_batch_numpy([shingle_hashes(text) for text in texts])
+
+
+@lru_cache(maxsize=256)
+def signature(text):
+    # Форма и post_save считают подпись одного и того же текста.
+    return signatures([text])[0]
+
+
+def band_keys(signature):
+    keys = []
+    width = ROWS * 4
+    for band in range(BANDS):
+        digest = blake2b(
+            signature[band * width:(band + 1) * width],
+            digest_size=8, person=band.to_bytes(2, 'big')
+        ).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def similarity(first, second):
+    first = struct.unpack(SIGNATURE_FORMAT, first)
+    second = struct.unpack(SIGNATURE_FORMAT, second)
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERM
+
+
+def _find_original(signature, kind, object_id, own_pk):
+    candidates = (
+        TextSignature.objects.filter(buckets__key__in=band_keys(signature))
+        .exclude(kind=kind, object_id=object_id)
+        .only('signature', 'duplicate_of_id')
+        .distinct()
+        .order_by('pk')
+    )
+    if own_pk is not None:
+        # Копии самого текста не делают его копией.
+        candidates = candidates.exclude(duplicate_of_id=own_pk)
+    best, best_score = None, settings.DUPLICATE_THRESHOLD
+    for candidate in candidates[:MAX_CANDIDATES]:
+        score = similarity(signature, bytes(candidate.signature))
+        if score >= best_score:
+            best, best_score = candidate, score
+    if best is None:
+        return None
+    return best.duplicate_of_id or best.pk
+
+
+def _own_record(kind, object_id):
+    if object_id is None:
+        return None
+    return TextSignature.objects.filter(
+        kind=kind, object_id=object_id
+    ).only('signature', 'excerpt', 'duplicate_of_id').first()
+
+
+def find_original(signature, kind=None, object_id=None):
+    """Первый текст кластера, в который попадает подпись, или None."""
+    record = _own_record(kind, object_id)
+    return _find_original(
+        signature, kind, object_id, record.pk if record else None
+    )
+
+
+def is_duplicate(text, kind=None, object_id=None):
+    if not is_indexable(text):
+        return False
+    return find_original(signature(text), kind, object_id) is not None
+
+
+def _store(kind, object_id, text, signature):
+    record = _own_record(kind, object_id)
+    excerpt = text[:EXCERPT_LENGTH]
+    if record is not None and (
+        bytes(record.signature) == signature and record.excerpt == excerpt
+    ):
+        # Текст не изменился: корзины и кластер остаются прежними.
+        return record.duplicate_of_id
+    original = _find_original(
+        signature, kind, object_id, record.pk if record else None
+    )
+    with transaction.atomic():
+        record, _ = TextSignature.objects.update_or_create(
+            kind=kind,
+            object_id=object_id,
+            defaults={
+                'excerpt': excerpt,
+                'signature': signature,
+                'duplicate_of_id': original,
+            }
+        )
+        record.buckets.all().delete()
+        LshBucket.objects.bulk_create(
+            LshBucket(signature=record, key=key)
+            for key in band_keys(signature)
+        )
+    return original
+
+
+def index_text(kind, object_id, text):
+    """Обновляет подпись текста; возвращает pk оригинала или None."""
+    if not is_indexable(text):
+        forget(kind, object_id)
+        return None
+    return _store(kind, object_id, text, signature(text))
+
+
+def forget(kind, object_id):
+    TextSignature.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def backfill(kind, batch_size=500):
+    """Считает подписи всех текстов kind пачками по batch_size.
+
+    Возвращает пару (проиндексировано текстов, найдено копий).
+    """
+    indexed = duplicates = 0
+    rows = KINDS[kind].objects.order_by('pk').values_list('pk', 'text')
+    last_pk = 0
+    while True:
+        batch = [
+            (pk, text) for pk, text in rows.filter(pk__gt=last_pk)[:batch_size]
+        ]
+        if not batch:
+            return indexed, duplicates
+        last_pk = batch[-1][0]
+        batch = [(pk, text) for pk, text in batch if is_indexable(text)]
+        for (pk, text), value in zip(
+            batch, signatures([text for _, text in batch])
+        ):
+            if _store(kind, pk, text, value) is not None:
+                duplicates += 1
+            indexed += 1
@@ -0,0 +1,174 @@
+"""Ленты Atom и RSS для главной, групп и авторов.
+
+Лента пишется потоком: записи читаются из БД через iterator() и уходят
+клиенту по мере генерации XML, без сборки всего документа в памяти.
+ETag и Last-Modified строятся по самому свежему посту ленты, поэтому
+опрос агрегатором без новых постов стоит одного запроса к индексу
+pub_date и заканчивается ответом 304. Готовое тело кешируется по ключу
+с pk и датой этого поста и перестаёт совпадать, как только в ленте
+появляется новая запись. В ETag и ключ входит и версия тега страницы
+ленты (core.pagecache), поэтому правка, удаление поста и скрытие автора
+тоже дают новую ленту.
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date, quote_etag
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from core.pagecache import tag_versions
+
+FEED_KEY = 'feeds:{}:{}:{}:{}:{}:{}'
+TITLE_LENGTH = 60
+FLUSH_SIZE = 16 * 1024
+
+
+class FeedTypeConverter:
+    regex = 'atom|rss'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+class StreamingFeedMixin:
+    item_element = None
+
+    def __init__(self, *args, updated, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = updated
+
+    def latest_post_date(self):
+        return self.updated or super().latest_post_date()
+
+    def make_item(self, **kwargs):
+        # add_item приводит поля к виду, который ждут add_item_elements.
+        self.add_item(**kwargs)
+        return self.items.pop()
+
+    def stream(self, items):
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, 'utf-8')
+        handler.startDocument()
+        self.start_root(handler)
+        for item in items:
+            handler.startElement(
+                self.item_element, self.item_attributes(item)
+            )
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            if buffer.tell() >= FLUSH_SIZE:
+                yield self.drain(buffer)
+        self.end_root(handler)
+        yield self.drain(buffer)
+
+    @staticmethod
+    def drain(buffer):
+        chunk = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+
+class AtomFeed(StreamingFeedMixin, Atom1Feed):
+    item_element = 'entry'
+
+    def start_root(self, handler):
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def end_root(self, handler):
+        handler.endElement('feed')
+
+
+class RssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    item_element = 'item'
+
+    def start_root(self, handler):
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def end_root(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+FEED_CLASSES = {'atom': AtomFeed, 'rss': RssFeed}
+
+
+def feed_items(request, feed, posts):
+    for post in posts.iterator():
+        link = request.build_absolute_uri(post.get_absolute_url())
+        yield feed.make_item(
+            title=Truncator(post.text).chars(TITLE_LENGTH),
+            link=link,
+            description=post.excerpt_html,
+            unique_id=link,
+            pubdate=post.pub_date,
+            author_name=post.author.get_full_name() or post.author.username,
+            categories=[post.group.title] if post.group_id else None,
+        )
+
+
+def cached_stream(key, chunks):
+    """Отдаёт части тела и сохраняет его в кеш, когда лента дописана."""
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(body), settings.FEED_CACHE_TIMEOUT)
+
+
+def feed_response(request, scope, posts, feed_type, tag, title, link,
+                  description):
+    """Потоковый ответ с лентой последних постов из posts."""
+    posts = posts.order_by('-pub_date', '-pk')
+    newest = posts.values_list('pk', 'pub_date').first()
+    newest_pk, updated = newest or (0, None)
+    version = tag_versions([tag])[tag]
+    etag = quote_etag(f'{scope}-{feed_type}-{newest_pk}-{version}')
+    last_modified = int(updated.timestamp()) if updated else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        feed_class = FEED_CLASSES[feed_type]
+        key = FEED_KEY.format(
+            request.get_host(), scope, feed_type, newest_pk, last_modified,
+            version
+        )
+        body = cache.get(key)
+        if body is not None:
+            response = HttpResponse(
+                body, content_type=feed_class.content_type
+            )
+        else:
+            feed = feed_class(
+                title=title,
+                link=request.build_absolute_uri(link),
+                description=description,
+                feed_url=request.build_absolute_uri(),
+                language=settings.LANGUAGE_CODE,
+                updated=updated,
+            )
+            posts = posts.select_related('author', 'group').defer(
+                'text_html'
+            )[:settings.FEED_ITEMS]
+            response = StreamingHttpResponse(
+                cached_stream(key, feed.stream(
+                    feed_items(request, feed, posts)
+                )),
+                content_type=feed_class.content_type
+            )
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
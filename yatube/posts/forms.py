@@ -1,15 +1,40 @@
 from django import forms
+from django.conf import settings
 
-from . models import Comment, Post
+from . import duplicates
+from . models import Comment, Post, TextSignature
 
 
-class PostForm(forms.ModelForm):
+class DuplicateTextMixin:
+    """Отклоняет почти точную копию уже опубликованного текста.
+
+    Работает, только если DUPLICATE_ACTION = 'reject'; при 'flag' копия
+    сохраняется и попадает в кластер в админке.
+    """
+    duplicate_kind = None
+
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if settings.DUPLICATE_ACTION == 'reject' and duplicates.is_duplicate(
+            text, self.duplicate_kind, self.instance.pk
+        ):
+            raise forms.ValidationError(
+                'Почти такой же текст уже публиковался'
+            )
+        return text
+
+
+class PostForm(DuplicateTextMixin, forms.ModelForm):
+    duplicate_kind = TextSignature.POST
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
 
 
-class CommentForm(forms.ModelForm):
+class CommentForm(DuplicateTextMixin, forms.ModelForm):
+    duplicate_kind = TextSignature.COMMENT
+
     class Meta:
         model = Comment
         fields = ('text',)
@@ -0,0 +1,55 @@
+"""Полнотекстовый индекс FTS5 по тексту постов (только SQLite).
+
+Индекс внешнего содержимого поддерживается триггерами на posts_post.
+SQLite пересоздаёт таблицу при изменении её схемы, и триггеры при этом
+пропадают. Поэтому после каждого migrate обработчик post_migrate
+проверяет, что индекс и триггеры на месте, и при необходимости создаёт
+их заново и перестраивает индекс: посты, записанные без триггеров, в
+него тоже попадут. Миграциям ничего для этого делать не нужно.
+"""
+from django.db import connections
+
+TRIGGERS = ('posts_post_fts_ai', 'posts_post_fts_ad', 'posts_post_fts_au')
+
+INSTALL_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5("
+    "text, content='posts_post', content_rowid='id')",
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai "
+    "AFTER INSERT ON posts_post "
+    "BEGIN INSERT INTO posts_post_fts(rowid, text) "
+    "VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad "
+    "AFTER DELETE ON posts_post "
+    "BEGIN INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_au AFTER UPDATE OF text "
+    "ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); END",
+)
+
+
+def is_installed(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            ['posts_post_fts', *TRIGGERS]
+        )
+        return len(cursor.fetchall()) == len(TRIGGERS) + 1
+
+
+def ensure_installed(sender, using, **kwargs):
+    """Обработчик post_migrate: восстанавливает индекс и его триггеры."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if 'posts_post' not in connection.introspection.table_names():
+        # Миграции откатили до создания постов.
+        return
+    if is_installed(connection):
+        return
+    with connection.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
@@ -0,0 +1,190 @@
+"""Горячий кеш страниц сообществ.
+
+Хранит в кеше три вещи:
+* объект Group по slug (сбрасывается при сохранении/удалении группы);
+* id первых GROUP_CACHE_SIZE постов активных авторов группы вместе с
+  датами публикации и общим числом таких постов - список обновляется
+  инкрементально при создании, редактировании и удалении поста под
+  блокировкой cache.add, а при одновременной правке просто
+  сбрасывается; при деактивации автора его группы сбрасываются;
+* строки постов страницы достаются одним запросом in_bulk.
+
+Посты, созданные через bulk_create/update, сигналов не порождают,
+поэтому после массовых операций нужно вызывать invalidate_group_posts.
+"""
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.http import Http404
+
+from core.pagecache import invalidate_tags, tag_versions
+
+from .models import LISTING_DEFERRED, Group, Post
+
+GROUP_CACHE_SIZE = 100
+GROUP_CACHE_TIMEOUT = 60 * 60
+
+GROUP_POSTS_LOCK_TIMEOUT = 10
+
+GROUP_KEY = 'group:slug:{}'
+GROUP_POSTS_KEY = 'group:posts:{}:{}'
+GROUP_POSTS_LOCK_KEY = 'group:posts:lock:{}'
+GROUP_POSTS_TAG = 'group-posts:{}'
+
+
+def _sort_key(post):
+    return (-post.pub_date.timestamp(), -post.pk)
+
+
+def get_group(slug):
+    """Возвращает группу по slug из кеша или из БД (404, если её нет)."""
+    key = GROUP_KEY.format(slug)
+    group = cache.get(key)
+    if group is None:
+        try:
+            group = Group.objects.get(slug=slug)
+        except Group.DoesNotExist:
+            raise Http404('Группа не найдена')
+        cache.set(key, group, GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def invalidate_group(slug):
+    cache.delete(GROUP_KEY.format(slug))
+
+
+def _group_posts_key(group_id):
+    # Версия в ключе: после сброса запоздалая запись старого списка
+    # ляжет под старый ключ и никому не попадётся.
+    version = tag_versions([GROUP_POSTS_TAG.format(group_id)])
+    return GROUP_POSTS_KEY.format(group_id, *version.values())
+
+
+def _load_group_posts(group_id, key):
+    posts = Post.objects.filter(group_id=group_id, author__is_active=True)
+    entries = posts.order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:GROUP_CACHE_SIZE]
+    keys = [(-pub_date.timestamp(), -pk) for pk, pub_date in entries]
+    if len(keys) < GROUP_CACHE_SIZE:
+        count = len(keys)
+    else:
+        count = posts.count()
+    state = {'keys': keys, 'count': count}
+    cache.set(key, state, GROUP_CACHE_TIMEOUT)
+    return state
+
+
+def get_group_posts_state(group_id):
+    key = _group_posts_key(group_id)
+    state = cache.get(key)
+    if state is None:
+        state = _load_group_posts(group_id, key)
+    return state
+
+
+def invalidate_group_posts(group_id):
+    invalidate_tags(GROUP_POSTS_TAG.format(group_id))
+
+
+def _edit_group_posts(group_id, edit):
+    """Правит закешированный список группы под блокировкой.
+
+    edit меняет state на месте и возвращает True, если его надо
+    сохранить. Если список уже правит другой процесс или поток, список
+    сбрасывается и при следующем чтении собирается из БД заново.
+    """
+    lock_key = GROUP_POSTS_LOCK_KEY.format(group_id)
+    if not cache.add(lock_key, True, GROUP_POSTS_LOCK_TIMEOUT):
+        invalidate_group_posts(group_id)
+        return
+    try:
+        key = _group_posts_key(group_id)
+        state = cache.get(key)
+        if state is not None and edit(state):
+            cache.set(key, state, GROUP_CACHE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def add_group_post(group_id, post):
+    """Вставляет пост в закешированный список группы с учётом сортировки."""
+    def edit(state):
+        keys = state['keys']
+        sort_key = _sort_key(post)
+        position = bisect_left(keys, sort_key)
+        if position < len(keys) and keys[position] == sort_key:
+            return False
+        state['count'] += 1
+        if position < GROUP_CACHE_SIZE:
+            keys.insert(position, sort_key)
+            del keys[GROUP_CACHE_SIZE:]
+        return True
+
+    _edit_group_posts(group_id, edit)
+
+
+def remove_group_post(group_id, post):
+    """Убирает пост из закешированного списка группы."""
+    def edit(state):
+        keys = state['keys']
+        sort_key = _sort_key(post)
+        position = bisect_left(keys, sort_key)
+        if position < len(keys) and keys[position] == sort_key:
+            del keys[position]
+            if (
+                len(keys) < state['count'] - 1
+                and len(keys) < GROUP_CACHE_SIZE
+            ):
+                # Окно стало неполным, а в БД есть ещё посты - перечитаем.
+                invalidate_group_posts(group_id)
+                return False
+        state['count'] = max(state['count'] - 1, 0)
+        return True
+
+    _edit_group_posts(group_id, edit)
+
+
+class GroupPostList:
+    """Ленивый список постов группы для Paginator.
+
+    Срезы внутри закешированного окна превращаются в один запрос in_bulk,
+    более глубокие страницы читаются из БД обычным запросом.
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self.state = get_group_posts_state(group.pk)
+
+    def count(self):
+        return self.state['count']
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = item.stop if item.stop is not None else self.count()
+        keys = self.state['keys']
+        if stop > len(keys) and len(keys) < self.count():
+            return list(
+                self.group.group_posts.filter(author__is_active=True)
+                .select_related('author', 'group')
+                .defer(*LISTING_DEFERRED)
+                .order_by('-pub_date', '-pk')[start:stop]
+            )
+        ids = [-pk for _, pk in keys[start:stop]]
+        if not ids:
+            return []
+        posts = Post.objects.select_related('author').defer(
+            *LISTING_DEFERRED
+        ).in_bulk(ids)
+        page = []
+        for pk in ids:
+            post = posts.get(pk)
+            if post is not None:
+                post.group = self.group
+                page.append(post)
+        return page
@@ -0,0 +1,42 @@
+"""Размеры картинки поста и размытая заглушка для неё.
+
+Считаются один раз при загрузке картинки и хранятся в посте, чтобы
+шаблон мог сразу отдать браузеру размеры (страница не прыгает, пока
+грузятся картинки) и крошечный JPEG в data URI, который виден на месте
+картинки, пока та лениво догружается. Миниатюра в шаблонах сохраняет
+пропорции картинки, поэтому её рамку задают сохранённые размеры, а
+заглушка уменьшается целиком, без обрезки.
+"""
+import base64
+from io import BytesIO
+
+PLACEHOLDER_SIZE = (20, 20)
+PLACEHOLDER_QUALITY = 30
+
+
+def placeholder_uri(image):
+    small = image.convert('RGB')
+    small.thumbnail(PLACEHOLDER_SIZE)
+    buffer = BytesIO()
+    small.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY, optimize=True)
+    return 'data:image/jpeg;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def describe(file):
+    """(ширина, высота, заглушка) картинки; (None, None, '') для битой."""
+    # Pillow тяжёлый, при старте процесса он не загружается.
+    from PIL import Image, ImageOps
+
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            # Миниатюры sorl поворачивают картинку по EXIF, здесь так же.
+            image = ImageOps.exif_transpose(image)
+            width, height = image.size
+            return width, height, placeholder_uri(image)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None, None, ''
+    finally:
+        file.seek(0)
@@ -0,0 +1,154 @@
+"""Server-Sent Events о новых постах.
+
+Клиент на index, странице группы или ленте подписок открывает
+/events/posts/?scope=index|group|follow[&slug=...] и получает событие
+new-posts с числом постов, появившихся в его ленте с момента подключения.
+Эндпоинт - нативное ASGI-приложение, он работает только в ASGI-режиме
+(yatube/asgi.py); в WSGI-режиме страница просто остаётся без уведомлений.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http import Http404
+
+from core.pubsub import get_hub
+
+from . import group_cache
+from .models import Follow
+
+EVENTS_PATH = '/events/posts/'
+KEEPALIVE_INTERVAL = 20
+# Потоков для resolve_channels: волна переподключений клиентов открывает
+# к базе не больше LOOKUP_THREADS соединений одновременно.
+LOOKUP_THREADS = 4
+
+ALL_CHANNEL = 'posts:all'
+
+# Потоки создаются при первой задаче, а не при импорте.
+_executor = ThreadPoolExecutor(
+    max_workers=LOOKUP_THREADS, thread_name_prefix='live-lookup'
+)
+
+
+def group_channel(group_id):
+    return f'posts:group:{group_id}'
+
+
+def author_channel(author_id):
+    return f'posts:author:{author_id}'
+
+
+def publish_new_post(post):
+    channels = [ALL_CHANNEL, author_channel(post.author_id)]
+    if post.group_id is not None:
+        channels.append(group_channel(post.group_id))
+    get_hub().publish(*channels)
+
+
+def _session_user(headers):
+    cookie = SimpleCookie()
+    for name, value in headers:
+        if name == b'cookie':
+            cookie.load(value.decode('latin-1'))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    request = SimpleNamespace(session=engine.SessionStore(morsel.value))
+    user = get_user(request)
+    return user if user.is_authenticated else None
+
+
+def resolve_channels(scope):
+    """Каналы для ленты из query string; None, если лента недоступна."""
+    params = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    feed = params.get('scope', ['index'])[0]
+    close_old_connections()
+    try:
+        if feed == 'index':
+            return [ALL_CHANNEL]
+        if feed == 'group':
+            slug = params.get('slug', [''])[0]
+            return [group_channel(group_cache.get_group(slug).pk)]
+        if feed == 'follow':
+            user = _session_user(scope.get('headers', []))
+            if user is None:
+                return None
+            author_ids = Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+            return [author_channel(author_id) for author_id in author_ids]
+    except Http404:
+        return None
+    finally:
+        close_old_connections()
+    return None
+
+
+def format_event(count):
+    data = json.dumps({'count': count})
+    return f'event: new-posts\ndata: {data}\n\n'.encode()
+
+
+async def feed_events(scope, receive, send):
+    loop = asyncio.get_running_loop()
+    channels = await loop.run_in_executor(_executor, resolve_channels, scope)
+    if channels is None:
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'text/plain')],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': b'retry: 10000\n\n',
+        'more_body': True,
+    })
+    hub = get_hub()
+    subscriber = hub.subscribe(channels)
+    disconnect = asyncio.ensure_future(receive())
+    total = 0
+    try:
+        while True:
+            waiter = asyncio.ensure_future(subscriber.event.wait())
+            done, _ = await asyncio.wait(
+                {waiter, disconnect},
+                timeout=KEEPALIVE_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                waiter.cancel()
+                break
+            if waiter in done:
+                total += subscriber.take()
+                body = format_event(total)
+            else:
+                waiter.cancel()
+                body = b': ping\n\n'
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+    finally:
+        hub.unsubscribe(subscriber)
+        disconnect.cancel()
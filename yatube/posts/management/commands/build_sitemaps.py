@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет карту сайта в SITEMAP_ROOT, переписывая только куски, '
+        'в диапазоне id которых что-то изменилось'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Переписать все куски, например после переименований'
+        )
+
+    def handle(self, *args, **options):
+        written, removed = build_sitemaps(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Переписано кусков: {written}, удалено: {removed}'
+        ))
@@ -0,0 +1,49 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import media
+from core.models import MediaFile
+from core.pagecache import ALL_TAG, invalidate_tags
+from posts.models import ArchivedPost, Post
+
+MODELS = (Post, ArchivedPost)
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки, загруженные до контентно-адресуемого '
+        'хранилища, под имена по хешу и склеивает дубликаты'
+    )
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in MODELS:
+            names.update(
+                model.objects.exclude(image='')
+                .values_list('image', flat=True).distinct()
+            )
+        legacy = sorted(
+            name for name in names if not media.is_content_name(name)
+        )
+        moved = missing = 0
+        for name in legacy:
+            if not default_storage.exists(name):
+                missing += 1
+                continue
+            with default_storage.open(name) as source:
+                new_name = default_storage.save(name, source)
+            with transaction.atomic():
+                references = sum(
+                    model.objects.filter(image=name).update(image=new_name)
+                    for model in MODELS
+                )
+                media.acquire(*[new_name] * references)
+                MediaFile.objects.filter(name=name).delete()
+            media.delete_file(name)
+            moved += 1
+        if moved:
+            invalidate_tags(ALL_TAG)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {moved}, не найдено на диске: {missing}'
+        ))
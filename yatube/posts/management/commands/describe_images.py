@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import describe
+from posts.models import ArchivedPost, Post
+
+BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры и заглушки картинок у существующих постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            total = self.describe(model, options['batch_size'])
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обновлено {total}'
+            )
+
+    def describe(self, model, batch_size):
+        queryset = model.objects.exclude(image='').filter(
+            image_width=None
+        ).order_by('pk').only('pk', 'image')
+        total = 0
+        last_pk = 0
+        while True:
+            posts = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not posts:
+                return total
+            described = []
+            for post in posts:
+                try:
+                    with post.image.open('rb') as file:
+                        width, height, placeholder = describe(file)
+                except OSError:
+                    continue
+                described.append(model(
+                    pk=post.pk, image_width=width, image_height=height,
+                    image_placeholder=placeholder
+                ))
+            model.objects.bulk_update(
+                described,
+                ('image_width', 'image_height', 'image_placeholder')
+            )
+            total += len(described)
+            last_pk = posts[-1].pk
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.duplicates import KINDS, backfill
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает MinHash-подписи существующих постов и комментариев '
+        'и собирает почти одинаковые тексты в кластеры'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', choices=sorted(KINDS), action='append',
+            help='Что индексировать; по умолчанию посты и комментарии'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for kind in options['kind'] or sorted(KINDS, reverse=True):
+            indexed, duplicates = backfill(kind, options['batch_size'])
+            self.stdout.write(
+                f'{kind}: подписей {indexed}, из них копий {duplicates}'
+            )
+        self.stdout.write(self.style.SUCCESS('Индекс копий обновлён'))
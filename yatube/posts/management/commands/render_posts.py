@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post, render_text
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Заполняет сохранённый HTML текста и анонса у существующих постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерисовать все посты, а не только незаполненные'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            total = self.render(model, options['batch_size'], options['all'])
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обновлено {total}'
+            )
+
+    def render(self, model, batch_size, render_all):
+        queryset = model.objects.order_by('pk')
+        if not render_all:
+            queryset = queryset.filter(text_html='')
+        total = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_pk)
+                .values_list('pk', 'text')[:batch_size]
+            )
+            if not rows:
+                return total
+            posts = []
+            for pk, text in rows:
+                text_html, excerpt_html = render_text(text)
+                posts.append(model(
+                    pk=pk, text_html=text_html, excerpt_html=excerpt_html
+                ))
+            model.objects.bulk_update(posts, ('text_html', 'excerpt_html'))
+            total += len(posts)
+            last_pk = rows[-1][0]
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from posts.warmup import warm, warm_paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кеши после деплоя: рендерит первые страницы главной, '
+        'крупные группы и популярные профили и создаёт их миниатюры'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько первых страниц главной прогреть'
+        )
+        parser.add_argument(
+            '--groups', type=int, default=10,
+            help='Сколько групп с наибольшим числом постов прогреть'
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=10,
+            help='Сколько профилей с наибольшим числом подписчиков прогреть'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число одновременных запросов'
+        )
+        parser.add_argument(
+            '--base-url', default=None,
+            help='Адрес работающего сайта; без него запросы идут прямо '
+                 'в приложение этого процесса'
+        )
+
+    def handle(self, *args, **options):
+        paths = warm_paths(
+            options['pages'], options['groups'], options['profiles']
+        )
+        result = warm(paths, options['workers'], options['base_url'])
+        self.stdout.write(
+            f'Страниц прогрето: {result.pages} '
+            f'(уже были в кеше: {result.cached}), '
+            f'новых миниатюр: {result.thumbnails}'
+        )
+        if result.failed:
+            self.stdout.write(self.style.WARNING(
+                f'Не удалось получить страниц: {result.failed}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрев занял {result.seconds:.2f} с'
+        ))
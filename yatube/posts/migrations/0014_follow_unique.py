@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+CONSTRAINT = models.UniqueConstraint(
+    fields=('user', 'author'), name='unique_follow'
+)
+
+
+def delete_duplicate_follows(apps, schema_editor):
+    # Модель давно объявляет unique_follow, а в миграциях его не было:
+    # в старых базах могли накопиться одинаковые подписки.
+    Follow = apps.get_model('posts', 'Follow')
+    keep = Follow.objects.values('user', 'author').annotate(first=Min('pk'))
+    Follow.objects.exclude(
+        pk__in=[row['first'] for row in keep]
+    ).delete()
+
+
+def add_constraint(apps, schema_editor):
+    # Базы, где 0010 уже создала ограничение, пропускаются.
+    Follow = apps.get_model('posts', 'Follow')
+    with schema_editor.connection.cursor() as cursor:
+        constraints = schema_editor.connection.introspection.get_constraints(
+            cursor, Follow._meta.db_table
+        )
+    if CONSTRAINT.name not in constraints:
+        schema_editor.add_constraint(Follow, CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_follows, migrations.RunPython.noop),
+        # Модель с ограничением нужна add_constraint: SQLite пересобирает
+        # таблицу по её описанию.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AddConstraint(
+                model_name='follow', constraint=CONSTRAINT
+            ),
+        ]),
+        # При откате ограничение остаётся: без дублей оно ничему не мешает.
+        migrations.RunPython(add_constraint, migrations.RunPython.noop),
+    ]
@@ -2,15 +2,34 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.constraints import UniqueConstraint
 from django.urls import reverse
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+from core.querycache import CachingManager
+
+from . import images
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 300
+
+# Ленты показывают сохранённый анонс, полный текст им не нужен
+LISTING_DEFERRED = ('text', 'text_html')
+
+
+def render_text(text):
+    """HTML полного текста и короткого анонса для хранения в посте."""
+    excerpt = Truncator(text).chars(EXCERPT_LENGTH)
+    return linebreaks(text, autoescape=True), linebreaks(excerpt, True)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
 
+    objects = CachingManager()
+
     def __str__(self):
         return self.title
 
@@ -45,10 +64,46 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
+    text_html = models.TextField(blank=True, editable=False)
+    excerpt_html = models.TextField(blank=True, editable=False)
+
+    is_archived = False
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.text_html, self.excerpt_html = render_text(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            update_fields = {*update_fields, 'text_html', 'excerpt_html'}
+        if update_fields is None or 'image' in update_fields:
+            self.describe_image()
+            if update_fields is not None:
+                update_fields = {
+                    *update_fields, 'image_width', 'image_height',
+                    'image_placeholder'
+                }
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def describe_image(self):
+        """Считает размеры и заглушку, если картинка сменилась."""
+        if not self.image:
+            self.image_width = self.image_height = None
+            self.image_placeholder = ''
+        elif (
+            self.image.name != getattr(self, '_initial_image', None)
+            or self.image_width is None
+        ):
+            self.image_width, self.image_height, self.image_placeholder = (
+                images.describe(self.image)
+            )
+
     def get_absolute_url(self):
         return reverse('posts:post_detail', args=[self.id])
 
@@ -104,3 +159,110 @@ class Follow(models.Model):
         constraints = [
             UniqueConstraint(fields=["user", "author"], name='unique_follow')
         ]
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из posts_post в архив по давности.
+
+    Первичный ключ сохраняется, поэтому старые ссылки продолжают работать.
+    """
+    text = models.TextField('Текст')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        verbose_name='Группа',
+        on_delete=models.SET_NULL,
+        related_name='archived_posts'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
+    text_html = models.TextField(blank=True, editable=False)
+    excerpt_html = models.TextField(blank=True, editable=False)
+    archived_at = models.DateTimeField('Дата архивации')
+
+    is_archived = True
+
+    def __str__(self):
+        return self.text[:15]
+
+    def get_absolute_url(self):
+        return reverse('posts:post_detail', args=[self.id])
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+
+class ArchivedComment(models.Model):
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата создания комментария')
+
+    def __str__(self):
+        return self.text
+
+    class Meta:
+        ordering = ('-created',)
+
+
+class TextSignature(models.Model):
+    """MinHash-подпись текста поста или комментария (posts.duplicates)."""
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = ((POST, 'Пост'), (COMMENT, 'Комментарий'))
+
+    kind = models.CharField('Тип', max_length=7, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField('id')
+    excerpt = models.CharField('Начало текста', max_length=200)
+    signature = models.BinaryField()
+    duplicate_of = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        verbose_name='Оригинал',
+        on_delete=models.SET_NULL,
+        related_name='copies'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.object_id}'
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_text_signature'
+            )
+        ]
+        verbose_name = 'Похожие тексты'
+        verbose_name_plural = 'Похожие тексты'
+
+
+class LshBucket(models.Model):
+    """Корзина LSH: хеш одной полосы подписи."""
+    signature = models.ForeignKey(
+        TextSignature,
+        on_delete=models.CASCADE,
+        related_name='buckets'
+    )
+    key = models.BigIntegerField(db_index=True)
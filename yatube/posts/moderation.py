@@ -0,0 +1,186 @@
+"""Массовые операции модерации.
+
+Каждая операция выполняется одним UPDATE/DELETE на таблицу без загрузки
+строк в Python. Сигналы при этом не отправляются, поэтому кеш страниц
+групп, счётчики ссылок на картинки и подписи posts.duplicates
+обновляются вручную.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from core import media
+from core.pagecache import ALL_TAG, invalidate_tags
+
+from . import group_cache
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Post, TextSignature
+)
+from .page_tags import author_tag, group_tag, post_tag
+
+DELETE_BATCH_SIZE = 500
+
+
+def _group_ids(posts):
+    return set(
+        posts.order_by().exclude(group_id=None)
+        .values_list('group_id', flat=True).distinct()
+    )
+
+
+def _invalidate_groups(group_ids):
+    for group_id in group_ids:
+        group_cache.invalidate_group_posts(group_id)
+    invalidate_tags(ALL_TAG)
+
+
+def _raw_delete(queryset):
+    return queryset.order_by()._raw_delete(queryset.db)
+
+
+def _forget_texts(kind, objects):
+    """Удаляет подписи posts.duplicates (с корзинами) для строк objects."""
+    TextSignature.objects.filter(
+        kind=kind, object_id__in=objects.order_by().values('pk')
+    ).delete()
+
+
+def regroup_posts(posts, group):
+    """Переносит посты в группу group (или убирает из групп при None)."""
+    group_ids = _group_ids(posts)
+    if group is not None:
+        group_ids.add(group.pk)
+    updated = posts.order_by().update(group=group)
+    _invalidate_groups(group_ids)
+    return updated
+
+
+def purge_comments(comments):
+    """Удаляет комментарии одним DELETE и сбрасывает страницы их постов."""
+    post_ids = set(
+        comments.order_by().values_list('post_id', flat=True).distinct()
+    )
+    with transaction.atomic():
+        _forget_texts(TextSignature.COMMENT, comments)
+        deleted = _raw_delete(comments)
+    transaction.on_commit(lambda: invalidate_tags(*(
+        post_tag(post_id) for post_id in post_ids
+    )))
+    return deleted
+
+
+def delete_user_content(author_ids):
+    """Удаляет все посты и комментарии авторов author_ids.
+
+    Архивные посты и комментарии авторов удаляются тоже. Возвращает пару
+    (число постов, число комментариев).
+    """
+    author_ids = list(author_ids)
+    posts = Post.objects.filter(author_id__in=author_ids)
+    archived_posts = ArchivedPost.objects.filter(author_id__in=author_ids)
+    group_ids = _group_ids(posts)
+    images = [
+        image
+        for queryset in (posts, archived_posts)
+        for image in queryset.order_by().exclude(image='')
+        .values_list('image', flat=True)
+    ]
+    comments = Comment.objects.filter(
+        Q(author_id__in=author_ids) | Q(post__author_id__in=author_ids)
+    )
+    posts_deleted = comments_deleted = 0
+    with transaction.atomic():
+        _forget_texts(TextSignature.COMMENT, comments)
+        _forget_texts(TextSignature.POST, posts)
+        for post_model, comment_model in (
+            (Post, Comment), (ArchivedPost, ArchivedComment)
+        ):
+            comments_deleted += _raw_delete(
+                comment_model.objects.filter(author_id__in=author_ids)
+            )
+            comments_deleted += _raw_delete(
+                comment_model.objects.filter(post__author_id__in=author_ids)
+            )
+            posts_deleted += _raw_delete(
+                post_model.objects.filter(author_id__in=author_ids)
+            )
+        media.release(*images)
+    _invalidate_groups(group_ids)
+    return posts_deleted, comments_deleted
+
+
+def _next_range(queryset, batch_size):
+    """Первый и последний pk следующей пачки или None."""
+    pks = list(
+        queryset.order_by('pk').values_list('pk', flat=True)[:batch_size]
+    )
+    return (pks[0], pks[-1]) if pks else None
+
+
+def delete_posts_batch(author_id, archived=False,
+                       batch_size=DELETE_BATCH_SIZE):
+    """Удаляет пачку постов автора с комментариями к ним.
+
+    Пачка - диапазон pk из не больше чем batch_size постов, удаляется
+    отдельной короткой транзакцией. Возвращает (число постов, число
+    комментариев); (0, 0) значит, что постов больше нет.
+    """
+    model, comment_model = (
+        (ArchivedPost, ArchivedComment) if archived else (Post, Comment)
+    )
+    posts = model.objects.filter(author_id=author_id)
+    bounds = _next_range(posts, batch_size)
+    if bounds is None:
+        return 0, 0
+    posts = posts.filter(pk__range=bounds)
+    group_ids = _group_ids(posts)
+    images = list(
+        posts.order_by().exclude(image='').values_list('image', flat=True)
+    )
+    comments = comment_model.objects.filter(post__in=posts.values('pk'))
+    with transaction.atomic():
+        if not archived:
+            _forget_texts(TextSignature.COMMENT, comments)
+            _forget_texts(TextSignature.POST, posts)
+        comments_deleted = _raw_delete(comments)
+        posts_deleted = _raw_delete(posts)
+        media.release(*images)
+    if not archived:
+        # Пачки удаления аккаунта идут сотнями: сбрасываем только
+        # страницы автора и его групп, а не весь кеш страниц (ALL_TAG).
+        for group_id in group_ids:
+            group_cache.invalidate_group_posts(group_id)
+        invalidate_tags(
+            author_tag(author_id),
+            *(group_tag(group_id) for group_id in group_ids)
+        )
+    return posts_deleted, comments_deleted
+
+
+def delete_comments_batch(author_id, archived=False,
+                          batch_size=DELETE_BATCH_SIZE):
+    """Удаляет пачку комментариев автора; возвращает их число."""
+    model = ArchivedComment if archived else Comment
+    comments = model.objects.filter(author_id=author_id)
+    bounds = _next_range(comments, batch_size)
+    if bounds is None:
+        return 0
+    comments = comments.filter(pk__range=bounds)
+    post_ids = set(
+        comments.order_by().values_list('post_id', flat=True).distinct()
+    )
+    with transaction.atomic():
+        if not archived:
+            _forget_texts(TextSignature.COMMENT, comments)
+        deleted = _raw_delete(comments)
+    if not archived:
+        invalidate_tags(*(post_tag(post_id) for post_id in post_ids))
+    return deleted
+
+
+def delete_follows_batch(user_id, batch_size=DELETE_BATCH_SIZE):
+    """Удаляет пачку подписок пользователя и на пользователя."""
+    follows = Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+    bounds = _next_range(follows, batch_size)
+    if bounds is None:
+        return 0
+    return _raw_delete(follows.filter(pk__range=bounds))
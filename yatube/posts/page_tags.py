@@ -0,0 +1,15 @@
+"""Теги страниц для core.pagecache."""
+
+INDEX_TAG = 'posts:index'
+
+
+def post_tag(post_id):
+    return f'post:{post_id}'
+
+
+def group_tag(group_id):
+    return f'group:{group_id}'
+
+
+def author_tag(author_id):
+    return f'author:{author_id}'
@@ -0,0 +1,53 @@
+"""Постраничный вывод лент с окном номеров страниц.
+
+Шаблон получает не все номера страниц (на главной их десятки тысяч),
+а первую, последнюю и несколько вокруг текущей; пропуски отмечены None.
+Число постов на странице задаёт вид, настройка POSTS_PER_PAGE может
+переопределить его по имени URL.
+"""
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+
+
+class WindowedPage(Page):
+    @property
+    def page_window(self):
+        return self.paginator.page_window(self.number)
+
+
+class WindowedPaginator(Paginator):
+    # Сколько номеров показывать по обе стороны от текущего и у краёв
+    on_each_side = 2
+    on_ends = 1
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+    def page_window(self, number):
+        """Номера страниц вокруг number и у краёв, None на месте пропуска."""
+        num_pages = self.num_pages
+        start = max(number - self.on_each_side, 1)
+        end = min(number + self.on_each_side, num_pages)
+        # Пропуск в одну страницу не короче самого номера: показываем её.
+        if start <= self.on_ends + 2:
+            start = 1
+        if end >= num_pages - self.on_ends - 1:
+            end = num_pages
+        window = []
+        if start > 1:
+            window.extend(range(1, self.on_ends + 1))
+            window.append(None)
+        window.extend(range(start, end + 1))
+        if end < num_pages:
+            window.append(None)
+            window.extend(range(num_pages - self.on_ends + 1, num_pages + 1))
+        return window
+
+
+def paginate(request, object_list, per_page):
+    """Страница object_list по параметру page запроса."""
+    match = request.resolver_match
+    if match is not None:
+        per_page = settings.POSTS_PER_PAGE.get(match.view_name, per_page)
+    paginator = WindowedPaginator(object_list, per_page)
+    return paginator.get_page(request.GET.get('page'))
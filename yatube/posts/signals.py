@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core import media
+from core.pagecache import collect_tags, invalidate_tags
+
+from . import duplicates, group_cache, live
+from .models import ArchivedPost, Comment, Group, Post, TextSignature
+from .page_tags import INDEX_TAG, author_tag, group_tag, post_tag
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    instance._initial_group_id = instance.group_id
+    image = instance.__dict__.get('image')
+    instance._initial_image = getattr(image, 'name', image) or ''
+    if instance.pk is not None:
+        collect_tags(post_tag(instance.pk))
+        # author_id берём из __dict__: обращение к отложенному полю
+        # вызвало бы refresh_from_db и рекурсию через post_init.
+        author_id = instance.__dict__.get('author_id')
+        if author_id is not None:
+            collect_tags(author_tag(author_id))
+        if instance.group_id is not None:
+            collect_tags(group_tag(instance.group_id))
+
+
+@receiver(post_save, sender=Post)
+def update_caches_on_save(sender, instance, created, **kwargs):
+    tags = {post_tag(instance.pk)}
+    if created:
+        tags.update((INDEX_TAG, author_tag(instance.author_id)))
+    old_group_id = None if created else instance._initial_group_id
+    if old_group_id != instance.group_id:
+        if old_group_id is not None:
+            group_cache.remove_group_post(old_group_id, instance)
+            tags.add(group_tag(old_group_id))
+        if instance.group_id is not None:
+            group_cache.add_group_post(instance.group_id, instance)
+            tags.add(group_tag(instance.group_id))
+    instance._initial_group_id = instance.group_id
+    invalidate_tags(*tags)
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, created, **kwargs):
+    old_image = '' if created else instance._initial_image
+    new_image = instance.image.name or ''
+    if new_image != old_image:
+        media.acquire(new_image)
+        media.release(old_image)
+    instance._initial_image = new_image
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_image(sender, instance, **kwargs):
+    media.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: live.publish_new_post(instance))
+
+
+@receiver(post_delete, sender=Post)
+def update_group_posts_on_delete(sender, instance, **kwargs):
+    tags = [
+        INDEX_TAG, post_tag(instance.pk), author_tag(instance.author_id)
+    ]
+    if instance.group_id is not None:
+        group_cache.remove_group_post(instance.group_id, instance)
+        tags.append(group_tag(instance.group_id))
+    invalidate_tags(*tags)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def index_text_signature(sender, instance, update_fields=None, **kwargs):
+    text = instance.__dict__.get('text')
+    if text is None or (update_fields and 'text' not in update_fields):
+        return
+    kind = TextSignature.POST if sender is Post else TextSignature.COMMENT
+    duplicates.index_text(kind, instance.pk, text)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def forget_text_signature(sender, instance, **kwargs):
+    kind = TextSignature.POST if sender is Post else TextSignature.COMMENT
+    duplicates.forget(kind, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_post_page(sender, instance, **kwargs):
+    if instance.post_id is not None:
+        invalidate_tags(post_tag(instance.post_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_pages(sender, instance, **kwargs):
+    invalidate_tags(author_tag(instance.pk))
+
+
+@receiver(post_init, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    instance._initial_slug = instance.slug
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cache(sender, instance, **kwargs):
+    group_cache.invalidate_group(instance._initial_slug)
+    group_cache.invalidate_group(instance.slug)
+    instance._initial_slug = instance.slug
+    group_cache.invalidate_group_posts(instance.pk)
+    invalidate_tags(group_tag(instance.pk))
@@ -0,0 +1,213 @@
+"""Карта сайта для поисковиков, порезанная на части по диапазонам id.
+
+Каждый раздел (посты, архив, профили, группы) делится на куски по
+SITEMAP_CHUNK_SIZE первичных ключей: кусок n покрывает id из
+(n * size, (n + 1) * size]. Файлы пишутся на диск в SITEMAP_ROOT потоком
+из values_list(...).iterator(), объекты моделей не создаются.
+
+Для каждого куска один GROUP BY на раздел даёт подпись (число строк,
+наибольший id). Подпись хранится в манифесте рядом с файлами, и файл
+переписывается, только если она изменилась: новые посты трогают лишь
+последний кусок, удаления и архивация - те куски, где они случились.
+Переименование пользователя или группы подпись не меняет, такие куски
+обновляет build_sitemaps --force.
+"""
+import json
+import os
+from collections import namedtuple
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, Max
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import ArchivedPost, Group, Post
+
+User = get_user_model()
+
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+CHECK_KEY = 'sitemaps:checked'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+XML_PROLOG = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+Section = namedtuple('Section', 'queryset fields url_name')
+
+
+class SectionConverter:
+    regex = 'posts|archive|profiles|groups'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+def sections():
+    return {
+        'posts': Section(
+            Post.objects.filter(author__is_active=True), ('pk', 'pub_date'),
+            'posts:post_detail'
+        ),
+        'archive': Section(
+            ArchivedPost.objects.filter(author__is_active=True),
+            ('pk', 'pub_date'),
+            'posts:post_detail'
+        ),
+        'profiles': Section(
+            User.objects.filter(is_active=True), ('username',),
+            'posts:profile'
+        ),
+        'groups': Section(Group.objects.all(), ('slug',), 'posts:group_list'),
+    }
+
+
+def chunk_name(section, number):
+    return f'sitemap-{section}-{number}.xml'
+
+
+def sitemap_path(name):
+    return os.path.join(settings.SITEMAP_ROOT, name)
+
+
+def chunk_signatures(queryset, size):
+    """{номер куска: [число строк, наибольший id]} одним запросом."""
+    rows = (
+        queryset.annotate(chunk=(F('pk') - 1) / size)
+        .values('chunk')
+        .annotate(rows=Count('pk'), last=Max('pk'))
+        .order_by('chunk')
+    )
+    return {row['chunk']: [row['rows'], row['last']] for row in rows}
+
+
+def url_entries(section, number, size):
+    """Строки <url> одного куска, прочитанные потоком."""
+    rows = (
+        section.queryset.filter(
+            pk__gt=number * size, pk__lte=(number + 1) * size
+        )
+        .order_by('pk')
+        .values_list(*section.fields)
+        .iterator()
+    )
+    base_url = settings.SITEMAP_BASE_URL.rstrip('/')
+    for row in rows:
+        loc = escape(base_url + reverse(section.url_name, args=[row[0]]))
+        if len(row) > 1:
+            lastmod = row[1].date().isoformat()
+            yield (
+                f'<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod>'
+                '</url>\n'
+            )
+        else:
+            yield f'<url><loc>{loc}</loc></url>\n'
+
+
+def write_atomic(name, lines, prolog=XML_PROLOG):
+    """Пишет файл рядом с прежним и подменяет его одним rename."""
+    path = sitemap_path(name)
+    temporary = f'{path}.tmp.{os.getpid()}'
+    with open(temporary, 'w', encoding='utf-8') as output:
+        output.write(prolog)
+        output.writelines(lines)
+    os.replace(temporary, path)
+
+
+def read_manifest():
+    try:
+        with open(sitemap_path(MANIFEST_NAME), encoding='utf-8') as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_index(manifest):
+    base_url = settings.SITEMAP_BASE_URL.rstrip('/')
+    lines = [f'<sitemapindex xmlns="{XMLNS}">\n']
+    for name in sorted(manifest):
+        loc = escape(base_url + reverse('posts:sitemap_section', args=[
+            *manifest[name]['key']
+        ]))
+        lastmod = manifest[name]['generated']
+        lines.append(
+            f'<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod>'
+            '</sitemap>\n'
+        )
+    lines.append('</sitemapindex>\n')
+    write_atomic(INDEX_NAME, lines)
+
+
+def build_sitemaps(force=False):
+    """Переписывает изменившиеся куски и индекс.
+
+    Возвращает число переписанных и удалённых файлов кусков.
+    """
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    size = settings.SITEMAP_CHUNK_SIZE
+    old = read_manifest()
+    manifest = {}
+    written = removed = 0
+    for key, section in sections().items():
+        signatures = chunk_signatures(section.queryset, size)
+        for number, signature in signatures.items():
+            name = chunk_name(key, number)
+            entry = old.get(name)
+            if (
+                not force
+                and entry is not None
+                and entry['signature'] == signature
+                and os.path.exists(sitemap_path(name))
+            ):
+                manifest[name] = entry
+                continue
+            write_atomic(name, chain(
+                [f'<urlset xmlns="{XMLNS}">\n'],
+                url_entries(section, number, size),
+                ['</urlset>\n'],
+            ))
+            manifest[name] = {
+                'key': [key, number],
+                'signature': signature,
+                'generated': timezone.now().isoformat(timespec='seconds'),
+            }
+            written += 1
+    for name in set(old) - set(manifest):
+        try:
+            os.remove(sitemap_path(name))
+        except FileNotFoundError:
+            pass
+        removed += 1
+    if written or removed or not os.path.exists(sitemap_path(INDEX_NAME)):
+        write_index(manifest)
+        write_atomic(MANIFEST_NAME, [json.dumps(manifest)], prolog='')
+    return written, removed
+
+
+def ensure_fresh():
+    """Сверяет подписи не чаще раза в SITEMAP_CHECK_INTERVAL секунд."""
+    if cache.add(CHECK_KEY, True, settings.SITEMAP_CHECK_INTERVAL):
+        build_sitemaps()
+
+
+def sitemap_response(request, name):
+    """Отдаёт готовый файл с Last-Modified по времени его записи."""
+    try:
+        last_modified = int(os.stat(sitemap_path(name)).st_mtime)
+    except FileNotFoundError:
+        raise Http404('Такой части карты сайта нет')
+    response = get_conditional_response(request, last_modified=last_modified)
+    if response is None:
+        response = FileResponse(
+            open(sitemap_path(name), 'rb'), content_type='application/xml'
+        )
+    response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,139 @@
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import fts
+from posts.tasks import analyze_tables
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, Post
+)
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Спам про дешёвые часы'
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.admin,
+            text='Обычный пост'
+        )
+        Comment.objects.create(
+            post=cls.other_post, author=cls.user, text='Спам'
+        )
+        Comment.objects.create(
+            post=cls.other_post, author=cls.admin, text='Ответ'
+        )
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        self.changelist = reverse('admin:posts_post_changelist')
+
+    def tearDown(self):
+        cache.clear()
+
+    def run_action(self, action, posts, **extra):
+        data = {
+            'action': action,
+            ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+            **extra
+        }
+        return self.admin_client.post(self.changelist, data)
+
+    def test_move_to_group(self):
+        """Действие переносит выбранные посты в группу одним UPDATE"""
+        self.run_action(
+            'move_to_group',
+            [self.post, self.other_post],
+            group=self.group.pk
+        )
+        self.assertEqual(
+            Post.objects.filter(group=self.group).count(), 2
+        )
+
+    def test_delete_authors_content(self):
+        """Действие удаляет все посты и комментарии автора"""
+        self.run_action('delete_authors_content', [self.post])
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertFalse(Comment.objects.filter(author=self.user).exists())
+        self.assertTrue(Post.objects.filter(pk=self.other_post.pk).exists())
+
+    def test_delete_authors_content_includes_archive(self):
+        """Действие удаляет и архивные посты и комментарии автора"""
+        archived = ArchivedPost.objects.create(
+            author=self.user, text='Архивный спам',
+            pub_date=timezone.now(), archived_at=timezone.now()
+        )
+        ArchivedComment.objects.create(
+            post=archived, author=self.admin, text='Ответ',
+            created=timezone.now()
+        )
+        other_archived = ArchivedPost.objects.create(
+            author=self.admin, text='Архивный пост',
+            pub_date=timezone.now(), archived_at=timezone.now()
+        )
+        ArchivedComment.objects.create(
+            post=other_archived, author=self.user, text='Спам',
+            created=timezone.now()
+        )
+        self.run_action('delete_authors_content', [self.post])
+        self.assertFalse(ArchivedPost.objects.filter(pk=archived.pk).exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertTrue(
+            ArchivedPost.objects.filter(pk=other_archived.pk).exists()
+        )
+
+    def test_purge_comments(self):
+        """Действие удаляет комментарии выбранных постов"""
+        self.run_action('purge_comments', [self.other_post])
+        self.assertFalse(
+            Comment.objects.filter(post=self.other_post).exists()
+        )
+
+    def test_changelist_full_text_search(self):
+        """Поиск в админке находит посты по полнотекстовому индексу"""
+        response = self.admin_client.get(self.changelist, {'q': 'деш'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post]
+        )
+
+    def test_search_index_restored_after_migrate(self):
+        """post_migrate возвращает триггеры, пропавшие при миграции"""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER posts_post_fts_ai')
+        post = Post.objects.create(author=self.user, text='Редкий кактус')
+        fts.ensure_installed(sender=None, using='default')
+        self.assertTrue(fts.is_installed(connection))
+        response = self.admin_client.get(self.changelist, {'q': 'кактус'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+    def test_changelist_count_from_statistics(self):
+        """Число постов в списке берётся из ANALYZE, а не из MAX(pk)"""
+        gap = Post.objects.create(author=self.user, text='Удалённый пост')
+        Post.objects.create(author=self.user, text='Последний пост')
+        gap.delete()
+        response = self.admin_client.get(self.changelist)
+        self.assertEqual(response.context['cl'].result_count, 3)
+        analyze_tables()
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.admin_client.get(self.changelist)
+        self.assertEqual(response.context['cl'].result_count, 3)
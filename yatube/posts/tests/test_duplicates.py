@@ -0,0 +1,171 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import duplicates, moderation
+from posts.models import Comment, LshBucket, Post, TextSignature
+
+User = get_user_model()
+
+SPAM = (
+    'Лучшие часы со скидкой девяносто процентов только сегодня, '
+    'пишите в личные сообщения и забирайте подарок'
+)
+SPAM_COPY = SPAM.replace('сегодня', 'сейчас').upper() + '!!!'
+OTHER = (
+    'Сегодня гуляли по набережной, смотрели на закат и обсуждали, '
+    'куда поехать следующим летом'
+)
+
+
+class DuplicateDetectionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_signature(self, kind, obj):
+        return TextSignature.objects.get(kind=kind, object_id=obj.pk)
+
+    def test_near_copy_joins_cluster(self):
+        """Почти точная копия попадает в кластер оригинала."""
+        original = Post.objects.create(author=self.user, text=SPAM)
+        copy = Post.objects.create(author=self.user, text=SPAM_COPY)
+        other = Post.objects.create(author=self.user, text=OTHER)
+        comment = Comment.objects.create(
+            post=other, author=self.user, text=SPAM
+        )
+        root = self.get_signature(TextSignature.POST, original)
+        self.assertIsNone(root.duplicate_of)
+        self.assertEqual(
+            self.get_signature(TextSignature.POST, copy).duplicate_of, root
+        )
+        self.assertEqual(
+            self.get_signature(TextSignature.COMMENT, comment).duplicate_of,
+            root
+        )
+        self.assertIsNone(
+            self.get_signature(TextSignature.POST, other).duplicate_of
+        )
+        self.assertEqual(
+            root.buckets.count(), duplicates.BANDS
+        )
+
+    def test_short_and_deleted_texts_are_not_indexed(self):
+        """Короткие и удалённые тексты не остаются в индексе."""
+        short = Post.objects.create(author=self.user, text='Спасибо!')
+        post = Post.objects.create(author=self.user, text=OTHER)
+        post.delete()
+        self.assertFalse(TextSignature.objects.filter(
+            object_id__in=[short.pk, post.pk]
+        ).exists())
+
+    def test_edit_does_not_match_itself(self):
+        """Пост при редактировании не считается копией самого себя."""
+        post = Post.objects.create(author=self.user, text=SPAM)
+        post.text = SPAM + ' Звоните.'
+        post.save()
+        self.assertIsNone(
+            self.get_signature(TextSignature.POST, post).duplicate_of
+        )
+
+    def test_resaved_original_stays_root(self):
+        """Пересохранённый оригинал не становится копией своей копии."""
+        original = Post.objects.create(author=self.user, text=SPAM)
+        Post.objects.create(author=self.user, text=SPAM_COPY)
+        original.text = SPAM + ' Звоните.'
+        original.save()
+        self.assertIsNone(
+            self.get_signature(TextSignature.POST, original).duplicate_of
+        )
+        self.assertFalse(duplicates.is_duplicate(
+            original.text, TextSignature.POST, original.pk
+        ))
+
+    def test_unchanged_text_is_not_reindexed(self):
+        """Сохранение без изменения текста не перестраивает корзины."""
+        post = Post.objects.create(author=self.user, text=SPAM)
+        with self.assertNumQueries(1):
+            duplicates.index_text(TextSignature.POST, post.pk, SPAM)
+
+    def test_bulk_moderation_forgets_texts(self):
+        """Массовое удаление убирает подписи и корзины удалённых текстов."""
+        other = User.objects.create_user(username='OtherUser')
+        post = Post.objects.create(author=other, text=OTHER)
+        Comment.objects.create(post=post, author=self.user, text=SPAM)
+        moderation.purge_comments(Comment.objects.filter(post=post))
+        self.assertFalse(TextSignature.objects.filter(
+            kind=TextSignature.COMMENT
+        ).exists())
+        Post.objects.create(author=self.user, text=SPAM)
+        Comment.objects.create(post=post, author=self.user, text=SPAM_COPY)
+        moderation.delete_user_content([self.user.pk])
+        self.assertEqual(
+            list(TextSignature.objects.values_list('kind', 'object_id')),
+            [(TextSignature.POST, post.pk)]
+        )
+        self.assertEqual(LshBucket.objects.count(), duplicates.BANDS)
+
+    @override_settings(DUPLICATE_ACTION='reject')
+    def test_reject_mode(self):
+        """В режиме reject форма не принимает копию."""
+        post = Post.objects.create(author=self.user, text=SPAM)
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': SPAM_COPY}
+        )
+        self.assertFormError(
+            response, 'form', 'text', 'Почти такой же текст уже публиковался'
+        )
+        self.assertEqual(Post.objects.count(), 1)
+        response = self.authorized_client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': SPAM_COPY}
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_backfill_command(self):
+        """index_duplicates восстанавливает индекс для старых текстов."""
+        Post.objects.create(author=self.user, text=SPAM)
+        Post.objects.create(author=self.user, text=SPAM_COPY)
+        TextSignature.objects.all().delete()
+        out = StringIO()
+        call_command('index_duplicates', batch_size=1, stdout=out)
+        self.assertIn('post: подписей 2, из них копий 1', out.getvalue())
+
+    def test_admin_lists_clusters(self):
+        """Админка показывает кластер и его копии."""
+        Post.objects.create(author=self.user, text=SPAM)
+        Post.objects.create(author=self.user, text=SPAM_COPY)
+        Post.objects.create(author=self.user, text=OTHER)
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:posts_textsignature_changelist')
+        response = client.get(url)
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+        root = response.context['cl'].result_list[0]
+        response = client.get(url, {'duplicate_of__id__exact': root.pk})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+    def test_numpy_matches_python(self):
+        """Матричный расчёт подписей совпадает с поэлементным."""
+        hash_lists = [duplicates.shingle_hashes(text) for text in (
+            SPAM, OTHER, SPAM_COPY
+        )]
+        expected = [duplicates._minhash(hashes) for hashes in hash_lists]
+        self.assertEqual(
+            duplicates._minhash_batch_numpy(hash_lists), expected
+        )
+        # Пачка, разбитая на куски по одному-два текста, даёт то же.
+        with mock.patch.object(duplicates, 'NUMPY_CHUNK', len(hash_lists[0])):
+            self.assertEqual(
+                duplicates._minhash_batch_numpy(hash_lists), expected
+            )
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.group_post = Post.objects.create(
+            author=cls.user, text='Пост в группе', group=cls.group
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user, text='Пост без группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_body(self, response):
+        if response.streaming:
+            return b''.join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def test_feeds_list_posts_of_their_scope(self):
+        """Ленты главной, группы и автора содержат свои посты"""
+        feeds = (
+            (reverse('posts:index_feed', args=['atom']),
+             ('Пост в группе', 'Пост без группы'), ()),
+            (reverse('posts:group_feed', args=[self.group.slug, 'rss']),
+             ('Пост в группе',), ('Пост без группы',)),
+            (reverse('posts:profile_feed', args=[self.user.username, 'atom']),
+             ('Пост в группе', 'Пост без группы'), ()),
+        )
+        for url, present, absent in feeds:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                body = self.get_body(response)
+                for text in present:
+                    self.assertIn(text, body)
+                for text in absent:
+                    self.assertNotIn(text, body)
+
+    def test_feed_types(self):
+        """Atom и RSS отдаются со своими типами"""
+        for feed_type, root in (('atom', '<feed'), ('rss', '<rss')):
+            with self.subTest(feed_type=feed_type):
+                response = self.guest_client.get(
+                    reverse('posts:index_feed', args=[feed_type])
+                )
+                self.assertIn(feed_type, response['Content-Type'])
+                self.assertIn(root, self.get_body(response))
+
+    def test_unchanged_feed_returns_304(self):
+        """Повторный опрос без новых постов получает 304"""
+        url = reverse('posts:index_feed', args=['atom'])
+        response = self.guest_client.get(url)
+        self.get_body(response)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_body_cached_until_next_post(self):
+        """Тело ленты берётся из кеша до появления нового поста"""
+        url = reverse('posts:group_feed', args=[self.group.slug, 'atom'])
+        first = self.guest_client.get(url)
+        self.get_body(first)
+        with self.assertNumQueries(1):
+            second = self.guest_client.get(url)
+        self.assertFalse(second.streaming)
+        Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group
+        )
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertIn('Новый пост', self.get_body(response))
+
+    def test_unknown_group_feed_is_404(self):
+        """Лента несуществующей группы отдаёт 404"""
+        response = self.guest_client.get(
+            reverse('posts:group_feed', args=['missing', 'rss'])
+        )
+        self.assertEqual(response.status_code, 404)
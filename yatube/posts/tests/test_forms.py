@@ -77,7 +77,9 @@ class PostFormTests(TestCase):
         self.assertEqual(post.author, self.user)
         self.assertEqual(post.group, self.group)
         self.assertEqual(post.text, form_data['text'])
-        self.assertTrue(Post.objects.filter(image='posts/small.gif').exists())
+        self.assertTrue(
+            Post.objects.filter(image=self.post.image.name).exists()
+        )
 
     def test_create_post_unauthorized(self):
         """Неавторизованный пользователь не может создать пост"""
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import group_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GroupPostsCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_post_is_added_to_cached_list(self):
+        """Новый пост попадает в закешированный список без перечитывания"""
+        group_cache.get_group_posts_state(self.group.pk)
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        with self.assertNumQueries(0):
+            state = group_cache.get_group_posts_state(self.group.pk)
+        self.assertEqual(state['count'], 1)
+
+    def test_concurrent_edit_resets_list(self):
+        """Если список правит другой процесс, он сбрасывается"""
+        group_cache.get_group_posts_state(self.group.pk)
+        cache.add(group_cache.GROUP_POSTS_LOCK_KEY.format(self.group.pk), 1)
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        state = group_cache.get_group_posts_state(self.group.pk)
+        self.assertEqual(state['count'], 1)
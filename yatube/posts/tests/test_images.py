@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def make_image(name='photo.png', size=(300, 200)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 80, 20)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_upload_stores_dimensions_and_placeholder(self):
+        """При загрузке картинки сохраняются размеры и заглушка"""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': make_image()}
+        )
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (300, 200))
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+        self.assertLess(len(post.image_placeholder), 1000)
+
+    def test_image_change_and_removal(self):
+        """Новая картинка пересчитывается, без картинки поля пустые"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=make_image()
+        )
+        post.image = make_image('wide.png', (640, 100))
+        post.save(update_fields=['image'])
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (640, 100))
+        post.image = ''
+        post.save()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_templates_render_dimensions_and_lazy_loading(self):
+        """Ленты грузят картинки лениво, у всех есть размеры и заглушка"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=make_image()
+        )
+        index = self.authorized_client.get(reverse('posts:index'))
+        detail = self.authorized_client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        for response in (index, detail):
+            self.assertContains(response, 'width="300" height="200"')
+            self.assertContains(response, post.image_placeholder)
+        self.assertContains(index, 'loading="lazy"')
+        self.assertNotContains(detail, 'loading="lazy"')
+
+    def test_describe_images_command(self):
+        """describe_images заполняет поля у старых постов"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=make_image()
+        )
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None, image_placeholder=''
+        )
+        out = StringIO()
+        call_command('describe_images', stdout=out)
+        self.assertIn('обновлено 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.image_width, 300)
+        self.assertTrue(post.image_placeholder)
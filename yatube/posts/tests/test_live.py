@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import live
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class LiveEventsTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='TestAuthor')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+
+    def listen(self, query_string, action, headers=()):
+        """Открывает поток событий, выполняет action в другом потоке
+        и возвращает всё, что получил клиент до отключения."""
+        scope = {
+            'type': 'http',
+            'path': live.EVENTS_PATH,
+            'query_string': query_string,
+            'headers': list(headers),
+        }
+        chunks = []
+
+        async def run():
+            disconnected = asyncio.Event()
+            started = asyncio.Event()
+
+            async def receive():
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                chunks.append(message)
+                if message['type'] == 'http.response.start':
+                    started.set()
+                if message.get('body', b'').startswith(b'event'):
+                    disconnected.set()
+
+            async def act():
+                await started.wait()
+                thread = threading.Thread(target=action)
+                thread.start()
+                await asyncio.get_running_loop().run_in_executor(
+                    None, thread.join
+                )
+                await asyncio.sleep(0.1)
+                disconnected.set()
+
+            await asyncio.gather(live.feed_events(scope, receive, send), act())
+
+        asyncio.run(run())
+        return chunks
+
+    def create_post(self, group=None):
+        Post.objects.create(
+            author=self.author, text='Тестовый пост', group=group
+        )
+
+    def test_index_stream_gets_new_post(self):
+        """Клиент общей ленты получает уведомление о новом посте"""
+        chunks = self.listen(b'scope=index', self.create_post)
+        self.assertEqual(chunks[0]['status'], 200)
+        self.assertEqual(
+            chunks[-1]['body'],
+            b'event: new-posts\ndata: {"count": 1}\n\n'
+        )
+
+    def test_group_stream_ignores_other_groups(self):
+        """Клиент группы не получает уведомлений о постах вне группы"""
+        chunks = self.listen(b'scope=group&slug=test-slug', self.create_post)
+        self.assertFalse(
+            any(chunk.get('body', b'').startswith(b'event')
+                for chunk in chunks)
+        )
+
+    def test_follow_stream_requires_login(self):
+        """Лента подписок без сессии недоступна"""
+        chunks = self.listen(b'scope=follow', lambda: None)
+        self.assertEqual(chunks[0]['status'], 404)
+
+    def test_follow_stream_gets_followed_author_post(self):
+        """Подписчик получает уведомление о посте автора"""
+        user = User.objects.create_user(username='TestUser')
+        Follow.objects.create(user=user, author=self.author)
+        self.client.force_login(user)
+        cookie = f'sessionid={self.client.session.session_key}'.encode()
+        chunks = self.listen(
+            b'scope=follow', self.create_post, headers=[(b'cookie', cookie)]
+        )
+        self.assertEqual(
+            chunks[-1]['body'],
+            b'event: new-posts\ndata: {"count": 1}\n\n'
+        )
+
+    def test_pages_connect_only_when_enabled(self):
+        """Страницы подключаются к потоку событий, только если он включён"""
+        cache.clear()
+        url = reverse('posts:index')
+        self.assertNotContains(Client().get(url), 'EventSource')
+        cache.clear()
+        with override_settings(LIVE_EVENTS=True):
+            self.assertContains(Client().get(url), live.EVENTS_PATH)
+        cache.clear()
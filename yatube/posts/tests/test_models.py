@@ -1,4 +1,7 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
 from ..models import Group, Post
@@ -55,3 +58,24 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     self.post._meta.get_field(value).help_text, expected
                 )
+
+    def test_rendered_text_stored_on_save(self):
+        """При сохранении пост получает готовый HTML и анонс."""
+        post = Post.objects.create(
+            author=self.user,
+            text='<b>Первый абзац</b>\n\n' + 'слово ' * 100,
+        )
+        self.assertTrue(
+            post.text_html.startswith('<p>&lt;b&gt;Первый абзац')
+        )
+        self.assertLess(len(post.excerpt_html), len(post.text_html))
+        self.assertIn('…', post.excerpt_html)
+
+    def test_render_posts_backfills_bulk_created_posts(self):
+        """Команда render_posts заполняет HTML у постов без него."""
+        Post.objects.bulk_create([Post(author=self.user, text='Без HTML')])
+        call_command('render_posts', stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertEqual(
+            Post.objects.get(text='Без HTML').excerpt_html, '<p>Без HTML</p>'
+        )
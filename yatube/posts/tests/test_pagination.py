@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.pagination import WindowedPaginator
+
+User = get_user_model()
+
+
+class PageWindowTests(SimpleTestCase):
+    def window(self, number, num_pages):
+        paginator = WindowedPaginator(range(num_pages), 1)
+        return paginator.page_window(number)
+
+    def test_window_around_current_page(self):
+        """Окно: края, соседи текущей страницы и пропуски между ними"""
+        self.assertEqual(
+            self.window(50, 100000),
+            [1, None, 48, 49, 50, 51, 52, None, 100000]
+        )
+        self.assertEqual(self.window(1, 100), [1, 2, 3, None, 100])
+        self.assertEqual(self.window(100, 100), [1, None, 98, 99, 100])
+
+    def test_short_gaps_are_not_elided(self):
+        """Пропуск в одну страницу заменяется самой страницей"""
+        self.assertEqual(self.window(4, 9), [1, 2, 3, 4, 5, 6, None, 9])
+        self.assertEqual(self.window(3, 6), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(self.window(1, 1), [1])
+
+
+class PaginationViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Тестовый пост {i}')
+            for i in range(60)
+        ])
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(POSTS_PER_PAGE={'posts:index': 2})
+    def test_page_size_per_view_and_window(self):
+        """Размер страницы задаётся по имени URL, ссылок немного"""
+        response = self.guest_client.get(reverse('posts:index'), {'page': 15})
+        self.assertEqual(len(response.context['page_obj'].object_list), 2)
+        self.assertEqual(response.content.decode().count('?page='), 8)
+        self.assertContains(response, '?page=30"')
+        profile = self.guest_client.get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        self.assertEqual(len(profile.context['page_obj'].object_list), 10)
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import sitemaps
+from posts.models import Group, Post
+
+User = get_user_model()
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT,
+    SITEMAP_CHUNK_SIZE=2,
+    SITEMAP_BASE_URL='http://testserver',
+)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(5)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        cache.clear()
+        self.guest_client = Client()
+
+    def read(self, name):
+        with open(sitemaps.sitemap_path(name), encoding='utf-8') as file:
+            return file.read()
+
+    def post_chunk(self, post):
+        return sitemaps.chunk_name('posts', (post.pk - 1) // 2)
+
+    def test_chunks_cover_all_urls(self):
+        """Куски вместе содержат все посты, профили и группы."""
+        sitemaps.build_sitemaps()
+        index = self.read(sitemaps.INDEX_NAME)
+        names = [
+            name for name in os.listdir(TEMP_SITEMAP_ROOT)
+            if name.startswith('sitemap-')
+        ]
+        body = ''.join(self.read(name) for name in names)
+        for post in self.posts:
+            self.assertIn(
+                reverse('posts:post_detail', args=[post.pk]) + '<', body
+            )
+        self.assertIn(reverse('posts:profile', args=['TestUser']), body)
+        self.assertIn(reverse('posts:group_list', args=['test-slug']), body)
+        for name in names:
+            self.assertIn(f'http://testserver/{name}', index)
+        self.assertEqual(
+            len({self.post_chunk(post) for post in self.posts}),
+            len([name for name in names if '-posts-' in name])
+        )
+
+    def test_only_changed_chunk_is_rewritten(self):
+        """Новый пост переписывает только кусок со своим id."""
+        sitemaps.build_sitemaps()
+        self.assertEqual(sitemaps.build_sitemaps(), (0, 0))
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(sitemaps.build_sitemaps(), (1, 0))
+        self.assertIn(
+            reverse('posts:post_detail', args=[post.pk]),
+            self.read(self.post_chunk(post))
+        )
+        self.assertEqual(
+            sitemaps.build_sitemaps(force=True)[0],
+            len(sitemaps.read_manifest())
+        )
+
+    def test_emptied_chunk_is_removed(self):
+        """Кусок, из которого удалили все посты, пропадает из индекса."""
+        sitemaps.build_sitemaps()
+        name = self.post_chunk(self.posts[-1])
+        Post.objects.filter(
+            pk__in=[
+                post.pk for post in self.posts
+                if self.post_chunk(post) == name
+            ]
+        ).delete()
+        self.assertEqual(sitemaps.build_sitemaps(), (0, 1))
+        self.assertFalse(os.path.exists(sitemaps.sitemap_path(name)))
+        self.assertNotIn(name, self.read(sitemaps.INDEX_NAME))
+
+    def test_views_serve_files(self):
+        """Индекс и куски отдаются с Last-Modified и 304 на повтор."""
+        response = self.guest_client.get(reverse('posts:sitemap_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<sitemapindex', b''.join(response.streaming_content))
+        repeat = self.guest_client.get(
+            reverse('posts:sitemap_index'),
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(repeat.status_code, 304)
+        chunk = self.guest_client.get(
+            reverse('posts:sitemap_section', args=['groups', 0])
+        )
+        self.assertEqual(chunk.status_code, 200)
+        missing = self.guest_client.get(
+            reverse('posts:sitemap_section', args=['posts', 100])
+        )
+        self.assertEqual(missing.status_code, 404)
+
+    def test_command(self):
+        """build_sitemaps пишет индекс на диск."""
+        call_command('build_sitemaps', stdout=StringIO())
+        self.assertTrue(
+            os.path.exists(sitemaps.sitemap_path(sitemaps.INDEX_NAME))
+        )
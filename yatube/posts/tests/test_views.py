@@ -1,10 +1,17 @@
+from datetime import timedelta
+from io import StringIO
+
 from django.core.cache import cache
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
 
-from posts.models import Follow, Group, Post
+from posts.models import (
+    ArchivedPost, Comment, Follow, Group, Post, TextSignature
+)
 from posts.views import MAX_POSTS
 
 User = get_user_model()
@@ -53,6 +60,7 @@ class PostsViewsTests(TestCase):
         self.assertEqual(post_object.image, self.post.image)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -138,6 +146,9 @@ class PaginatorViewsTest(TestCase):
         )
         cls.guest_client = Client()
 
+    def setUp(self):
+        cache.clear()
+
     def test_pagination(self):
         """Паджинация корректно работает на всех страницах"""
         pages = (
@@ -153,6 +164,34 @@ class PaginatorViewsTest(TestCase):
                     )
 
 
+class TestListingExcerpts(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Длинный пост ' * 100
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_listings_show_excerpt_without_loading_text(self):
+        """Ленты выводят анонс и не читают полный текст из БД"""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                post = response.context['page_obj'][0]
+                self.assertEqual(
+                    post.get_deferred_fields(), {'text', 'text_html'}
+                )
+                self.assertContains(response, self.post.excerpt_html)
+
+
 class TestCache(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -177,18 +216,12 @@ class TestCache(TestCase):
         cache.clear()
 
     def test_index_cache(self):
-        """Проверка работы кеширования на главной странице"""
+        """Главная не отдаёт из кеша удалённый пост"""
         response_1 = self.authorized_client.get(reverse('posts:index'))
-        request_1 = response_1.content
-        post_info = Post.objects.get(id=1)
-        post_info.delete()
+        self.assertContains(response_1, 'Тестовый пост')
+        Post.objects.get(id=1).delete()
         response_2 = self.authorized_client.get(reverse('posts:index'))
-        request_2 = response_2.content
-        self.assertTrue(request_1 == request_2)
-        cache.clear()
-        response_3 = self.authorized_client.get(reverse('posts:index'))
-        request_3 = response_3.content
-        self.assertTrue(request_1 != request_3)
+        self.assertNotContains(response_2, 'Тестовый пост')
 
 
 class TestFollow(TestCase):
@@ -292,3 +325,161 @@ class TestFollow(TestCase):
         )
         count_follow_new_post = Follow.objects.filter(user=self.user_1).count()
         self.assertNotEqual(count_follow_new_post, count_follow + 1)
+
+
+class TestGroupCache(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            group=self.group
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def group_posts(self, group):
+        # Авторизованный клиент обходит кеш целых страниц.
+        response = self.authorized_client.get(
+            reverse('posts:group_list', kwargs={'slug': group.slug})
+        )
+        return list(response.context['page_obj'])
+
+    def test_warm_group_page_uses_one_query(self):
+        """Прогретая страница группы обходится одним запросом к БД"""
+        self.group_posts(self.group)
+        with self.assertNumQueries(1):
+            self.group_posts(self.group)
+
+    def test_new_post_appears_on_group_page(self):
+        """Новый пост сразу попадает в кеш страницы группы"""
+        self.group_posts(self.group)
+        new_post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост 2',
+            group=self.group
+        )
+        self.assertEqual(self.group_posts(self.group), [new_post, self.post])
+
+    def test_post_moves_between_groups(self):
+        """Перенос поста в другую группу обновляет кеш обеих групп"""
+        self.group_posts(self.group)
+        self.group_posts(self.other_group)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Тестовый пост', 'group': self.other_group.id}
+        )
+        self.assertEqual(self.group_posts(self.group), [])
+        self.assertEqual(self.group_posts(self.other_group), [self.post])
+
+    def test_deleted_post_leaves_group_page(self):
+        """Удалённый пост исчезает со страницы группы"""
+        self.group_posts(self.group)
+        self.post.delete()
+        self.assertEqual(self.group_posts(self.group), [])
+
+    def test_group_rename_invalidates_slug(self):
+        """Смена slug группы сбрасывает закешированный объект"""
+        self.group_posts(self.group)
+        old_slug = self.group.slug
+        self.group.slug = 'new-slug'
+        self.group.save()
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': old_slug})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.group.slug = old_slug
+        self.group.save()
+
+
+class TestArchive(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.old_post = Post.objects.create(
+            author=cls.user,
+            text='Старый пост'
+        )
+        Comment.objects.create(
+            post=cls.old_post, author=cls.user, text='Старый комментарий'
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=1000)
+        )
+        cls.new_post = Post.objects.create(
+            author=cls.user,
+            text='Новый пост'
+        )
+        call_command('archive_posts', stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_old_posts_moved_to_archive(self):
+        """Старые посты переносятся в архив вместе с комментариями"""
+        self.assertFalse(Post.objects.filter(pk=self.old_post.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.comments.count(), 1)
+        self.assertTrue(Post.objects.filter(pk=self.new_post.pk).exists())
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Страница архивного поста открывается по старому адресу"""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.old_post.pk})
+        )
+        self.assertEqual(response.context['post'].text, 'Старый пост')
+        self.assertEqual(len(response.context['comments']), 1)
+
+    def test_profile_lists_live_and_archived_posts(self):
+        """Профиль показывает сначала живые, затем архивные посты"""
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        texts = [post.text for post in response.context['page_obj']]
+        self.assertEqual(texts, ['Новый пост', 'Старый пост'])
+
+    def test_archive_drops_text_signatures(self):
+        """Архивация удаляет подписи перенесённых постов и комментариев"""
+        text = 'Достаточно длинный текст для поиска копий. ' * 10
+        post = Post.objects.create(author=self.user, text=text)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text=text
+        )
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=1000)
+        )
+        self.assertTrue(TextSignature.objects.filter(
+            kind=TextSignature.COMMENT, object_id=comment.pk
+        ).exists())
+        call_command('archive_posts', stdout=StringIO())
+        self.assertTrue(ArchivedPost.objects.filter(pk=post.pk).exists())
+        self.assertFalse(TextSignature.objects.filter(
+            kind=TextSignature.POST, object_id=post.pk
+        ).exists())
+        self.assertFalse(TextSignature.objects.filter(
+            kind=TextSignature.COMMENT, object_id=comment.pk
+        ).exists())
@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.warmup import warm_paths
+
+User = get_user_model()
+
+
+class WarmCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Author')
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.author)
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Group.objects.create(
+            title='Пустая группа', slug='empty', description='Описание'
+        )
+        Post.objects.create(
+            author=self.author, text='Тестовый пост', group=self.group
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_paths_cover_index_groups_and_profiles(self):
+        """Прогреваются главная, непустые группы и профили с подписчиками"""
+        self.assertEqual(warm_paths(pages=2), [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ])
+
+    def test_warmed_pages_are_served_from_cache(self):
+        """После warm_cache анонимный читатель получает страницы из кеша"""
+        out = StringIO()
+        call_command('warm_cache', pages=1, workers=2, stdout=out)
+        self.assertIn('Страниц прогрето: 3', out.getvalue())
+        for path in warm_paths(pages=1):
+            with self.subTest(path=path):
+                response = Client().get(path)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
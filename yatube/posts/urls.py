@@ -1,14 +1,36 @@
-from django.urls import path
+from django.urls import path, register_converter
 
 from . import views
+from .feeds import FeedTypeConverter
+from .sitemaps import SectionConverter
 
 app_name = 'posts'
 
+register_converter(FeedTypeConverter, 'feed')
+register_converter(SectionConverter, 'sitemap')
+
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('feed.<feed:feed_type>', views.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/feed.<feed:feed_type>',
+        views.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feed.<feed:feed_type>',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    path(
+        'sitemap-<sitemap:section>-<int:number>.xml',
+        views.sitemap_section,
+        name='sitemap_section'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
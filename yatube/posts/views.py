@@ -1,10 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 
+from core.pagecache import tag_page
+from core.querycache import cached
+
+from . import archive, feeds, group_cache, sitemaps
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post
+from .models import LISTING_DEFERRED, Follow, Post
+from .page_tags import INDEX_TAG, author_tag, group_tag, post_tag
+from .pagination import paginate
 
 
 User = get_user_model()
@@ -13,10 +20,11 @@ MAX_POSTS = 10
 
 
 def index(request):
-    post_list = Post.objects.select_related('group').all()
-    paginator = Paginator(post_list, MAX_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.filter(author__is_active=True).select_related(
+        'author', 'group'
+    ).defer(*LISTING_DEFERRED)
+    page_obj = paginate(request, post_list, MAX_POSTS)
+    tag_page(request, INDEX_TAG)
     context = {
         'page_obj': page_obj,
         'index': True
@@ -25,11 +33,10 @@ def index(request):
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.group_posts.all()
-    paginator = Paginator(post_list, MAX_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = group_cache.get_group(slug)
+    post_list = group_cache.GroupPostList(group)
+    page_obj = paginate(request, post_list, MAX_POSTS)
+    tag_page(request, group_tag(group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -38,11 +45,17 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, MAX_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = get_object_or_404(
+        cached(User.objects.all()), username=username, is_active=True
+    )
+    posts = archive.ChainedPostList(
+        author.posts.select_related('group').defer(*LISTING_DEFERRED),
+        author.archived_posts.select_related('group').defer(
+            *LISTING_DEFERRED
+        )
+    )
+    page_obj = paginate(request, posts, MAX_POSTS)
+    tag_page(request, author_tag(author.pk))
     following = None
     if request.user.username:
         following = (Follow.objects.filter(
@@ -56,12 +69,63 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = Comment.objects.select_related('author').filter(
-        post_id=post_id
+def index_feed(request, feed_type):
+    return feeds.feed_response(
+        request, 'index', Post.objects.filter(author__is_active=True),
+        feed_type, INDEX_TAG,
+        title='Yatube: последние записи',
+        link=reverse('posts:index'),
+        description='Последние обновления на сайте'
+    )
+
+
+def group_feed(request, slug, feed_type):
+    group = group_cache.get_group(slug)
+    return feeds.feed_response(
+        request, f'group-{group.pk}',
+        Post.objects.filter(group=group, author__is_active=True),
+        feed_type, group_tag(group.pk),
+        title=f'Yatube: {group.title}',
+        link=reverse('posts:group_list', args=[group.slug]),
+        description=group.description
+    )
+
+
+def profile_feed(request, username, feed_type):
+    author = get_object_or_404(
+        cached(User.objects.all()), username=username, is_active=True
     )
+    name = author.get_full_name() or author.username
+    return feeds.feed_response(
+        request, f'author-{author.pk}', author.posts.all(), feed_type,
+        author_tag(author.pk),
+        title=f'Yatube: {name}',
+        link=reverse('posts:profile', args=[author.username]),
+        description=f'Все посты пользователя {name}'
+    )
+
+
+def sitemap_index(request):
+    sitemaps.ensure_fresh()
+    return sitemaps.sitemap_response(request, sitemaps.INDEX_NAME)
+
+
+def sitemap_section(request, section, number):
+    sitemaps.ensure_fresh()
+    return sitemaps.sitemap_response(
+        request, sitemaps.chunk_name(section, number)
+    )
+
+
+def post_detail(request, post_id):
+    post = archive.get_post_or_archived(post_id)
+    if not post.author.is_active:
+        raise Http404('Пост не найден')
+    comments = post.comments.select_related('author')
     form = CommentForm(request.POST or None)
+    tag_page(request, post_tag(post.pk), author_tag(post.author_id))
+    if post.group_id is not None:
+        tag_page(request, group_tag(post.group_id))
     context = {
         'post': post,
         'comments': comments,
@@ -72,7 +136,7 @@ def post_detail(request, post_id):
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     context = {
         'form': form
     }
@@ -122,11 +186,10 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     post_list = Post.objects.filter(
-        author__following__user=request.user).select_related(
-        'author', 'group').order_by("-pub_date")
-    paginator = Paginator(post_list, MAX_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        author__following__user=request.user,
+        author__is_active=True).select_related(
+        'author', 'group').defer(*LISTING_DEFERRED).order_by("-pub_date")
+    page_obj = paginate(request, post_list, MAX_POSTS)
     context = {
         'page_obj': page_obj,
         'follow': True
@@ -136,7 +199,9 @@ def follow_index(request):
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        cached(User.objects.all()), username=username, is_active=True
+    )
     if request.user != author:
         Follow.objects.get_or_create(
             user=request.user,
@@ -147,6 +212,8 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        cached(User.objects.all()), username=username, is_active=True
+    )
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
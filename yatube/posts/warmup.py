@@ -0,0 +1,110 @@
+"""Прогрев кешей после деплоя.
+
+warm_paths() выбирает страницы, на которые после выкладки приходит
+основной трафик: первые страницы index, самые большие группы и профили
+авторов с наибольшим числом подписчиков. warm() запрашивает их как
+анонимный читатель в пуле из workers потоков. Рендер заполняет кеш целых
+страниц и кеш групп, а тег thumbnail заодно создаёт миниатюры и записи
+о них в core.ThumbnailRecord.
+
+Запросы идут либо прямо в WSGI-приложение этого процесса (полезно, когда
+кеш общий, например memcached, а миниатюры лежат на общем диске), либо
+по HTTP на base_url, чтобы прогреть кеши работающих воркеров.
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections
+from django.db.models import Count
+from django.urls import reverse
+
+from core.asgi import build_environ, run_wsgi
+from core.models import ThumbnailRecord
+
+from .models import Group
+
+User = get_user_model()
+
+WarmResult = namedtuple(
+    'WarmResult', 'pages cached failed thumbnails seconds'
+)
+
+
+def warm_paths(pages=3, groups=10, profiles=10):
+    paths = [reverse('posts:index')]
+    paths.extend(
+        f'{paths[0]}?page={number}' for number in range(2, pages + 1)
+    )
+    top_groups = Group.objects.annotate(
+        posts_count=Count('group_posts')
+    ).filter(posts_count__gt=0).order_by('-posts_count')[:groups]
+    paths.extend(
+        reverse('posts:group_list', args=[group.slug])
+        for group in top_groups
+    )
+    top_authors = User.objects.annotate(
+        followers=Count('following')
+    ).filter(followers__gt=0).order_by('-followers')[:profiles]
+    paths.extend(
+        reverse('posts:profile', args=[author.username])
+        for author in top_authors
+    )
+    return paths
+
+
+def fetch_local(application, path):
+    """Статус и признак попадания в кеш страниц для запроса к приложению."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [],
+    }
+    try:
+        status, headers, _ = run_wsgi(application, build_environ(scope, b''))
+    finally:
+        close_old_connections()
+    return status, (b'x-page-cache', b'hit') in headers
+
+
+def fetch_remote(base_url, path):
+    request = Request(base_url.rstrip('/') + path)
+    try:
+        with urlopen(request, timeout=30) as response:
+            response.read()
+            cached = response.headers.get('X-Page-Cache') == 'hit'
+            return response.status, cached
+    except HTTPError as error:
+        return error.code, False
+
+
+def warm(paths, workers=4, base_url=None):
+    if base_url:
+        def fetch(path):
+            return fetch_remote(base_url, path)
+    else:
+        application = get_wsgi_application()
+
+        def fetch(path):
+            return fetch_local(application, path)
+
+    thumbnails_before = ThumbnailRecord.objects.count()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch, paths))
+    seconds = time.perf_counter() - started
+    ok = [cached for status, cached in results if status == 200]
+    return WarmResult(
+        pages=len(ok),
+        cached=sum(ok),
+        failed=len(results) - len(ok),
+        thumbnails=ThumbnailRecord.objects.count() - thumbnails_before,
+        seconds=seconds,
+    )
@@ -0,0 +1,59 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from . import deletion
+from .models import AccountDeletion
+
+User = get_user_model()
+
+
+class DeferredDeletionUserAdmin(UserAdmin):
+    """Удаление пользователей через фоновое удаление (users.deletion).
+
+    Страница подтверждения не собирает список всех связанных объектов:
+    у активного автора это сотни тысяч строк.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        summary = [
+            f'{user}: аккаунт скрывается сразу, посты, комментарии '
+            f'и подписки ({deletion.count_content(user.pk)}) удаляются '
+            'в фоне'
+            for user in objs
+        ]
+        return summary, {User._meta.verbose_name_plural: len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        deletion.schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            deletion.schedule_deletion(user)
+
+
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'username', 'user_id', 'status', 'progress', 'created', 'finished'
+    )
+    list_filter = ('status',)
+    search_fields = ('username',)
+    readonly_fields = (
+        'user_id', 'username', 'status', 'total', 'deleted', 'created',
+        'finished', 'error'
+    )
+
+    def progress(self, obj):
+        if not obj.total:
+            return '-'
+        return f'{obj.deleted} из {obj.total} ({obj.deleted / obj.total:.0%})'
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.unregister(User)
+admin.site.register(User, DeferredDeletionUserAdmin)
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
@@ -0,0 +1,150 @@
+"""Удаление аккаунта без долгой блокировки базы.
+
+Обычный user.delete() собирает в память все связанные посты,
+комментарии и подписки и удаляет их одной транзакцией, на всё это время
+занимая блокировку записи SQLite. Здесь аккаунт сразу деактивируется
+(вход и профиль становятся недоступны, посты пропадают из лент и со
+своих страниц, закешированные страницы сбрасываются), а в той же
+транзакции ставится задача delete_account очереди core.tasks. Она
+удаляет содержимое пачками по диапазонам pk, каждая пачка - отдельной
+короткой транзакцией из DELETE без загрузки строк (posts.moderation).
+Картинки освобождаются по мере удаления постов, файл стирается, когда
+на него не остаётся ссылок. Последним удаляется сам пользователь,
+которому к этому моменту почти нечего каскадно удалять.
+
+Ход удаления виден в админке (AccountDeletion). Прерванное удаление
+продолжает команда delete_accounts: каждый шаг можно безопасно
+повторить. Команда сначала снимает задачу с очереди (take_over) и не
+трогает удаления, чью задачу сейчас держит воркер run_worker.
+"""
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.pagecache import invalidate_tags
+from core.tasks import task
+from posts import group_cache, moderation
+from posts.models import ArchivedComment, ArchivedPost, Comment, Follow, Post
+from posts.page_tags import INDEX_TAG, author_tag, group_tag
+
+from .models import AccountDeletion
+
+User = get_user_model()
+
+
+def count_content(user_id):
+    """Сколько строк удалит run_deletion, не считая самого аккаунта."""
+    return sum((
+        Post.objects.filter(author_id=user_id).count(),
+        ArchivedPost.objects.filter(author_id=user_id).count(),
+        Comment.objects.filter(
+            Q(author_id=user_id) | Q(post__author_id=user_id)
+        ).count(),
+        ArchivedComment.objects.filter(
+            Q(author_id=user_id) | Q(post__author_id=user_id)
+        ).count(),
+        Follow.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        ).count(),
+    ))
+
+
+def hide_pages(user_id):
+    """Сбрасывает закешированные страницы и списки с постами автора."""
+    group_ids = set(
+        Post.objects.filter(author_id=user_id).exclude(group_id=None)
+        .order_by().values_list('group_id', flat=True).distinct()
+    )
+    for group_id in group_ids:
+        group_cache.invalidate_group_posts(group_id)
+    invalidate_tags(
+        INDEX_TAG, author_tag(user_id),
+        *(group_tag(group_id) for group_id in group_ids)
+    )
+
+
+def schedule_deletion(user):
+    """Скрывает аккаунт и ставит удаление его содержимого в очередь."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        deletion, _ = AccountDeletion.objects.update_or_create(
+            user_id=user.pk,
+            defaults={
+                'username': user.username,
+                'status': AccountDeletion.PENDING,
+                'total': count_content(user.pk),
+            }
+        )
+        delete_account.delay(deletion.pk)
+    hide_pages(user.pk)
+    return deletion
+
+
+def take_over(deletion):
+    """Снимает задачу удаления с очереди, если её не выполняет воркер.
+
+    Возвращает False, если аренда задачи ещё у воркера: такое удаление
+    продолжать нельзя, оно и так идёт.
+    """
+    now = timezone.now()
+    delete_account.unfinished(deletion.pk).filter(
+        Q(locked_until=None) | Q(locked_until__lt=now)
+    ).update(
+        finished_at=now,
+        locked_until=None,
+        last_error='Продолжено командой delete_accounts',
+    )
+    return not delete_account.unfinished(deletion.pk).exists()
+
+
+def _steps(user_id, batch_size):
+    """Шаги удаления: каждый удаляет одну пачку и возвращает её размер."""
+    def posts(archived):
+        return sum(
+            moderation.delete_posts_batch(user_id, archived, batch_size)
+        )
+
+    return (
+        partial(moderation.delete_follows_batch, user_id, batch_size),
+        partial(moderation.delete_comments_batch, user_id, True, batch_size),
+        partial(moderation.delete_comments_batch, user_id, False, batch_size),
+        partial(posts, True),
+        partial(posts, False),
+    )
+
+
+def _progress(deletion, **fields):
+    AccountDeletion.objects.filter(pk=deletion.pk).update(**fields)
+
+
+def run_deletion(deletion, batch_size=moderation.DELETE_BATCH_SIZE):
+    """Удаляет содержимое и сам аккаунт пачками."""
+    _progress(deletion, status=AccountDeletion.RUNNING, error='')
+    try:
+        for step in _steps(deletion.user_id, batch_size):
+            while True:
+                deleted = step()
+                if not deleted:
+                    break
+                _progress(deletion, deleted=F('deleted') + deleted)
+                if settings.ACCOUNT_DELETION_PAUSE:
+                    time.sleep(settings.ACCOUNT_DELETION_PAUSE)
+        User.objects.filter(pk=deletion.user_id).delete()
+    except Exception as error:
+        _progress(deletion, status=AccountDeletion.FAILED, error=str(error))
+        raise
+    _progress(
+        deletion, status=AccountDeletion.DONE, finished=timezone.now()
+    )
+    invalidate_tags(author_tag(deletion.user_id))
+
+
+@task(max_attempts=3)
+def delete_account(deletion_id):
+    run_deletion(AccountDeletion.objects.get(pk=deletion_id))
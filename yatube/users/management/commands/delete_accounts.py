@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.moderation import DELETE_BATCH_SIZE
+from users.deletion import run_deletion, take_over
+from users.models import AccountDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Доводит до конца удаления аккаунтов, прерванные перезапуском '
+        'или ошибкой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DELETE_BATCH_SIZE,
+            help='Число строк в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        pending = AccountDeletion.objects.exclude(
+            status=AccountDeletion.DONE
+        ).order_by('created')
+        done = 0
+        for deletion in pending:
+            if not take_over(deletion):
+                self.stdout.write(
+                    f'{deletion.username} удаляет run_worker, пропущено'
+                )
+                continue
+            self.stdout.write(f'Удаляется {deletion.username}')
+            run_deletion(deletion, options['batch_size'])
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f'Удалено аккаунтов: {done}'))
@@ -0,0 +1,34 @@
+from django.db import models
+
+
+class AccountDeletion(models.Model):
+    """Фоновое удаление аккаунта и его содержимого (users.deletion)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    user_id = models.PositiveIntegerField('id пользователя', unique=True)
+    username = models.CharField('Имя пользователя', max_length=150)
+    status = models.CharField(
+        'Состояние', max_length=7, choices=STATUS_CHOICES, default=PENDING
+    )
+    total = models.PositiveIntegerField('Всего объектов', default=0)
+    deleted = models.PositiveIntegerField('Удалено', default=0)
+    created = models.DateTimeField('Дата запроса', auto_now_add=True)
+    finished = models.DateTimeField('Дата завершения', blank=True, null=True)
+    error = models.TextField('Ошибка', blank=True)
+
+    def __str__(self):
+        return self.username
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Удаление аккаунта'
+        verbose_name_plural = 'Удаления аккаунтов'
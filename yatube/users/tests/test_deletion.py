@@ -0,0 +1,174 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+from posts.models import Comment, Follow, Group, Post, TextSignature
+from users import deletion
+from users.models import AccountDeletion
+
+User = get_user_model()
+
+
+@override_settings(ACCOUNT_DELETION_PAUSE=0)
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='Spammer')
+        self.other = User.objects.create_user(username='Reader')
+        self.posts = [
+            Post.objects.create(
+                author=self.user,
+                text=f'Достаточно длинный текст поста номер {number} '
+                     'для индекса похожих текстов'
+            )
+            for number in range(5)
+        ]
+        self.other_post = Post.objects.create(
+            author=self.other, text='Пост другого автора'
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.other, text='Ответ'
+        )
+        Comment.objects.create(
+            post=self.other_post, author=self.user, text='Комментарий'
+        )
+        Follow.objects.create(user=self.user, author=self.other)
+        Follow.objects.create(user=self.other, author=self.user)
+
+    def test_schedule_hides_account(self):
+        """Аккаунт скрывается сразу, содержимое пока остаётся"""
+        task = deletion.schedule_deletion(self.user)
+        self.assertEqual(task.status, AccountDeletion.PENDING)
+        self.assertTrue(
+            Task.objects.filter(name=deletion.delete_account.name).exists()
+        )
+        self.assertEqual(task.total, 5 + 2 + 2)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        response = Client().get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_schedule_hides_posts_from_listings(self):
+        """Посты скрытого автора сразу пропадают из лент и кешей"""
+        cache.clear()
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.filter(pk=self.posts[0].pk).update(group=group)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[group.slug]),
+            reverse('posts:index_feed', args=['atom']),
+            reverse('posts:group_feed', args=[group.slug, 'rss']),
+        )
+        guest_client = Client()
+        for url in urls:
+            self.assertContains(guest_client.get(url), 'номер 0')
+        deletion.schedule_deletion(self.user)
+        for url in urls:
+            with self.subTest(url=url):
+                response = guest_client.get(url)
+                self.assertNotContains(response, 'номер 0')
+        self.assertContains(
+            guest_client.get(reverse('posts:index')), 'Пост другого автора'
+        )
+        response = guest_client.get(
+            reverse('posts:post_detail', args=[self.posts[0].pk])
+        )
+        self.assertEqual(response.status_code, 404)
+        cache.clear()
+
+    def test_run_keeps_unrelated_cached_pages(self):
+        """Пачки удаления не сбрасывают весь кеш страниц"""
+        cache.clear()
+        bystander = User.objects.create_user(username='Bystander')
+        Post.objects.create(author=bystander, text='Посторонний пост')
+        guest_client = Client()
+        profile_url = reverse('posts:profile', args=[bystander.username])
+        detail_url = reverse('posts:post_detail', args=[self.other_post.pk])
+        guest_client.get(profile_url)
+        self.assertContains(guest_client.get(detail_url), 'Комментарий')
+        task = deletion.schedule_deletion(self.user)
+        deletion.run_deletion(task, batch_size=2)
+        response = guest_client.get(profile_url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        response = guest_client.get(detail_url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertNotContains(response, 'Комментарий')
+        cache.clear()
+
+    def test_run_deletes_in_batches(self):
+        """Содержимое удаляется пачками, прогресс сохраняется"""
+        task = deletion.schedule_deletion(self.user)
+        deletion.run_deletion(task, batch_size=2)
+        task.refresh_from_db()
+        self.assertEqual(task.status, AccountDeletion.DONE)
+        self.assertEqual(task.deleted, task.total)
+        self.assertIsNotNone(task.finished)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TextSignature.objects.filter(
+            kind=TextSignature.POST,
+            object_id__in=[post.pk for post in self.posts]
+        ).exists())
+
+    def test_queued_task_deletes_account(self):
+        """Задача из очереди удаляет аккаунт целиком"""
+        task = deletion.schedule_deletion(self.user)
+        for row in tasks.claim(10):
+            self.assertTrue(tasks.execute(row))
+        task.refresh_from_db()
+        self.assertEqual(task.status, AccountDeletion.DONE)
+
+    def test_command_resumes_unfinished(self):
+        """delete_accounts доводит до конца незавершённые удаления"""
+        task = deletion.schedule_deletion(self.user)
+        AccountDeletion.objects.filter(pk=task.pk).update(
+            status=AccountDeletion.FAILED
+        )
+        call_command('delete_accounts', stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.status, AccountDeletion.DONE)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_command_skips_deletion_held_by_worker(self):
+        """delete_accounts не трогает удаление, которое выполняет воркер"""
+        task = deletion.schedule_deletion(self.user)
+        [row] = tasks.claim(10)
+        out = StringIO()
+        call_command('delete_accounts', stdout=out)
+        self.assertIn('пропущено', out.getvalue())
+        self.assertTrue(Post.objects.filter(author=self.user).exists())
+        Task.objects.filter(pk=row.pk).update(
+            locked_until=timezone.now() - timedelta(1)
+        )
+        call_command('delete_accounts', stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.status, AccountDeletion.DONE)
+        self.assertIsNotNone(Task.objects.get(pk=row.pk).finished_at)
+        self.assertEqual(tasks.claim(10), [])
+
+    def test_admin_delete_is_deferred(self):
+        """Удаление из админки только ставит аккаунт в очередь"""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.user.pk])
+        response = client.get(url)
+        self.assertContains(response, 'удаляются в фоне')
+        client.post(url, {'post': 'yes'})
+        self.assertTrue(
+            AccountDeletion.objects.filter(user_id=self.user.pk).exists()
+        )
+        self.assertTrue(Post.objects.filter(author=self.user).exists())
@@ -0,0 +1,27 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django views run in a bounded thread pool (``ASGI_THREADS``) while the event
+loop handles client connections and the Server-Sent Events stream of new
+posts (pages link to it only when ``LIVE_EVENTS`` is enabled), e.g.::
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.conf import settings
+
+from core.asgi import ASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from .wsgi import application as wsgi_application  # noqa: E402
+from posts import live  # noqa: E402
+
+application = ASGIHandler(
+    wsgi_application,
+    max_workers=settings.ASGI_THREADS,
+    routes={live.EVENTS_PATH: live.feed_events}
+)
@@ -36,7 +36,9 @@ ALLOWED_HOSTS = [
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Админка регистрирует модели при первом запросе к /admin/
+    # (core.admin_urls), а не при старте процесса
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -45,8 +47,6 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
-    'sorl.thumbnail',
-
 ]
 
 MIDDLEWARE = [
@@ -54,9 +54,12 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.auth.CachedAuthenticationMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.memo.MemoReportMiddleware',
+    'core.pagecache.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -74,13 +77,34 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.live.live',
             ],
+            # sorl.thumbnail не в INSTALLED_APPS, см. core.thumbnails
+            'libraries': {
+                'thumbnail': 'sorl.thumbnail.templatetags.thumbnail',
+            },
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Размер пула потоков, в котором ASGI-режим выполняет представления
+ASGI_THREADS = 10
+
+# Уведомления о новых постах по Server-Sent Events (posts.live). Поток
+# событий обслуживает только ASGI-приложение yatube.asgi; при запуске
+# через WSGI адреса событий нет, и страницы не должны к нему подключаться
+LIVE_EVENTS = False
+
+# Доинициализировать приложение и вызвать gc.freeze() при импорте
+# yatube.wsgi; включать вместе с preload-режимом сервера приложений
+# (gunicorn --preload), см. core.preload
+WSGI_PRELOAD = False
+
+# Бюджет холодного старта (импорт yatube.wsgi), мс; см. core.startup
+STARTUP_BUDGET_MS = 1000
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -132,10 +156,43 @@ USE_TZ = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки хранятся по хешу содержимого, одинаковые файлы - в одном
+# экземпляре (core.media). Миниатюры sorl-thumbnail уже названы по хешу
+# и пишутся обычным хранилищем.
+DEFAULT_FILE_STORAGE = 'core.media.ContentAddressedStorage'
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
+
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static')),
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+
+# CSS-бандлы, из которых collectstatic вырезает неиспользуемые правила
+STATICFILES_PURGE_CSS = ('css/bootstrap.min.css',)
+
+# Классы, которые появляются не в шаблонах (например, в JS или формах)
+STATICFILES_PURGE_SAFELIST = ()
+
+# Лимиты запросов на запись по имени URL: 'число/период' (s, m, h, d)
+# или ('число/период', (методы,)) для ограничения не только POST
+RATE_LIMITS = {
+    'posts:post_create': '10/m',
+    'posts:post_edit': '30/m',
+    'posts:add_comment': '20/m',
+    'posts:profile_follow': ('30/m', ('GET',)),
+    'users:signup': '5/h',
+}
+
+# Сессии читаются из кеша и пишутся сквозь него в БД
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -147,14 +204,107 @@ LOGIN_REDIRECT_URL = 'posts:index'
 для перенаправления на главную страницу при выходе из аккаунта
 """
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма копятся в таблице core.OutboxMessage и уходят командой send_outbox
+EMAIL_BACKEND = 'core.mail.OutboxBackend'
+
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Сколько секунд хранить отправленные письма (core.tasks.purge_sent_mail)
+OUTBOX_KEEP_SENT = 60 * 60 * 24 * 7
+
+# Сколько секунд хранить письма, исчерпавшие попытки отправки
+OUTBOX_KEEP_DEAD = 60 * 60 * 24 * 30
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Посты старше этого срока команда archive_posts переносит в архив
+POSTS_ARCHIVE_AFTER_DAYS = 365
+
+# Очередь задач (core.tasks): число потоков run_worker, на сколько
+# секунд воркер захватывает задачу (пока она идёт, аренда продлевается)
+# и сколько хранить выполненные
+TASK_WORKER_THREADS = 4
+TASK_LEASE = 60 * 10
+TASK_KEEP_FINISHED = 60 * 60 * 24
+
+# Пауза между пачками фонового удаления аккаунта (users.deletion), с
+ACCOUNT_DELETION_PAUSE = 0.05
+
+# Число постов на странице для отдельных лент по имени URL; остальные
+# ленты используют число, заданное во view (posts.pagination)
+POSTS_PER_PAGE = {}
+
+# Кеш целых страниц для анонимных читателей (core.pagecache)
+PAGE_CACHE_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+)
+PAGE_CACHE_PARAMS = ('page',)
+PAGE_CACHE_TIMEOUT = 60 * 5
+# Сколько ещё отдавать истёкшую страницу, пока её пересчитывают в фоне,
+# сколько держится блокировка пересчёта и сколько одинаковые запросы
+# ждут результата того, кто её взял
+PAGE_CACHE_STALE_TIMEOUT = 60 * 60
+PAGE_CACHE_LOCK_TIMEOUT = 30
+PAGE_CACHE_COALESCE_WAIT = 5
+
+# Перегрузка (core.overload): запросов в обработке у процесса или среднее
+# время запроса с ожиданием в очереди, после которых страницы отдаются
+# только из кеша
+OVERLOAD_MAX_IN_FLIGHT = 50
+OVERLOAD_LATENCY_MS = 2000
+# Учитывать ли заголовок X-Request-Start. Включать, только если его
+# выставляет свой прокси и перезаписывает значение от клиента
+OVERLOAD_TRUST_REQUEST_START = False
+
+# Число записей в лентах Atom/RSS и срок хранения готовой ленты в кеше
+# (лента сбрасывается раньше, как только в ней появляется новый пост)
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Карта сайта (posts.sitemaps): куда писать файлы, с каким адресом сайта,
+# сколько id в одном куске (предел протокола - 50 000 URL) и как часто
+# запрос к карте сверяет куски с базой
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_BASE_URL = 'http://127.0.0.1:8000'
+SITEMAP_CHUNK_SIZE = 50000
+SITEMAP_CHECK_INTERVAL = 60 * 10
+
+# Поиск почти одинаковых текстов (posts.duplicates): 'flag' собирает
+# копии в кластеры для модераторов, 'reject' не даёт их опубликовать.
+# Тексты короче DUPLICATE_MIN_LENGTH символов не проверяются
+DUPLICATE_ACTION = 'flag'
+DUPLICATE_THRESHOLD = 0.8
+DUPLICATE_MIN_LENGTH = 40
+
+# Кеш результатов запросов ORM (core.querycache): выключатель, срок
+# хранения и модели, чей CachingManager кеширует все запросы
+QUERY_CACHE_ENABLED = True
+QUERY_CACHE_TIMEOUT = 60 * 10
+QUERY_CACHE_MODELS = ('posts.Group',)
+
+# Кеш должен быть общим для всех воркеров: сброс group_cache, querycache,
+# кеша страниц и кешированных сессий идёт через сигналы, и сброс в памяти
+# одного процесса другие не увидят. Адрес memcached (host:port) задаётся
+# переменной окружения CACHE_LOCATION. Без неё используется память
+# процесса - только для разработки и тестов, с одним воркером; такую
+# конфигурацию без DEBUG не пропустит check --deploy (core.E001)
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': CACHE_LOCATION,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
@@ -16,13 +16,13 @@ Including another URLconf
 
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
 
 from django.urls import include, path
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
-    path('admin/', admin.site.urls),
+    # Модуль передаётся строкой, чтобы админка загружалась лениво
+    path('admin/', ('core.admin_urls', 'admin', 'admin')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
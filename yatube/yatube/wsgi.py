@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from core.preload import preload
+from core.wsgi_static import StaticFilesMiddleware
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
-application = get_wsgi_application()
+application = StaticFilesMiddleware(get_wsgi_application(), (
+    (settings.STATIC_URL, settings.STATIC_ROOT, True),
+    (settings.MEDIA_URL, settings.MEDIA_ROOT, False),
+))
+
+if settings.WSGI_PRELOAD:
+    preload()